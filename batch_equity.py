@@ -0,0 +1,99 @@
+"""基于 NumPy 的批量牌型评估和胜率模拟
+
+evaluate_batch() 一次评估 N 手牌, 输入为 (N, 7) 的 int8 牌编号数组,
+返回与 evaluator.evaluate() 完全相同的整数强度。
+random_runouts() 从剩余的牌中批量无放回地随机抽牌。
+需要安装 numpy; equity.py 在 numpy 可用时自动使用这里的批量模拟。
+"""
+from typing import Optional, Sequence, Tuple
+
+import numpy as np
+
+import evaluator
+from table_rng import permutations
+
+# 每张牌的点数键(5进制计数)、花色键(3位计数)、点数序号和花色序号
+CARD_RANK_KEY = np.array([5 ** (i >> 2) for i in range(52)], dtype=np.int64)
+CARD_SUIT_KEY = np.array([1 << (3 * (i & 3)) for i in range(52)], dtype=np.int16)
+CARD_RANK_BIT = np.array([1 << (i >> 2) for i in range(52)], dtype=np.int16)
+CARD_SUIT = np.array([i & 3 for i in range(52)], dtype=np.int8)
+
+# 点数键 -> 强度, 按键排序后用二分查找
+RANK_KEYS = np.array(sorted(evaluator.RANK_TABLE), dtype=np.int64)
+RANK_VALUES = np.array([evaluator.RANK_TABLE[k] for k in RANK_KEYS.tolist()], dtype=np.int32)
+FLUSH_SUIT = np.array(evaluator.FLUSH_SUIT, dtype=np.int8)
+FLUSH_TABLE = np.array(evaluator.FLUSH_TABLE, dtype=np.int32)
+
+# 单次处理的最大行数, 控制临时数组的内存占用
+CHUNK_SIZE = 1 << 16
+
+
+def evaluate_batch(cards: np.ndarray) -> np.ndarray:
+    """评估 (N, k) 牌编号数组中每一行(1~7张)的最佳牌型, 返回 (N,) 的 int32 强度"""
+    cards = np.asarray(cards, dtype=np.intp)
+    rank_key = CARD_RANK_KEY[cards].sum(axis=1)
+    suit_key = CARD_SUIT_KEY[cards].sum(axis=1)
+    strength = RANK_VALUES[np.searchsorted(RANK_KEYS, rank_key)]
+
+    flush_suit = FLUSH_SUIT[suit_key]
+    flush_rows = np.flatnonzero(flush_suit >= 0)
+    if flush_rows.size:
+        sub = cards[flush_rows]
+        in_suit = CARD_SUIT[sub] == flush_suit[flush_rows, None]
+        # 同一花色内点数不会重复, 所以位图可以直接相加
+        bits = np.where(in_suit, CARD_RANK_BIT[sub], 0).sum(axis=1)
+        strength[flush_rows] = FLUSH_TABLE[bits]
+    return strength
+
+
+def remaining_cards(dead: Sequence[int]) -> np.ndarray:
+    """返回去掉已知牌之后剩余的牌编号"""
+    mask = np.ones(52, dtype=bool)
+    mask[list(dead)] = False
+    return np.flatnonzero(mask).astype(np.int8)
+
+
+def random_runouts(dead: Sequence[int], n: int, k: int,
+                   rng: Optional[np.random.Generator] = None) -> np.ndarray:
+    """从剩余的牌中为 n 次模拟各无放回地抽 k 张牌, 返回 (n, k) 的 int8 数组"""
+    rng = rng or np.random.default_rng()
+    deck = remaining_cards(dead)
+    if k > deck.size:
+        raise ValueError("剩余的牌不够抽取")
+    out = np.empty((n, k), dtype=np.int8)
+    for start in range(0, n, CHUNK_SIZE):
+        size = min(CHUNK_SIZE, n - start)
+        # 每行独立做 k 步 Fisher-Yates 洗牌, 只打乱需要抽出的前 k 个位置
+        out[start:start + size] = permutations(size, k, rng, deck)
+    return out
+
+
+def simulate(hole: Sequence[int], board: Sequence[int], n_opponents: int, n: int,
+             rng: Optional[np.random.Generator] = None) -> Tuple[int, int, float]:
+    """批量模拟 n 次随机发牌, 返回 (独赢次数, 平局次数, 累计分得的底池比例)"""
+    rng = rng or np.random.default_rng()
+    board_needed = 5 - len(board)
+    needed = board_needed + 2 * n_opponents
+    wins = ties = 0
+    share = 0.0
+    for start in range(0, n, CHUNK_SIZE):
+        size = min(CHUNK_SIZE, n - start)
+        drawn = random_runouts(list(hole) + list(board), size, needed, rng)
+        boards = np.hstack([np.broadcast_to(np.array(board, dtype=np.int8), (size, len(board))),
+                            drawn[:, :board_needed]])
+        hero = evaluate_batch(np.hstack([np.broadcast_to(np.array(hole, dtype=np.int8), (size, 2)),
+                                         boards]))
+        if n_opponents:
+            opponents = np.stack([evaluate_batch(np.hstack([drawn[:, i:i + 2], boards]))
+                                  for i in range(board_needed, needed, 2)], axis=1)
+            best = opponents.max(axis=1)
+            tied = (opponents == best[:, None]).sum(axis=1)
+        else:
+            best = np.zeros(size, dtype=np.int32)
+            tied = np.zeros(size, dtype=np.intp)
+        won = hero > best
+        tie = hero == best
+        wins += int(won.sum())
+        ties += int(tie.sum())
+        share += float(won.sum() + (1.0 / (tied[tie] + 1)).sum())
+    return wins, ties, share
@@ -0,0 +1,223 @@
+"""下注轮状态机
+
+BettingRound 保存一局中每个座位的筹码、本轮下注、本局投入、弃牌和全下标记,
+数组在创建时按最大座位数分配, 之后每局、每个下注轮都原地重置, 不再分配新列表。
+引擎只需要反复读取 to_act (当前行动的座位) 并调用 submit() 提交行动,
+直到 round_over 为真, 再调用 start_street() 进入下一个下注轮:
+
+    betting.start_hand(stacks)
+    betting.start_street(first=utg, blinds=((sb, 10), (bb, 20)))
+    while not betting.round_over:
+        action, amount = decide(betting.to_act)
+        betting.submit(action, amount)
+
+加注后所有还能行动的玩家都要重新表态, 最小加注额为上一次加注的幅度(至少一个大盲注),
+筹码不足时跟注或加注自动变为全下。不足一个最小加注的全下不重新开放加注:
+已经表态的玩家只需要跟注或弃牌。
+"""
+from typing import Sequence, Tuple
+
+FOLD = 'fold'
+CHECK = 'check'
+CALL = 'call'
+RAISE = 'raise'
+
+# 默认最多座位数
+MAX_SEATS = 10
+
+
+class BettingRound:
+    """一局德州扑克的下注状态"""
+    __slots__ = ('n', 'big_blind', 'stack', 'bet', 'committed', 'folded', 'all_in', 'acted',
+                 'capped', 'pot', 'current_bet', 'min_raise', 'last_aggressor', 'last_action',
+                 'to_act', 'live', 'active', 'pending')
+
+    def __init__(self, max_seats: int = MAX_SEATS, big_blind: int = 10):
+        self.n = 0                       # 本局的座位数
+        self.big_blind = big_blind       # 最小加注幅度
+        self.stack = [0] * max_seats     # 剩余筹码
+        self.bet = [0] * max_seats       # 本轮下注
+        self.committed = [0] * max_seats  # 本局一共投入底池的筹码
+        self.folded = [False] * max_seats
+        self.all_in = [False] * max_seats
+        self.acted = [False] * max_seats  # 上一次加注之后是否已经表态
+        self.capped = [False] * max_seats  # 面对不足额的全下, 只能跟注或弃牌
+        self.pot = 0
+        self.current_bet = 0             # 本轮需要跟到的下注额
+        self.min_raise = big_blind       # 本轮最小加注幅度
+        self.last_aggressor = -1         # 本轮最后一个加注的座位
+        self.last_action = None          # 最近一次提交的实际行动
+        self.to_act = -1                 # 当前行动的座位, 本轮结束时为 -1
+        self.live = 0                    # 没有弃牌的玩家数
+        self.active = 0                  # 没有弃牌也没有全下, 还能行动的玩家数
+        self.pending = 0                 # 本轮还需要表态的玩家数
+
+    def start_hand(self, stacks: Sequence[int]):
+        """开始新的一局, stacks 为每个座位的筹码; 没有筹码的座位视为弃牌"""
+        n = len(stacks)
+        if n > len(self.stack):
+            raise ValueError(f"座位数超过上限 {len(self.stack)}")
+        self.n = n
+        self.pot = 0
+        self.live = self.active = 0
+        for i in range(n):
+            self.stack[i] = stacks[i]
+            self.bet[i] = 0
+            self.committed[i] = 0
+            self.all_in[i] = False
+            self.acted[i] = False
+            self.capped[i] = False
+            self.folded[i] = stacks[i] <= 0
+            if not self.folded[i]:
+                self.live += 1
+                self.active += 1
+
+    def start_street(self, first: int = 0, blinds: Sequence[Tuple[int, int]] = ()):
+        """开始一个下注轮, 从座位 first 开始行动
+
+        blinds 为翻牌前强制下注的 (座位, 金额), 筹码不足时全下; 下盲注不算表态,
+        大盲注在没人加注时仍可以过牌或加注。
+        """
+        self.current_bet = 0
+        self.min_raise = self.big_blind
+        self.last_aggressor = -1
+        self.last_action = None
+        for i in range(self.n):
+            self.bet[i] = 0
+            self.acted[i] = False
+            self.capped[i] = False
+        for seat, amount in blinds:
+            self._commit(seat, min(amount, self.stack[seat]))
+            if self.bet[seat] > self.current_bet:
+                self.current_bet = self.bet[seat]
+        self.pending = 0
+        for i in range(self.n):
+            if self._can_act(i) and (self.active > 1 or self.bet[i] < self.current_bet):
+                # 其他人都已全下时, 剩下的一名玩家只需要回应还没跟平的下注
+                self.pending += 1
+        self.to_act = -1
+        if self.pending and self.live > 1:
+            self.to_act = self._next_to_act(first - 1)
+
+    def _commit(self, seat: int, put: int):
+        """座位 seat 向底池投入 put 个筹码"""
+        self.stack[seat] -= put
+        self.bet[seat] += put
+        self.committed[seat] += put
+        self.pot += put
+        if self.stack[seat] == 0 and not self.all_in[seat]:
+            self.all_in[seat] = True
+            self.active -= 1
+
+    def next_live(self, seat: int) -> int:
+        """seat 之后第一个没有弃牌(有筹码参加本局)的座位"""
+        for step in range(1, self.n + 1):
+            i = (seat + step) % self.n
+            if not self.folded[i]:
+                return i
+        return -1
+
+    def _can_act(self, seat: int) -> bool:
+        return not self.folded[seat] and not self.all_in[seat]
+
+    def _next_to_act(self, seat: int) -> int:
+        """从 seat 之后按座位顺序找到下一个还需要表态的座位"""
+        for step in range(1, self.n + 1):
+            i = (seat + step) % self.n
+            if not self.acted[i] and self._can_act(i):
+                return i
+        return -1
+
+    @property
+    def round_over(self) -> bool:
+        """本轮下注是否结束"""
+        return self.to_act < 0
+
+    @property
+    def hand_over(self) -> bool:
+        """是否只剩一名玩家没有弃牌"""
+        return self.live <= 1
+
+    def to_call(self, seat: int) -> int:
+        """座位 seat 跟注还需要投入的筹码(不超过剩余筹码)"""
+        return min(self.current_bet - self.bet[seat], self.stack[seat])
+
+    def min_raise_to(self) -> int:
+        """当前行动玩家最少要加注到的下注额(筹码不足时为全下)"""
+        seat = self.to_act
+        if self.capped[seat]:
+            return self.max_raise_to()
+        return min(self.current_bet + self.min_raise, self.bet[seat] + self.stack[seat])
+
+    def max_raise_to(self) -> int:
+        """当前行动玩家最多能加注到的下注额, 即全下; 不能加注时不超过 current_bet"""
+        seat = self.to_act
+        if self.capped[seat]:
+            return min(self.current_bet, self.bet[seat] + self.stack[seat])
+        return self.bet[seat] + self.stack[seat]
+
+    def submit(self, action: str, amount: int = 0) -> int:
+        """提交当前行动座位的行动, 返回本次投入的筹码
+
+        action 为 fold/check/call/raise, raise 的 amount 是本轮要加注到的下注额,
+        低于最小加注时按最小加注计算, 超过筹码时按全下计算。
+        实际执行的行动(例如筹码不足的加注变成跟注)保存在 last_action。
+        """
+        seat = self.to_act
+        if seat < 0:
+            raise RuntimeError("本轮下注已经结束")
+        put = 0
+        if action == FOLD:
+            self.folded[seat] = True
+            self.live -= 1
+            self.active -= 1
+            self.last_action = FOLD
+        elif action == CHECK or action == CALL:
+            put = self.to_call(seat)
+            if action == CHECK and put > 0:
+                raise ValueError("面对下注不能过牌")
+            self.last_action = CALL if put > 0 else CHECK
+        elif action == RAISE:
+            target = max(amount, self.current_bet + self.min_raise)
+            target = min(target, self.bet[seat] + self.stack[seat])
+            if target <= self.current_bet or self.capped[seat]:
+                # 筹码不足以加注或加注没有重新开放, 只能跟注
+                put = self.to_call(seat)
+                self.last_action = CALL if put > 0 else CHECK
+            else:
+                put = target - self.bet[seat]
+                full = target - self.current_bet >= self.min_raise
+                if full:
+                    self.min_raise = target - self.current_bet
+                    # 足额加注后其他还能行动的玩家都要重新表态, 并且都可以再加注
+                    self.pending = 0
+                    for i in range(self.n):
+                        if i != seat and self._can_act(i):
+                            self.acted[i] = False
+                            self.capped[i] = False
+                            self.pending += 1
+                    self.pending += 1  # 下面会为加注者自己减掉
+                else:
+                    # 不足额的全下: 已经表态的玩家要回应新的下注额, 但只能跟注或弃牌;
+                    # 还没有表态的玩家照常行动
+                    for i in range(self.n):
+                        if i != seat and self._can_act(i) and self.acted[i]:
+                            self.acted[i] = False
+                            self.capped[i] = True
+                            self.pending += 1
+                self.current_bet = target
+                self.last_aggressor = seat
+                self.last_action = RAISE
+        else:
+            raise ValueError(f"未知的行动: {action}")
+
+        if put:
+            self._commit(seat, put)
+        self.acted[seat] = True
+        self.pending -= 1
+
+        if self.live <= 1 or self.pending == 0:
+            self.to_act = -1
+        else:
+            self.to_act = self._next_to_act(seat)
+        return put
@@ -0,0 +1,419 @@
+"""翻牌/转牌/河牌的牌力分组预计算
+
+对每个下注轮所有花色同构意义下不同的局面(底牌 + 公共牌), 计算期望牌力 EHS
+(发完剩余公共牌后对一手随机牌的胜率, 平局算一半)和 EHS² (同一量平方的期望,
+反映听牌的潜力), 再用 k-means 在 (EHS, EHS²) 上聚成 N 组。同构局面的数量为
+翻牌 1,286,792、转牌 13,960,050、河牌 123,156,254 个。
+
+计算按标准公共牌分块, 多进程并行; 每块完成后写入工作目录中的一个文件,
+中断后用相同的参数重新运行会跳过已完成的块。最后把每个下注轮的局面和分组写入一个
+可以 mmap 的文件, 其中是开放寻址(线性探测)的哈希表, 对局时查一次分组为 O(1):
+
+    python buckets.py --streets flop,turn,river --buckets 10 --workers 8
+    table = load_table()
+    table.bucket(hole, board)  # 牌编号
+
+文件格式(小端):
+    4字节 b'BKTS' | uint16 版本 | uint16 下注轮数
+    每个下注轮: 8字节名称 | uint32 分组数 | uint32 保留 | uint64 哈希表大小
+    之后依次是每个下注轮的 uint64 键[大小]、uint8 分组[大小](补齐到8字节)、
+    float32 分组中心[分组数 * 2] (EHS, EHS²), 分组按 EHS 从小到大编号
+
+需要安装 numpy。转牌和河牌的局面很多, 完整计算需要较长时间和数 GB 的磁盘空间。
+"""
+import argparse
+import json
+import mmap
+import os
+import struct
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from itertools import combinations, permutations
+from typing import Dict, Optional, Sequence, Tuple
+
+import numpy as np
+
+from ranges import CARD_COMBOS, COMBO_INDEX, COMBOS, combo_strengths
+
+MAGIC = b'BKTS'
+VERSION = 1
+HEADER = struct.Struct('<4sHH')
+STREET_HEADER = struct.Struct('<8sIIQ')
+
+STREET_CARDS = {'flop': 3, 'turn': 4, 'river': 5}
+DEFAULT_BUCKETS = 10
+# 分组编号按 uint8 保存
+MAX_BUCKETS = 256
+BOARDS_PER_CHUNK = {'flop': 8, 'turn': 64, 'river': 512}
+
+DEFAULT_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'buckets.bin')
+DEFAULT_WORK_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'buckets_work')
+
+# 24种花色置换下每张牌变成的牌
+SUIT_PERMS = np.array(list(permutations(range(4))), dtype=np.int64)
+PERM_CARDS = (np.arange(52) // 4 * 4)[None, :] + SUIT_PERMS[:, np.arange(52) % 4]
+_PERM_LISTS = PERM_CARDS.tolist()
+
+# 哈希表: 乘法散列 + 线性探测, 键为 0 的位置是空的
+GOLDEN = 0x9E3779B97F4A7C15
+MASK64 = (1 << 64) - 1
+
+
+def _pack(cards: np.ndarray) -> np.ndarray:
+    """把每行升序排列的牌编号打包成整数(每张牌6位), 整数大小与逐张比较的顺序一致"""
+    key = np.zeros(cards.shape[0], dtype=np.int64)
+    for i in range(cards.shape[1]):
+        key = (key << 6) | (cards[:, i] + 1)
+    return key
+
+
+def canonical_boards(k: int) -> np.ndarray:
+    """所有花色同构意义下不同的 k 张公共牌(标准形式), 返回 (M, k) 的牌编号"""
+    boards = np.array(list(combinations(range(52), k)), dtype=np.int64)
+    own = _pack(boards)
+    best = own.copy()
+    for perm in PERM_CARDS:
+        best = np.minimum(best, _pack(np.sort(perm[boards], axis=1)))
+    return boards[own == best]
+
+
+def canonical_keys(holes: np.ndarray, board: Sequence[int]) -> np.ndarray:
+    """标准公共牌 board 上每手底牌 (H, 2) 所在局面的标准键
+
+    键 = 公共牌(高位) + 底牌(低12位)在24种花色置换下的最小值; board 本身是标准形式时
+    最小值的公共牌部分总是 board, 所以不同块之间不会有重复的键
+    """
+    board = np.asarray(board, dtype=np.int64)
+    best = np.full(holes.shape[0], np.iinfo(np.int64).max, dtype=np.int64)
+    for perm in PERM_CARDS:
+        board_key = int(_pack(np.sort(perm[board])[None, :])[0])
+        mapped = np.sort(perm[holes], axis=1)
+        best = np.minimum(best, (board_key << 12) | _pack(mapped))
+    return best
+
+
+def situation_key(hole: Sequence[int], board: Sequence[int]) -> int:
+    """一个局面(底牌 + 公共牌)的标准键, 对局时查表使用"""
+    best = None
+    for perm in _PERM_LISTS:
+        key = 0
+        for c in sorted(perm[c] for c in board):
+            key = (key << 6) | (c + 1)
+        a, b = sorted((perm[hole[0]], perm[hole[1]]))
+        key = (key << 12) | ((a + 1) << 6) | (b + 1)
+        if best is None or key < best:
+            best = key
+    return best
+
+
+def hand_strengths(strengths: np.ndarray, combos: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """公共牌已发完时每手底牌对一手随机牌的胜率
+
+    strengths 为 ranges.combo_strengths(完整公共牌), combos 为底牌的起手牌序号 (H,)。
+    对手的牌不能与自己的底牌重复: 先对全部起手牌计数, 再减去包含任一张底牌的起手牌。
+    返回 (胜率, 是否有效), 与公共牌冲突的底牌无效
+    """
+    hero = strengths[combos]
+    live_sorted = np.sort(strengths[strengths >= 0])
+    less = np.searchsorted(live_sorted, hero, 'left')
+    equal = np.searchsorted(live_sorted, hero, 'right') - less
+    live = np.full(combos.size, live_sorted.size)
+    for card in (COMBOS[combos, 0], COMBOS[combos, 1]):
+        shared = strengths[CARD_COMBOS[card]]
+        valid = shared >= 0
+        less -= (valid & (shared < hero[:, None])).sum(axis=1)
+        equal -= (shared == hero[:, None]).sum(axis=1)
+        live -= valid.sum(axis=1)
+    # 自己的起手牌在两张底牌的计数中各减了一次, 在总数中只算了一次
+    equal += 1
+    live += 1
+    ok = hero >= 0
+    return np.where(ok, (less + 0.5 * equal) / np.maximum(live, 1), 0.0), ok
+
+
+def compute_board(board: Sequence[int], samples: int = 0,
+                  rng: Optional[np.random.Generator] = None) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """计算标准公共牌 board 上所有同构局面的 (键, EHS, EHS²)
+
+    剩余公共牌的所有发法都枚举, samples > 0 且发法更多时改为随机抽取 samples 种
+    """
+    board = list(board)
+    deck = [c for c in range(52) if c not in board]
+    holes = np.array(list(combinations(deck, 2)), dtype=np.int64)
+    keys = canonical_keys(holes, board)
+    keys, first = np.unique(keys, return_index=True)
+    holes = holes[first]
+    combos = COMBO_INDEX[holes[:, 0], holes[:, 1]].astype(np.int64)
+
+    runouts = list(combinations(deck, 5 - len(board)))
+    if samples and samples < len(runouts):
+        rng = rng or np.random.default_rng()
+        runouts = [runouts[i] for i in rng.choice(len(runouts), samples, replace=False)]
+    total = np.zeros(holes.shape[0])
+    total_sq = np.zeros(holes.shape[0])
+    count = np.zeros(holes.shape[0])
+    for runout in runouts:
+        hs, ok = hand_strengths(combo_strengths(board + list(runout)), combos)
+        total += hs
+        total_sq += hs * hs
+        count += ok
+    count = np.maximum(count, 1)
+    return keys, (total / count).astype(np.float32), (total_sq / count).astype(np.float32)
+
+
+def _chunk_path(work_dir: str, street: str, chunk: int) -> str:
+    return os.path.join(work_dir, f"{street}_{chunk:06d}.npz")
+
+
+def _params_path(work_dir: str, street: str) -> str:
+    return os.path.join(work_dir, f"{street}_params.json")
+
+
+def _check_params(work_dir: str, street: str, params: dict):
+    """记录工作目录中各块的计算参数; 已有的块用不同参数算出时拒绝续算"""
+    path = _params_path(work_dir, street)
+    if os.path.exists(path):
+        with open(path) as f:
+            saved = json.load(f)
+        if saved != params:
+            raise ValueError(f"{work_dir} 中 {street} 的中间结果是用不同参数计算的 ({saved}), "
+                             f"与本次 ({params}) 不一致, 请换一个工作目录或删除旧的结果")
+        return
+    if os.path.exists(_chunk_path(work_dir, street, 0)):
+        raise ValueError(f"{work_dir} 中 {street} 的中间结果没有记录计算参数, "
+                         f"无法确认能否续算, 请换一个工作目录或删除旧的结果")
+    tmp = path + '.tmp'
+    with open(tmp, 'w') as f:
+        json.dump(params, f)
+    os.replace(tmp, path)
+
+
+def _compute_chunk(work_dir: str, street: str, chunk: int, boards: np.ndarray,
+                   samples: int, seed: int) -> int:
+    """在工作进程中计算一块公共牌, 写入工作目录, 返回局面数"""
+    rng = np.random.default_rng([seed, chunk])
+    parts = [compute_board(board.tolist(), samples, rng) for board in boards]
+    keys = np.concatenate([p[0] for p in parts])
+    path = _chunk_path(work_dir, street, chunk)
+    tmp = path + '.tmp'
+    with open(tmp, 'wb') as f:
+        np.savez(f, keys=keys, ehs=np.concatenate([p[1] for p in parts]),
+                 ehs2=np.concatenate([p[2] for p in parts]))
+    os.replace(tmp, path)
+    return keys.size
+
+
+def compute_street(street: str, work_dir: str = DEFAULT_WORK_DIR, workers: Optional[int] = None,
+                   samples: int = 0, seed: int = 0, max_boards: Optional[int] = None, report=None):
+    """并行计算一个下注轮的所有块, 已完成的块跳过
+
+    续算时抽样数、(抽样时的)种子、公共牌数和分块大小必须与已有的块相同, 否则抛出 ValueError。
+    """
+    os.makedirs(work_dir, exist_ok=True)
+    boards = canonical_boards(STREET_CARDS[street])[:max_boards]
+    size = BOARDS_PER_CHUNK[street]
+    # 全部枚举时块的结果与种子无关
+    _check_params(work_dir, street, {'samples': samples, 'seed': seed if samples else None,
+                                     'boards': len(boards), 'chunk': size})
+    chunks = [(i, boards[start:start + size]) for i, start in enumerate(range(0, len(boards), size))]
+    todo = [(i, b) for i, b in chunks if not os.path.exists(_chunk_path(work_dir, street, i))]
+    done = len(chunks) - len(todo)
+    start = time.perf_counter()
+    situations = 0
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = [pool.submit(_compute_chunk, work_dir, street, i, b, samples, seed) for i, b in todo]
+        for future in as_completed(futures):
+            situations += future.result()
+            done += 1
+            if report is not None:
+                report(street, done, len(chunks), situations / (time.perf_counter() - start))
+    return len(chunks)
+
+
+def load_street(street: str, chunks: int, work_dir: str = DEFAULT_WORK_DIR):
+    """读取一个下注轮所有块的结果, 返回 (键, 特征 (n, 2))"""
+    keys, features = [], []
+    for i in range(chunks):
+        with np.load(_chunk_path(work_dir, street, i)) as data:
+            keys.append(data['keys'])
+            features.append(np.stack([data['ehs'], data['ehs2']], axis=1))
+    return np.concatenate(keys), np.concatenate(features)
+
+
+def kmeans(points: np.ndarray, k: int, iterations: int = 50, seed: int = 0,
+           sample: int = 200000) -> np.ndarray:
+    """在最多 sample 个抽样点上做 k-means (k-means++ 初始化), 返回按第一维排序的 (k, 2) 中心"""
+    rng = np.random.default_rng(seed)
+    if len(points) > sample:
+        points = points[rng.choice(len(points), sample, replace=False)]
+    points = points.astype(np.float64)
+    centers = [points[rng.integers(len(points))]]
+    dist = ((points - centers[0]) ** 2).sum(axis=1)
+    for _ in range(1, k):
+        if dist.sum() <= 0:
+            centers.append(points[rng.integers(len(points))])
+            continue
+        centers.append(points[rng.choice(len(points), p=dist / dist.sum())])
+        dist = np.minimum(dist, ((points - centers[-1]) ** 2).sum(axis=1))
+    centers = np.array(centers)
+    for _ in range(iterations):
+        labels = assign(points, centers)
+        moved = centers.copy()
+        for j in range(k):
+            members = points[labels == j]
+            if len(members):
+                moved[j] = members.mean(axis=0)
+        if np.allclose(moved, centers):
+            break
+        centers = moved
+    return centers[np.argsort(centers[:, 0])]
+
+
+def assign(points: np.ndarray, centers: np.ndarray, chunk: int = 1 << 20) -> np.ndarray:
+    """每个点最近的中心编号"""
+    if len(centers) > MAX_BUCKETS:
+        raise ValueError(f"分组数不能超过 {MAX_BUCKETS}")
+    labels = np.empty(len(points), dtype=np.uint8)
+    for start in range(0, len(points), chunk):
+        part = points[start:start + chunk]
+        d = ((part[:, None, :] - centers[None, :, :]) ** 2).sum(axis=2)
+        labels[start:start + chunk] = d.argmin(axis=1)
+    return labels
+
+
+def _slots(keys: np.ndarray, bits: int) -> np.ndarray:
+    return ((keys.astype(np.uint64) * np.uint64(GOLDEN)) >> np.uint64(64 - bits)).astype(np.int64)
+
+
+def build_hash(keys: np.ndarray, values: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """构建装载率不超过 1/2 的线性探测哈希表, 返回 (键数组, 值数组)"""
+    bits = max(1, int(np.ceil(np.log2(max(len(keys), 1) * 2))))
+    size = 1 << bits
+    table_keys = np.zeros(size, dtype=np.uint64)
+    table_values = np.zeros(size, dtype=np.uint8)
+    slots = _slots(keys, bits)
+    pending = np.arange(len(keys))
+    while pending.size:
+        s = slots[pending]
+        empty = table_keys[s] == 0
+        # 空位置由等在这里的第一个键占用, 其余的键向后探测一格
+        _, first = np.unique(s[empty], return_index=True)
+        winners = pending[empty][first]
+        table_keys[slots[winners]] = keys[winners]
+        table_values[slots[winners]] = values[winners]
+        placed = np.zeros(len(keys), dtype=bool)
+        placed[winners] = True
+        pending = pending[~placed[pending]]
+        slots[pending] = (slots[pending] + 1) & (size - 1)
+    return table_keys, table_values
+
+
+def write_table(path: str, streets: Dict[str, Tuple[np.ndarray, np.ndarray, np.ndarray]]):
+    """写出分组文件; streets 为 下注轮 -> (哈希表键, 哈希表分组, 分组中心)"""
+    tmp = path + '.tmp'
+    with open(tmp, 'wb') as f:
+        f.write(HEADER.pack(MAGIC, VERSION, len(streets)))
+        for name, (keys, _, centers) in streets.items():
+            f.write(STREET_HEADER.pack(name.encode(), len(centers), 0, len(keys)))
+        for keys, values, centers in streets.values():
+            f.write(keys.astype('<u8').tobytes())
+            f.write(values.tobytes())
+            f.write(b'\0' * (-len(values) % 8))
+            f.write(centers.astype('<f4').tobytes())
+    os.replace(tmp, path)
+
+
+class BucketTable:
+    """通过 mmap 只读映射的分组表"""
+
+    def __init__(self, path: str = DEFAULT_PATH):
+        with open(path, 'rb') as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, count = HEADER.unpack_from(self._mmap, 0)
+        if magic != MAGIC or version != VERSION:
+            self._mmap.close()
+            raise ValueError(f"无效的分组文件: {path}")
+        headers = [STREET_HEADER.unpack_from(self._mmap, HEADER.size + i * STREET_HEADER.size)
+                   for i in range(count)]
+        offset = HEADER.size + count * STREET_HEADER.size
+        self.streets = {}
+        for name, buckets, _, size in headers:
+            keys = np.frombuffer(self._mmap, dtype='<u8', count=size, offset=offset)
+            offset += size * 8
+            values = np.frombuffer(self._mmap, dtype=np.uint8, count=size, offset=offset)
+            offset += size + (-size % 8)
+            centers = np.frombuffer(self._mmap, dtype='<f4', count=buckets * 2, offset=offset).reshape(buckets, 2)
+            offset += buckets * 8
+            street = name.rstrip(b'\0').decode()
+            self.streets[street] = (keys, values, centers, size.bit_length() - 1)
+
+    def n_buckets(self, street: str) -> int:
+        return len(self.streets[street][2])
+
+    def bucket(self, hole: Sequence[int], board: Sequence[int]) -> int:
+        """底牌和公共牌(牌编号)所在的分组"""
+        street = {3: 'flop', 4: 'turn', 5: 'river'}[len(board)]
+        keys, values, _, bits = self.streets[street]
+        key = situation_key(hole, board)
+        slot = ((key * GOLDEN) & MASK64) >> (64 - bits)
+        mask = (1 << bits) - 1
+        while True:
+            found = int(keys[slot])
+            if found == key:
+                return int(values[slot])
+            if found == 0:
+                raise KeyError(f"局面不在分组表中: {hole} {board}")
+            slot = (slot + 1) & mask
+
+    def close(self):
+        self.streets = {}
+        self._mmap.close()
+
+
+def load_table(path: str = DEFAULT_PATH) -> Optional[BucketTable]:
+    """加载分组表, 文件不存在时返回 None"""
+    if not os.path.exists(path):
+        return None
+    return BucketTable(path)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="预计算翻牌后的 EHS/EHS² 牌力分组")
+    parser.add_argument('--streets', default='flop,turn,river', help="逗号分隔的下注轮")
+    parser.add_argument('--buckets', type=int, default=DEFAULT_BUCKETS, help="每个下注轮的分组数")
+    parser.add_argument('--workers', type=int, default=None, help="进程数, 默认CPU核数")
+    parser.add_argument('--samples', type=int, default=0,
+                        help="每组公共牌最多抽取的后续发牌数, 0 表示全部枚举")
+    parser.add_argument('--seed', type=int, default=0, help="随机种子(抽样和 k-means)")
+    parser.add_argument('--work-dir', default=DEFAULT_WORK_DIR, help="保存中间结果的目录, 用于断点续算")
+    parser.add_argument('--out', default=DEFAULT_PATH, help="输出文件")
+    parser.add_argument('--max-boards', type=int, default=None, help="每个下注轮只计算前若干组公共牌(测试用)")
+    args = parser.parse_args()
+    if not 1 <= args.buckets <= MAX_BUCKETS:
+        parser.error(f"--buckets 必须在 1 到 {MAX_BUCKETS} 之间(分组编号按 uint8 保存)")
+
+    def report(street: str, done: int, total: int, rate: float):
+        print(f"{street}: {done}/{total} 块 | 每秒 {rate:.0f} 个局面")
+
+    tables = {}
+    for street in [s.strip() for s in args.streets.split(',') if s.strip()]:
+        if street not in STREET_CARDS:
+            raise SystemExit(f"未知的下注轮: {street}")
+        try:
+            chunks = compute_street(street, args.work_dir, args.workers, args.samples, args.seed,
+                                    args.max_boards, report)
+        except ValueError as e:
+            raise SystemExit(str(e))
+        keys, features = load_street(street, chunks, args.work_dir)
+        centers = kmeans(features, args.buckets, seed=args.seed)
+        table_keys, table_values = build_hash(keys, assign(features, centers))
+        tables[street] = (table_keys, table_values, centers)
+        print(f"{street}: {len(keys)} 个局面, 哈希表 {len(table_keys)} 格, "
+              f"每个局面 {(table_keys.nbytes + table_values.nbytes) / len(keys):.1f} 字节")
+        print("分组中心 (EHS, EHS²): " + ' '.join(f"({e:.3f}, {e2:.3f})" for e, e2 in centers))
+    write_table(args.out, tables)
+    print(f"分组表已保存到: {args.out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+"""图形界面用的扑克牌图片缓存
+
+52张牌面和一张牌背在第一次用到某个尺寸时用 QPainter 画好(不需要图片素材),
+按 (牌编号, 宽, 高, 设备像素比) 缓存成 QPixmap, 所有牌控件共用。
+高分屏上按设备像素比画出更多像素, 换屏幕后像素比变化会自动画一套新的。
+需要先创建 QApplication。
+"""
+from typing import Dict, Optional, Tuple
+
+from PyQt5.QtCore import QRectF, Qt
+from PyQt5.QtGui import QBrush, QColor, QFont, QPainter, QPen, QPixmap
+
+from cards import CARDS
+
+BACK = -1  # 牌背的缓存编号
+RED_SUITS = ('♥', '♦')
+RED = QColor(200, 30, 30)
+BLACK = QColor(20, 20, 20)
+BACK_COLOR = QColor('#2E86C1')
+
+
+class CardAtlas:
+    """按牌和尺寸缓存画好的扑克牌图片"""
+
+    def __init__(self):
+        self.cache: Dict[Tuple[int, int, int, float], QPixmap] = {}
+
+    def pixmap(self, card: Optional[int], width: int, height: int, dpr: float = 1.0) -> QPixmap:
+        """牌编号 card 的图片, None 表示牌背; width, height 是逻辑像素"""
+        key = (BACK if card is None else card, width, height, dpr)
+        pixmap = self.cache.get(key)
+        if pixmap is None:
+            pixmap = self.cache[key] = render(key[0], width, height, dpr)
+        return pixmap
+
+    def warm(self, width: int, height: int, dpr: float = 1.0):
+        """预先画好一个尺寸下的全部52张牌面和牌背"""
+        for card in range(52):
+            self.pixmap(card, width, height, dpr)
+        self.pixmap(None, width, height, dpr)
+
+
+def render(card: int, width: int, height: int, dpr: float) -> QPixmap:
+    """画一张牌, card 为 BACK 时画牌背"""
+    pixmap = QPixmap(round(width * dpr), round(height * dpr))
+    pixmap.setDevicePixelRatio(dpr)
+    pixmap.fill(Qt.transparent)
+    painter = QPainter(pixmap)
+    painter.setRenderHints(QPainter.Antialiasing | QPainter.TextAntialiasing)
+    rect = QRectF(1, 1, width - 2, height - 2)
+    radius = width * 0.07
+    if card == BACK:
+        painter.setPen(QPen(BLACK, 2))
+        painter.setBrush(BACK_COLOR)
+        painter.drawRoundedRect(rect, radius, radius)
+        # 内框加斜纹
+        inner = rect.adjusted(width * 0.1, width * 0.1, -width * 0.1, -width * 0.1)
+        painter.setPen(QPen(Qt.white, 1.5))
+        painter.setBrush(Qt.NoBrush)
+        painter.drawRoundedRect(inner, radius / 2, radius / 2)
+        painter.setPen(Qt.NoPen)
+        painter.setBrush(QBrush(QColor(255, 255, 255, 90), Qt.DiagCrossPattern))
+        painter.drawRoundedRect(inner, radius / 2, radius / 2)
+        painter.end()
+        return pixmap
+
+    suit, rank = CARDS[card].suit, CARDS[card].rank
+    color = RED if suit in RED_SUITS else BLACK
+    painter.setPen(QPen(BLACK, 2))
+    painter.setBrush(Qt.white)
+    painter.drawRoundedRect(rect, radius, radius)
+
+    # 左上角和(倒过来的)右下角: 点数和花色
+    font = QFont()
+    font.setBold(True)
+    font.setPixelSize(max(8, round(height * 0.15)))
+    painter.setFont(font)
+    painter.setPen(color)
+    corner = QRectF(width * 0.05, height * 0.03, width * 0.35, height * 0.32)
+    label = f"{rank}\n{suit}"
+    painter.drawText(corner, Qt.AlignHCenter | Qt.AlignTop, label)
+    painter.save()
+    painter.translate(width, height)
+    painter.rotate(180)
+    painter.drawText(corner, Qt.AlignHCenter | Qt.AlignTop, label)
+    painter.restore()
+
+    # 中间的大花色
+    font.setPixelSize(max(12, round(height * 0.38)))
+    painter.setFont(font)
+    painter.drawText(QRectF(0, 0, width, height), Qt.AlignCenter, suit)
+    painter.end()
+    return pixmap
+
+
+_atlas: Optional[CardAtlas] = None
+
+
+def default_atlas() -> CardAtlas:
+    """进程内共用的牌图缓存"""
+    global _atlas
+    if _atlas is None:
+        _atlas = CardAtlas()
+    return _atlas
@@ -0,0 +1,52 @@
+"""扑克牌的紧凑表示
+
+52张牌在模块加载时创建一次, 所有牌组和手牌共享这些对象。
+牌组只是牌编号(0..51, 编码见 evaluator.py)组成的整数列表,
+发牌时再通过编号取出共享的 Card 对象, 不会每局重新创建52个对象。
+"""
+import random
+from typing import Iterable, List, Tuple
+
+from evaluator import SUITS, RANKS, card_index
+
+
+class Card:
+    """扑克牌, 点数值和花色/点数位掩码在创建时预先算好"""
+    __slots__ = ('suit', 'rank', 'index', 'value', 'suit_mask', 'rank_mask', 'mask')
+
+    def __init__(self, suit: str, rank: str):
+        self.suit = suit
+        self.rank = rank
+        self.index = card_index(suit, rank)
+        self.value = (self.index >> 2) + 2       # 牌面点数值 2..14
+        self.suit_mask = 1 << (self.index & 3)   # 花色位掩码
+        self.rank_mask = 1 << (self.index >> 2)  # 点数位掩码
+        self.mask = 1 << self.index              # 在52位牌集合中的位掩码
+
+    def __str__(self):
+        return f"{self.suit}{self.rank}"
+
+
+def make_pool(card_class=Card) -> Tuple[Card, ...]:
+    """按牌编号顺序创建52张共享的牌对象"""
+    return tuple(card_class(SUITS[i & 3], RANKS[i >> 2]) for i in range(52))
+
+
+# 共享的52张牌, CARDS[i] 就是编号为 i 的牌
+CARDS = make_pool()
+FULL_DECK = tuple(range(52))
+
+
+def new_deck() -> List[int]:
+    """返回一副洗好的牌(牌编号列表)"""
+    deck = list(FULL_DECK)
+    random.shuffle(deck)
+    return deck
+
+
+def cards_mask(cards: Iterable[Card]) -> int:
+    """把一组牌转换成52位的位掩码"""
+    mask = 0
+    for card in cards:
+        mask |= card.mask
+    return mask
@@ -0,0 +1,409 @@
+"""单挑限注德州扑克抽象上的蒙特卡洛 CFR 训练器
+
+抽象游戏: 两名玩家, 小盲 1 大盲 2 (以小盲注为单位), 翻牌前和翻牌每次下注/加注 2,
+转牌和河牌每次 4, 每轮最多 4 次下注(翻牌前大盲注算第一次)。完整的下注树在启动时
+枚举一次, 每个决策节点有一个整数编号; 信息集 = (节点, 当前下注轮的牌力分组),
+翻牌前的分组就是169类起手牌, 翻牌后按对随机手牌的当前牌力百分位分成若干组,
+或者使用 buckets.py 预计算的 EHS/EHS² 分组表(--bucket-file)。
+只看当前下注轮的分组, 即不完全回忆的抽象。
+
+遗憾值和累计策略保存在两个 (信息集数, 3) 的 float32 数组中, 第 node_base[节点] + 分组 行
+就是这个信息集。训练使用外部抽样 MCCFR, 遗憾值在 0 处截断(同 CFR+):
+
+    python cfr.py --iterations 200000 --buckets 10 --checkpoint-every 20000
+
+训练结果(含随机数状态)定期写入检查点, 加上 --resume 从检查点继续训练。
+python cfr.py --check 检查下注树每个终局节点上双方的收益是否零和。
+需要安装 numpy。
+"""
+import argparse
+import json
+import os
+import random
+import time
+from typing import List, Optional, Sequence, Tuple
+
+import numpy as np
+
+import evaluator
+from preflop import hand_class
+from ranges import CARD_COMBOS, combo_strengths
+
+FOLD, CALL, RAISE = 0, 1, 2
+NUM_ACTIONS = 3
+ACTION_NAMES = ('fold', 'call', 'raise')
+
+# 节点类型
+DECISION, FOLDED, SHOWDOWN = 0, 1, 2
+
+STREETS = ('preflop', 'flop', 'turn', 'river')
+BLINDS = (1, 2)          # 小盲、大盲, 以小盲注为单位
+BET_SIZES = (2, 2, 4, 4)  # 每个下注轮一次下注/加注的大小
+MAX_BETS = 4
+
+PREFLOP_BUCKETS = 169
+DEFAULT_POSTFLOP_BUCKETS = 10
+VERSION = 2  # 版本 1 的弃牌收益算错了, 训练结果不能再用
+
+DEFAULT_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'cfr_strategy.npz')
+
+
+class BettingTree:
+    """抽象游戏的完整下注树
+
+    玩家 0 是庄家(小盲), 翻牌前先行动, 翻牌后后行动。节点 i 的 children[i][a] 为行动 a
+    之后的节点, 不合法的行动为 -1; 弃牌节点的 player 是弃牌的玩家, commit 为双方投入。
+    """
+
+    def __init__(self):
+        self.kind: List[int] = []
+        self.player: List[int] = []
+        self.street: List[int] = []
+        self.commit: List[Tuple[int, int]] = []
+        self.children: List[List[int]] = []
+        self.legal: List[List[int]] = []
+        self.root = self._build(0, BLINDS, 0, 1, 0)
+
+    def __len__(self) -> int:
+        return len(self.kind)
+
+    def _add(self, kind: int, player: int, street: int, commit: Sequence[int]) -> int:
+        self.kind.append(kind)
+        self.player.append(player)
+        self.street.append(street)
+        self.commit.append(tuple(commit))
+        self.children.append([-1] * NUM_ACTIONS)
+        self.legal.append([])
+        return len(self.kind) - 1
+
+    def _build(self, street: int, commit: Sequence[int], to_act: int, bets: int, actions: int) -> int:
+        node = self._add(DECISION, to_act, street, commit)
+        children = self.children[node]
+        opponent = 1 - to_act
+        if commit[opponent] > commit[to_act]:
+            children[FOLD] = self._add(FOLDED, to_act, street, commit)
+
+        called = list(commit)
+        called[to_act] = commit[opponent]
+        if actions == 0:
+            # 每轮第一次过牌/跟注不结束这一轮(翻牌前小盲跟注后大盲还可以加注)
+            children[CALL] = self._build(street, called, opponent, bets, actions + 1)
+        elif street == len(STREETS) - 1:
+            children[CALL] = self._add(SHOWDOWN, -1, street, called)
+        else:
+            children[CALL] = self._build(street + 1, called, 1, 0, 0)
+
+        if bets < MAX_BETS:
+            raised = list(commit)
+            raised[to_act] = commit[opponent] + BET_SIZES[street]
+            children[RAISE] = self._build(street, raised, opponent, bets + 1, actions + 1)
+        self.legal[node] = [a for a in range(NUM_ACTIONS) if children[a] >= 0]
+        return node
+
+
+def terminal_value(tree: BettingTree, node: int, traverser: int, result: int) -> float:
+    """遍历者在终局节点 node 的收益; result 为摊牌结果, 1/-1/0 表示玩家 0 赢/输/平
+
+    弃牌时赢家得到弃牌者的投入, 弃牌者输掉自己的投入; 摊牌时双方投入相等。
+    """
+    if tree.kind[node] == FOLDED:
+        loser = tree.player[node]
+        won = tree.commit[node][loser]
+        return float(won if loser != traverser else -won)
+    sign = result if traverser == 0 else -result
+    return float(sign * tree.commit[node][0])
+
+
+def check_zero_sum(tree: BettingTree) -> List[Tuple[int, int]]:
+    """检查每个弃牌和摊牌节点上两名玩家的收益之和为 0, 返回不满足的 (节点, 摊牌结果)"""
+    bad = []
+    for node, kind in enumerate(tree.kind):
+        if kind == DECISION:
+            continue
+        for result in ((0,) if kind == FOLDED else (1, 0, -1)):
+            if terminal_value(tree, node, 0, result) + terminal_value(tree, node, 1, result) != 0:
+                bad.append((node, result))
+    return bad
+
+
+def preflop_bucket(hole: Sequence[int]) -> int:
+    return hand_class(hole[0], hole[1])
+
+
+def hand_strength(hole: Sequence[int], board: Sequence[int], strengths: Optional[np.ndarray] = None) -> float:
+    """底牌在公共牌下对一手随机牌的当前牌力百分位(平局算一半)
+
+    strengths 为 ranges.combo_strengths(board), 同一组公共牌的多名玩家可以共用
+    """
+    if strengths is None:
+        strengths = combo_strengths(board)
+    hero = evaluator.evaluate(list(hole) + list(board))
+    live = strengths >= 0
+    live[CARD_COMBOS[hole[0]]] = False
+    live[CARD_COMBOS[hole[1]]] = False
+    others = strengths[live]
+    return (np.count_nonzero(others < hero) + 0.5 * np.count_nonzero(others == hero)) / others.size
+
+
+def postflop_bucket(hole: Sequence[int], board: Sequence[int], n_buckets: int,
+                    strengths: Optional[np.ndarray] = None) -> int:
+    return min(int(hand_strength(hole, board, strengths) * n_buckets), n_buckets - 1)
+
+
+class CFRTables:
+    """下注树和每个信息集的遗憾值/累计策略表"""
+
+    def __init__(self, postflop_buckets: int = DEFAULT_POSTFLOP_BUCKETS, bucket_file: Optional[str] = None):
+        self.tree = BettingTree()
+        self.postflop_buckets = postflop_buckets
+        self.buckets = (PREFLOP_BUCKETS,) + (postflop_buckets,) * (len(STREETS) - 1)
+        self.bucket_file = bucket_file
+        self.bucket_table = None
+        if bucket_file is not None:
+            import buckets
+            self.bucket_table = buckets.BucketTable(bucket_file)
+            missing = [s for s in STREETS[1:] if s not in self.bucket_table.streets]
+            if missing:
+                raise ValueError(f"分组表中缺少下注轮: {', '.join(missing)}")
+            self.buckets = (PREFLOP_BUCKETS,) + tuple(self.bucket_table.n_buckets(s) for s in STREETS[1:])
+        # 每个决策节点在表中的起始行, 非决策节点为 -1
+        self.node_base = []
+        rows = 0
+        for node in range(len(self.tree)):
+            if self.tree.kind[node] == DECISION:
+                self.node_base.append(rows)
+                rows += self.buckets[self.tree.street[node]]
+            else:
+                self.node_base.append(-1)
+        self.regret = np.zeros((rows, NUM_ACTIONS), dtype=np.float32)
+        self.strategy_sum = np.zeros((rows, NUM_ACTIONS), dtype=np.float32)
+
+    @property
+    def infosets(self) -> int:
+        return self.regret.shape[0]
+
+    @property
+    def bytes_per_infoset(self) -> float:
+        return (self.regret.nbytes + self.strategy_sum.nbytes) / self.infosets
+
+    def postflop_bucket(self, hole: Sequence[int], board: Sequence[int],
+                        strengths: Optional[np.ndarray] = None) -> int:
+        """翻牌后的分组: 有分组表时查表, 否则按当前牌力百分位"""
+        if self.bucket_table is not None:
+            return self.bucket_table.bucket(hole, board)
+        return postflop_bucket(hole, board, self.postflop_buckets, strengths)
+
+    def row(self, node: int, bucket: int) -> int:
+        return self.node_base[node] + bucket
+
+    def average_strategy(self, node: int, bucket: int) -> List[float]:
+        """信息集的平均策略(训练中从未到达时为合法行动上的均匀分布)"""
+        legal = self.tree.legal[node]
+        sums = self.strategy_sum[self.row(node, bucket)].tolist()
+        total = sum(sums[a] for a in legal)
+        probs = [0.0] * NUM_ACTIONS
+        for a in legal:
+            probs[a] = sums[a] / total if total > 0 else 1.0 / len(legal)
+        return probs
+
+
+class CFRTrainer(CFRTables):
+    """外部抽样蒙特卡洛 CFR"""
+
+    def __init__(self, postflop_buckets: int = DEFAULT_POSTFLOP_BUCKETS, seed: Optional[int] = None,
+                 bucket_file: Optional[str] = None):
+        super().__init__(postflop_buckets, bucket_file)
+        self.iterations = 0
+        self.rng = np.random.default_rng(seed)
+
+    def deal(self) -> Tuple[List[List[int]], List[int], int]:
+        """随机发牌, 返回 (每名玩家每个下注轮的分组, 公共牌, 摊牌结果: 1/-1/0 表示玩家 0 赢/输/平)"""
+        cards = self.rng.choice(52, 9, replace=False).tolist()
+        holes = (cards[0:2], cards[2:4])
+        board = cards[4:]
+        buckets = [[preflop_bucket(h)] for h in holes]
+        for visible in (3, 4, 5):
+            strengths = combo_strengths(board[:visible]) if self.bucket_table is None else None
+            for p in (0, 1):
+                buckets[p].append(self.postflop_bucket(holes[p], board[:visible], strengths))
+        s0 = evaluator.evaluate(holes[0] + board)
+        s1 = evaluator.evaluate(holes[1] + board)
+        return buckets, board, (s0 > s1) - (s0 < s1)
+
+    def iterate(self):
+        """一次迭代: 发一手牌, 两名玩家各作为遍历者更新一次"""
+        buckets, _, result = self.deal()
+        for traverser in (0, 1):
+            self._traverse(self.tree.root, traverser, buckets, result)
+        self.iterations += 1
+
+    def _traverse(self, node: int, traverser: int, buckets: List[List[int]], result: int) -> float:
+        """返回遍历者在 node 的(抽样)收益"""
+        tree = self.tree
+        if tree.kind[node] != DECISION:
+            return terminal_value(tree, node, traverser, result)
+
+        player = tree.player[node]
+        legal = tree.legal[node]
+        children = tree.children[node]
+        row = self.node_base[node] + buckets[player][tree.street[node]]
+        regret = self.regret[row].tolist()
+
+        # 遗憾匹配: 按正遗憾值的比例行动, 都不为正时均匀随机
+        positive = [regret[a] if regret[a] > 0 else 0.0 for a in legal]
+        total = sum(positive)
+        if total > 0:
+            strategy = [r / total for r in positive]
+        else:
+            strategy = [1.0 / len(legal)] * len(legal)
+
+        if player == traverser:
+            values = [self._traverse(children[a], traverser, buckets, result) for a in legal]
+            value = sum(p * v for p, v in zip(strategy, values))
+            for a, v in zip(legal, values):
+                regret[a] = max(regret[a] + v - value, 0.0)
+            self.regret[row] = regret
+            return value
+
+        # 对手节点: 累计平均策略, 按当前策略抽样一个行动
+        sums = self.strategy_sum[row]
+        for a, p in zip(legal, strategy):
+            sums[a] += p
+        r = self.rng.random()
+        for a, p in zip(legal, strategy):
+            r -= p
+            if r <= 0:
+                break
+        return self._traverse(children[a], traverser, buckets, result)
+
+    def train(self, iterations: int, checkpoint: Optional[str] = None, checkpoint_every: int = 0,
+              report=None) -> float:
+        """训练 iterations 次迭代, 返回每秒迭代次数; 每 checkpoint_every 次写一次检查点"""
+        start = time.perf_counter()
+        for i in range(1, iterations + 1):
+            self.iterate()
+            if checkpoint and checkpoint_every and i % checkpoint_every == 0:
+                self.save(checkpoint)
+                if report is not None:
+                    report(self, i / (time.perf_counter() - start))
+        rate = iterations / (time.perf_counter() - start) if iterations else 0.0
+        if checkpoint:
+            self.save(checkpoint)
+        return rate
+
+    def save(self, path: str = DEFAULT_PATH):
+        """写入检查点, 先写临时文件再替换, 中断时不会留下损坏的文件"""
+        meta = {'version': VERSION, 'postflop_buckets': self.postflop_buckets,
+                'bucket_file': self.bucket_file,
+                'iterations': self.iterations, 'rng': self.rng.bit_generator.state}
+        tmp = path + '.tmp'
+        with open(tmp, 'wb') as f:
+            np.savez(f, regret=self.regret, strategy_sum=self.strategy_sum, meta=json.dumps(meta))
+        os.replace(tmp, path)
+
+    @classmethod
+    def load(cls, path: str = DEFAULT_PATH) -> 'CFRTrainer':
+        with np.load(path) as data:
+            meta = json.loads(str(data['meta']))
+            if meta['version'] != VERSION:
+                raise ValueError(f"不支持的检查点版本: {path}, 请重新训练")
+            trainer = cls(meta['postflop_buckets'], bucket_file=meta.get('bucket_file'))
+            if data['regret'].shape != trainer.regret.shape:
+                raise ValueError(f"检查点与当前的抽象不一致: {path}")
+            trainer.regret[:] = data['regret']
+            trainer.strategy_sum[:] = data['strategy_sum']
+        trainer.iterations = meta['iterations']
+        trainer.rng.bit_generator.state = meta['rng']
+        return trainer
+
+
+class CFRPolicy(CFRTables):
+    """加载训练好的平均策略, 供 strategy.CFRStrategy 使用"""
+
+    def __init__(self, path: str = DEFAULT_PATH):
+        if not os.path.exists(path):
+            raise FileNotFoundError(f"找不到 CFR 策略文件 {path}, 请先运行 python cfr.py 训练")
+        with np.load(path) as data:
+            meta = json.loads(str(data['meta']))
+            if meta['version'] != VERSION:
+                raise ValueError(f"不支持的策略文件版本: {path}, 请重新运行 python cfr.py 训练")
+            super().__init__(meta['postflop_buckets'], meta.get('bucket_file'))
+            self.strategy_sum[:] = data['strategy_sum']
+        self.regret = np.zeros((0, NUM_ACTIONS), dtype=np.float32)  # 对局时不需要遗憾值
+        self.iterations = meta['iterations']
+
+    def locate(self, history: Sequence[Sequence[int]]) -> int:
+        """按每个下注轮的抽象行动序列从根节点走到当前节点, 无法对应时返回 -1"""
+        tree = self.tree
+        node = tree.root
+        for street, actions in enumerate(history):
+            if tree.kind[node] != DECISION or tree.street[node] != street:
+                return -1
+            for a in actions:
+                if tree.kind[node] != DECISION:
+                    return -1
+                if a == RAISE and tree.children[node][RAISE] < 0:
+                    a = CALL  # 超过下注次数上限的加注按跟注处理
+                node = tree.children[node][a]
+                if node < 0:
+                    return -1
+        return node
+
+    def bucket(self, hole: Sequence[int], board: Sequence[int]) -> int:
+        if not board:
+            return preflop_bucket(hole)
+        return self.postflop_bucket(hole, board)
+
+    def sample(self, node: int, bucket: int, rng=random) -> int:
+        """按平均策略抽样一个行动"""
+        probs = self.average_strategy(node, bucket)
+        r = rng.random()
+        for a in self.tree.legal[node]:
+            r -= probs[a]
+            if r <= 0:
+                return a
+        return self.tree.legal[node][-1]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="单挑限注抽象的蒙特卡洛 CFR 训练")
+    parser.add_argument('--iterations', type=int, default=100000, help="本次训练的迭代次数")
+    parser.add_argument('--buckets', type=int, default=DEFAULT_POSTFLOP_BUCKETS, help="翻牌后的牌力分组数")
+    parser.add_argument('--bucket-file', default=None,
+                        help="使用 buckets.py 预计算的分组表代替当前牌力分组")
+    parser.add_argument('--seed', type=int, default=None, help="随机种子")
+    parser.add_argument('--out', default=DEFAULT_PATH, help="检查点/策略文件")
+    parser.add_argument('--checkpoint-every', type=int, default=10000, help="每隔多少次迭代写一次检查点")
+    parser.add_argument('--resume', action='store_true', help="从已有的检查点继续训练")
+    parser.add_argument('--check', action='store_true', help="只检查下注树每个终局节点的收益是否零和, 不训练")
+    args = parser.parse_args()
+
+    if args.check:
+        tree = BettingTree()
+        bad = check_zero_sum(tree)
+        terminals = sum(kind != DECISION for kind in tree.kind)
+        for node, result in bad[:5]:
+            print(f"不是零和: 节点 {node} 投入 {tree.commit[node]} 摊牌结果 {result} "
+                  f"收益 {terminal_value(tree, node, 0, result)} / {terminal_value(tree, node, 1, result)}")
+        print(f"零和检查: {terminals} 个终局节点, {len(bad)} 处收益之和不为 0")
+        raise SystemExit(1 if bad else 0)
+
+    if args.resume and os.path.exists(args.out):
+        trainer = CFRTrainer.load(args.out)
+        print(f"从检查点继续: 已训练 {trainer.iterations} 次迭代")
+    else:
+        trainer = CFRTrainer(args.buckets, args.seed, args.bucket_file)
+    print(f"下注树 {len(trainer.tree)} 个节点, 信息集 {trainer.infosets} 个, "
+          f"每个信息集 {trainer.bytes_per_infoset:.0f} 字节, "
+          f"共 {(trainer.regret.nbytes + trainer.strategy_sum.nbytes) / 1024:.0f} KB")
+
+    def report(t: CFRTrainer, rate: float):
+        visited = int(np.count_nonzero(t.strategy_sum.any(axis=1)))
+        print(f"已训练 {t.iterations} 次迭代 | 每秒 {rate:.0f} 次 | 到达过的信息集 {visited}/{t.infosets}")
+
+    rate = trainer.train(args.iterations, args.out, args.checkpoint_every, report)
+    print(f"训练完成: 共 {trainer.iterations} 次迭代, 每秒 {rate:.0f} 次, 策略已保存到 {args.out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,202 @@
+"""蒙特卡洛胜率计算
+
+随机发完剩余的公共牌和对手底牌, 统计自己获胜/平局/落败的概率。
+当估计的置信区间半宽达到要求时提前结束模拟。
+安装了 numpy 时使用 batch_equity 批量模拟, 否则逐次模拟;
+给出对手范围(ranges.Range)时对手底牌从范围中按权重抽取(需要 numpy)。
+单挑的翻牌/转牌局面可以用 exact_equity() 多进程精确枚举。
+"""
+import math
+import os
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor
+from itertools import combinations
+from statistics import NormalDist
+from typing import NamedTuple, Optional, Sequence, Tuple
+
+import evaluator
+from cards import FULL_DECK
+
+try:
+    import batch_equity
+except ImportError:  # 没有安装 numpy 时使用纯 Python 逐次模拟
+    batch_equity = None
+
+# 每模拟这么多次检查一次置信区间(纯 Python / numpy 批量)
+CHECK_INTERVAL = 100
+BATCH_CHECK_INTERVAL = 2000
+
+
+class EquityResult(NamedTuple):
+    win: float         # 独赢的概率
+    tie: float         # 平局(平分底池)的概率
+    lose: float        # 落败的概率
+    equity: float      # 期望分得的底池比例, 平局按平分计算
+    iterations: int    # 实际模拟次数
+    margin: float      # equity 置信区间的半宽
+
+
+def card_indices(cards: Sequence) -> list:
+    """把 Card 对象或牌编号统一转换成牌编号列表"""
+    return [c if isinstance(c, int) else c.index for c in cards]
+
+
+def _simulate(hole: list, board: list, n_opponents: int, n: int,
+              rng) -> Tuple[int, int, float]:
+    """纯 Python 模拟 n 次随机发牌, 返回 (独赢次数, 平局次数, 累计分得的底池比例)"""
+    dead = set(hole) | set(board)
+    remaining = [c for c in FULL_DECK if c not in dead]
+    board_needed = 5 - len(board)
+    needed = board_needed + 2 * n_opponents
+    evaluate = evaluator.evaluate
+    sample = rng.sample
+    wins = ties = 0
+    share = 0.0
+    for _ in range(n):
+        drawn = sample(remaining, needed)
+        full_board = board + drawn[:board_needed]
+        hero = evaluate(hole + full_board)
+        best = 0
+        tied = 1
+        for i in range(board_needed, needed, 2):
+            s = evaluate(drawn[i:i + 2] + full_board)
+            if s > best:
+                best = s
+                tied = 1
+            elif s == best:
+                tied += 1
+        if hero > best:
+            wins += 1
+            share += 1.0
+        elif hero == best:
+            ties += 1
+            share += 1.0 / (tied + 1)
+    return wins, ties, share
+
+
+def equity(hole_cards: Sequence, board: Sequence = (), n_opponents: int = 1,
+           iterations: int = 1000, ci: Optional[float] = None,
+           confidence: float = 0.95, rng: Optional[random.Random] = None,
+           deadline: Optional[float] = None, ranges: Optional[Sequence] = None) -> EquityResult:
+    """计算底牌在当前公共牌下对 n_opponents 个随机对手的胜率
+
+    hole_cards, board: Card 对象或牌编号
+    iterations: 最多模拟次数
+    ci: equity 置信区间半宽的目标值(如 0.01), 达到后提前结束; None 表示跑满 iterations
+    confidence: 置信水平
+    rng: 随机数生成器, 默认使用 random 模块
+    deadline: time.perf_counter() 的截止时间, 每批模拟后检查, 到时返回已有的估计
+    ranges: 每个对手的范围(ranges.Range), 给出时忽略 n_opponents
+    """
+    rng = rng or random
+    hole = card_indices(hole_cards)
+    board = card_indices(board)
+    if ranges is not None:
+        if batch_equity is None:
+            raise ImportError("按对手范围计算胜率需要安装 numpy")
+        import ranges as range_module
+        n_opponents = len(ranges)
+    if 5 - len(board) + 2 * n_opponents > 52 - len(hole) - len(board):
+        raise ValueError("剩余的牌不够发给所有对手")
+    z = NormalDist().inv_cdf(0.5 + confidence / 2)
+
+    if batch_equity is not None:
+        # numpy 的随机数生成器从 rng 取种子, 传入固定种子的 rng 时结果可复现
+        np_rng = batch_equity.np.random.default_rng(rng.getrandbits(64))
+        step = BATCH_CHECK_INTERVAL
+    else:
+        step = CHECK_INTERVAL
+
+    wins = ties = 0
+    share = 0.0  # 累计分得的底池比例
+    n = 0
+    margin = float('inf')
+    while n < iterations:
+        count = min(step, iterations - n)
+        if ranges is not None:
+            w, t, s = range_module.simulate(hole, board, ranges, count, np_rng)
+        elif batch_equity is not None:
+            w, t, s = batch_equity.simulate(hole, board, n_opponents, count, np_rng)
+        else:
+            w, t, s = _simulate(hole, board, n_opponents, count, rng)
+        wins += w
+        ties += t
+        share += s
+        n += count
+
+        # 按伯努利方差的上界估计, 加一平滑避免全胜/全负时区间宽度为0
+        p = (share + 1) / (n + 2)
+        margin = z * math.sqrt(p * (1 - p) / n)
+        if ci is not None and margin <= ci:
+            break
+        if deadline is not None and time.perf_counter() >= deadline:
+            break
+
+    return EquityResult(wins / n, ties / n, (n - wins - ties) / n, share / n, n, margin)
+
+
+def _exact_chunk(hole: list, board: list, runouts: list, holdings: list) -> Tuple[int, int, int]:
+    """枚举一批公共牌发法 × 对手底牌, 返回 (赢, 平, 输) 的次数"""
+    evaluate = evaluator.evaluate
+    wins = ties = losses = 0
+    for runout in runouts:
+        full_board = board + list(runout)
+        used = set(runout)
+        hero = evaluate(hole + full_board)
+        for holding in holdings:
+            if holding[0] in used or holding[1] in used:
+                continue
+            villain = evaluate(list(holding) + full_board)
+            if hero > villain:
+                wins += 1
+            elif hero == villain:
+                ties += 1
+            else:
+                losses += 1
+    return wins, ties, losses
+
+
+def exact_equity(hole_cards: Sequence, board: Sequence, opponent_range: Optional[Sequence] = None,
+                 workers: Optional[int] = None, chunks: Optional[int] = None) -> EquityResult:
+    """单挑时精确计算胜率: 枚举所有剩余的转牌/河牌发法和对手的每一种底牌
+
+    board: 翻牌或转牌(3~5张)
+    opponent_range: 对手可能的底牌列表, 每项为两张牌; None 表示所有剩余的两张牌组合
+    workers: 进程数, None 为 CPU 核数, 1 表示在当前进程中计算
+    chunks: 把发法空间切成多少块分给进程, 默认每个进程4块
+    结果与 main.py 摊牌时比较牌型的结果一致, 与分块方式无关
+    """
+    hole = card_indices(hole_cards)
+    board = card_indices(board)
+    if not 3 <= len(board) <= 5:
+        raise ValueError("精确计算只支持翻牌之后(3~5张公共牌)")
+    dead = set(hole) | set(board)
+    remaining = [c for c in FULL_DECK if c not in dead]
+    if opponent_range is None:
+        holdings = list(combinations(remaining, 2))
+    else:
+        holdings = [tuple(card_indices(h)) for h in opponent_range]
+        holdings = [h for h in holdings if h[0] not in dead and h[1] not in dead]
+    runouts = list(combinations(remaining, 5 - len(board)))
+
+    workers = workers or os.cpu_count() or 1
+    chunks = max(1, min(chunks or workers * 4, len(runouts)))
+    size = -(-len(runouts) // chunks)
+    parts = [runouts[i:i + size] for i in range(0, len(runouts), size)]
+    if workers == 1 or len(parts) == 1:
+        results = [_exact_chunk(hole, board, part, holdings) for part in parts]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            n = len(parts)
+            results = list(pool.map(_exact_chunk, [hole] * n, [board] * n, parts, [holdings] * n))
+
+    # 按分块顺序合并整数计数, 结果与进程调度无关
+    wins = sum(r[0] for r in results)
+    ties = sum(r[1] for r in results)
+    losses = sum(r[2] for r in results)
+    total = wins + ties + losses
+    if total == 0:
+        raise ValueError("对手范围与已知牌冲突, 没有可枚举的组合")
+    return EquityResult(wins / total, ties / total, losses / total,
+                        (wins + ties / 2) / total, total, 0.0)
@@ -0,0 +1,345 @@
+"""基于查找表的牌型评估器
+
+牌用 0..51 的整数表示: 编号 = 点数序号 * 4 + 花色序号
+点数序号 0..12 对应 2..A, 花色序号 0..3 对应 ♠ ♥ ♣ ♦
+
+每手牌(1~7张)返回一个整数强度, 数值越大牌越大, 可直接比较:
+    强度 = 牌型等级 << 20 | 五个牌值(每个占4位)
+牌型等级与 main.py 原来的 (牌型等级, [牌型组成的牌值], [剩余牌值]) 完全一致,
+五个牌值就是 [牌型组成的牌值] + [剩余牌值] 依次排列, 可以用 decode() 还原成元组。
+"""
+from typing import Iterable, List, Tuple
+
+SUITS = ['♠', '♥', '♣', '♦']
+RANKS = ['2', '3', '4', '5', '6', '7', '8', '9', '10', 'J', 'Q', 'K', 'A']
+
+# (花色, 点数) -> 牌编号
+CARD_INDEX = {(suit, rank): r * 4 + s
+              for r, rank in enumerate(RANKS) for s, suit in enumerate(SUITS)}
+
+# 每个牌型等级中 "牌型组成的牌值" 的个数, 其余为剩余牌值
+MADE_LENGTH = {9: 5, 8: 1, 7: 1, 6: 5, 5: 5, 4: 1, 3: 2, 2: 1, 1: 0}
+
+# 每张牌的查找键: 高位为点数的5进制计数, 低12位为4个花色的3位计数
+# 一手牌的键就是各张牌键之和, 相同点数组合的键唯一
+_SUIT_BITS = 12
+CARD_KEY = [(5 ** (i >> 2) << _SUIT_BITS) | (1 << (3 * (i & 3))) for i in range(52)]
+
+
+def card_index(suit: str, rank: str) -> int:
+    """获取牌的整数编号"""
+    return CARD_INDEX[(suit, rank)]
+
+
+def _pack(category: int, values: List[int]) -> int:
+    """把牌型等级和牌值列表编码成整数强度"""
+    strength = category
+    for i in range(5):
+        strength = (strength << 4) | (values[i] if i < len(values) else 0)
+    return strength
+
+
+def _straight(bits: int) -> List[int]:
+    """根据点数位图查找最大的顺子, 返回顺子的牌值(从大到小), 没有则返回空列表"""
+    for high in range(12, 3, -1):
+        mask = 0x1F << (high - 4)
+        if bits & mask == mask:
+            return [v + 2 for v in range(high, high - 5, -1)]
+    # 特殊情况: A-5-4-3-2 顺子, A在这里算作1
+    if bits & 0x100F == 0x100F:
+        return [5, 4, 3, 2, 14]
+    return []
+
+
+def _rank_strength(counts: List[int]) -> int:
+    """计算不含同花的点数组合的强度, counts[r] 为点数序号 r 的张数"""
+    bits = 0
+    groups = {4: [], 3: [], 2: []}
+    singles = []
+    for r in range(12, -1, -1):
+        n = counts[r]
+        if n:
+            bits |= 1 << r
+            singles.extend([r + 2] * n)
+            if n >= 2:
+                groups[n].append(r + 2)
+    quads, trips, pairs = groups[4], groups[3], groups[2]
+    straight = _straight(bits)
+
+    if quads:
+        # 四条
+        kicker = [v for v in singles if v != quads[0]][:1]
+        return _pack(8, [quads[0]] + kicker)
+    if trips and (len(trips) >= 2 or pairs):
+        # 葫芦(三条+对子), 两个三条时较小的三条当对子用
+        return _pack(7, [trips[0], max(trips[1:] + pairs)])
+    if straight:
+        # 顺子
+        return _pack(5, straight)
+    if trips:
+        # 三条
+        return _pack(4, [trips[0]] + [v for v in singles if v != trips[0]][:2])
+    if len(pairs) >= 2:
+        # 两对
+        kicker = [v for v in singles if v != pairs[0] and v != pairs[1]][:1]
+        return _pack(3, pairs[:2] + kicker)
+    if pairs:
+        # 一对
+        return _pack(2, [pairs[0]] + [v for v in singles if v != pairs[0]][:3])
+    # 高牌
+    return _pack(1, singles[:5])
+
+
+def _flush_strength(bits: int) -> int:
+    """计算同花(至少5张同花色)的强度, bits 为该花色的点数位图"""
+    straight = _straight(bits)
+    if straight:
+        # 同花顺
+        return _pack(9, straight)
+    values = [r + 2 for r in range(12, -1, -1) if bits >> r & 1]
+    return _pack(6, values[:5])
+
+
+def _build_rank_table() -> dict:
+    """枚举1~7张牌的所有点数组合(每个点数最多4张), 生成 点数键 -> 强度 的查找表"""
+    table = {}
+    counts = [0] * 13
+
+    def fill(r: int, remaining: int, key: int):
+        if r < 0:
+            if remaining < 7:
+                table[key] = _rank_strength(counts)
+            return
+        for n in range(min(4, remaining) + 1):
+            counts[r] = n
+            fill(r - 1, remaining - n, key + n * 5 ** r)
+        counts[r] = 0
+
+    fill(12, 7, 0)
+    return table
+
+
+def _build_flush_tables() -> Tuple[List[int], List[int]]:
+    """生成花色计数 -> 同花花色 的查找表, 以及同花点数位图 -> 强度 的查找表"""
+    flush_suit = [-1] * (1 << _SUIT_BITS)
+    for key in range(1 << _SUIT_BITS):
+        for s in range(4):
+            if (key >> (3 * s)) & 7 >= 5:
+                flush_suit[key] = s
+                break
+    flush_table = [0] * (1 << 13)
+    for bits in range(1 << 13):
+        if bin(bits).count('1') >= 5:
+            flush_table[bits] = _flush_strength(bits)
+    return flush_suit, flush_table
+
+
+RANK_TABLE = _build_rank_table()
+FLUSH_SUIT, FLUSH_TABLE = _build_flush_tables()
+
+
+def evaluate(cards: Iterable[int]) -> int:
+    """评估1~7张牌(整数编号)的最佳牌型, 返回可直接比较大小的整数强度"""
+    cards = tuple(cards)
+    key = sum(map(CARD_KEY.__getitem__, cards))
+    suit = FLUSH_SUIT[key & 0xFFF]
+    if suit < 0:
+        return RANK_TABLE[key >> _SUIT_BITS]
+    bits = 0
+    for c in cards:
+        if c & 3 == suit:
+            bits |= 1 << (c >> 2)
+    return FLUSH_TABLE[bits]
+
+
+def category(strength: int) -> int:
+    """从整数强度中取出牌型等级"""
+    return strength >> 20
+
+
+def decode(strength: int) -> tuple:
+    """把整数强度还原成 (牌型等级, [牌型组成的牌值], [剩余牌值])"""
+    rank = strength >> 20
+    values = [(strength >> shift) & 0xF for shift in (16, 12, 8, 4, 0)]
+    values = [v for v in values if v]
+    made = MADE_LENGTH[rank]
+    return (rank, values[:made], values[made:])
+
+
+class HandState:
+    """增量维护的一手牌状态
+
+    记录点数/花色计数(即查找键)和每个花色的点数位图, 每加入一张牌 O(1) 更新,
+    牌型强度在第一次读取时查表得到并缓存, 直到再加入新牌。
+    """
+    __slots__ = ('key', 'suit_bits', 'size', '_strength')
+
+    def __init__(self, cards: Iterable[int] = ()):
+        self.key = 0                 # 各张牌查找键之和
+        self.suit_bits = [0] * 4     # 每个花色的点数位图
+        self.size = 0                # 牌的张数
+        self._strength = None
+        for card in cards:
+            self.add(card)
+
+    def add(self, card: int):
+        """加入一张牌(牌编号)"""
+        self.key += CARD_KEY[card]
+        self.suit_bits[card & 3] |= 1 << (card >> 2)
+        self.size += 1
+        self._strength = None
+
+    @property
+    def rank_bits(self) -> int:
+        """所有牌的点数位图"""
+        return self.suit_bits[0] | self.suit_bits[1] | self.suit_bits[2] | self.suit_bits[3]
+
+    def rank_count(self, rank: int) -> int:
+        """点数序号为 rank 的牌有几张"""
+        return (self.key >> _SUIT_BITS) // 5 ** rank % 5
+
+    def suit_count(self, suit: int) -> int:
+        """花色序号为 suit 的牌有几张"""
+        return (self.key >> (3 * suit)) & 7
+
+    @property
+    def strength(self) -> int:
+        """当前最佳牌型的整数强度"""
+        if self._strength is None:
+            suit = FLUSH_SUIT[self.key & 0xFFF]
+            if suit < 0:
+                self._strength = RANK_TABLE[self.key >> _SUIT_BITS]
+            else:
+                self._strength = FLUSH_TABLE[self.suit_bits[suit]]
+        return self._strength
+
+    @property
+    def category(self) -> int:
+        """当前的牌型等级"""
+        return self.strength >> 20
+
+
+def _reference_evaluate(cards: List[int]) -> tuple:
+    """按 main.py 原来的 evaluate_hand 逐段分组的算法移植的参考实现, 用于交叉校验
+
+    注意这不是原实现本身: 移植时修正了原实现的两个错误(A-2-3-4-5-6 被当成 A-5 顺子,
+    两个三条没有算成葫芦), 所以交叉校验对照的是修正后的规则, 遇到这两种牌时查表评估器
+    与原来的 main.py 结果本来就不同。
+    """
+    values = [(c >> 2) + 2 for c in cards]
+    suits: dict = {}
+    ranks: dict = {}
+    for c, v in zip(cards, values):
+        suits.setdefault(c & 3, []).append(v)
+        ranks[v] = ranks.get(v, 0) + 1
+
+    def find_straight(vals: List[int]) -> List[int]:
+        vals = sorted(set(vals), reverse=True)
+        for i in range(len(vals) - 4):
+            if vals[i] - vals[i + 4] == 4:
+                return vals[i:i + 5]
+        if all(v in vals for v in (14, 2, 3, 4, 5)):
+            return [5, 4, 3, 2, 14]
+        return []
+
+    flush = next((sorted(vs, reverse=True) for vs in suits.values() if len(vs) >= 5), None)
+    if flush:
+        straight_flush = find_straight(flush)
+        if straight_flush:
+            return (9, straight_flush, [])
+    quads = sorted((v for v, n in ranks.items() if n == 4), reverse=True)
+    trips = sorted((v for v, n in ranks.items() if n == 3), reverse=True)
+    pairs = sorted((v for v, n in ranks.items() if n == 2), reverse=True)
+    singles = sorted(values, reverse=True)
+    if quads:
+        return (8, [quads[0]], [next(v for v in singles if v != quads[0])])
+    if trips and (len(trips) > 1 or pairs):
+        return (7, [trips[0]], [max(trips[1:] + pairs)])
+    if flush:
+        return (6, flush[:5], [])
+    straight = find_straight(values)
+    if straight:
+        return (5, straight, [])
+    if trips:
+        return (4, [trips[0]], [v for v in singles if v != trips[0]][:2])
+    if len(pairs) >= 2:
+        return (3, pairs[:2], [next(v for v in singles if v not in pairs[:2])])
+    if pairs:
+        return (2, [pairs[0]], [v for v in singles if v != pairs[0]][:3])
+    return (1, [], singles[:5])
+
+
+def _combinations_category(cards: List[int]) -> int:
+    """test.py 原来的做法: 枚举21种五张组合, 每种组合反复 count 判断牌型"""
+    from itertools import combinations
+    best = -1
+    for combo in combinations(cards, 5):
+        values = sorted([c >> 2 for c in combo], reverse=True)
+        is_flush = len(set(c & 3 for c in combo)) == 1
+        straight = len(set(values)) == 5 and (
+            sorted(values) == [0, 1, 2, 3, 12] or all(values[i] == values[0] - i for i in range(5)))
+        pairs = [v for v in set(values) if values.count(v) >= 2]
+        has = lambda n: any(values.count(v) >= n for v in set(values))
+        if straight and is_flush:
+            rank = 8
+        elif has(4):
+            rank = 7
+        elif has(3) and has(2):
+            rank = 6
+        elif is_flush:
+            rank = 5
+        elif straight:
+            rank = 4
+        elif has(3):
+            rank = 3
+        elif len(pairs) >= 2:
+            rank = 2
+        elif has(2):
+            rank = 1
+        else:
+            rank = 0
+        best = max(best, rank)
+    return best
+
+
+def main():
+    import argparse
+    import random
+    import time
+
+    parser = argparse.ArgumentParser(description="牌型评估器的交叉校验和基准测试")
+    parser.add_argument('--hands', type=int, default=100000, help="交叉校验的随机七张牌数量")
+    parser.add_argument('--bench', type=int, default=20000, help="基准测试的随机七张牌数量")
+    parser.add_argument('--seed', type=int, default=1, help="随机种子")
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    deck = list(range(52))
+    mismatches = 0
+    for _ in range(args.hands):
+        cards = rng.sample(deck, 7)
+        if decode(evaluate(cards)) != _reference_evaluate(cards):
+            mismatches += 1
+            if mismatches <= 5:
+                print(f"不一致: {cards} {decode(evaluate(cards))} {_reference_evaluate(cards)}")
+    print(f"交叉校验(对照修正过两个错误的 main.py 原算法, 不是原实现本身): "
+          f"{args.hands} 手随机七张牌, {mismatches} 手不一致")
+
+    hands = [rng.sample(deck, 7) for _ in range(args.bench)]
+    start = time.perf_counter()
+    for cards in hands:
+        evaluate(cards)
+    fast = time.perf_counter() - start
+    start = time.perf_counter()
+    for cards in hands:
+        _combinations_category(cards)
+    slow = time.perf_counter() - start
+    speedup = slow / fast
+    print(f"查表评估: 每秒 {args.bench / fast:,.0f} 手 | 21种组合枚举: 每秒 {args.bench / slow:,.0f} 手 | "
+          f"加速 {speedup:.0f} 倍")
+    if mismatches or speedup < 50:
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+"""牌局事件和监听者
+
+引擎只向 EventBus 发出带类型的事件, 控制台输出、文本日志、结构化牌局记录和图形界面
+都作为监听者订阅, 各自决定如何格式化。事件只携带游戏对象和整数, 文字在监听者中生成;
+没有任何监听者时引擎连事件对象都不创建:
+
+    if game.events:
+        game.events.emit(ActionTaken(game, seat, action, amount))
+"""
+from typing import Any, List, NamedTuple, Optional
+
+
+class HandStarted(NamedTuple):
+    """新的一局开始, 底牌已经发出"""
+    game: Any
+    handler = 'on_hand_start'
+
+
+class StreetStarted(NamedTuple):
+    """进入一个下注轮, 这一轮的公共牌已经发出, 盲注还没有下"""
+    game: Any
+    street: str
+    handler = 'on_street'
+
+
+class ActionTaken(NamedTuple):
+    """一名玩家行动(包括下盲注)之后, 玩家对象已经同步"""
+    game: Any
+    seat: int
+    action: str   # small_blind/big_blind/fold/check/call/raise
+    amount: int   # 本次投入的筹码
+    handler = 'on_action'
+
+
+class HandEnded(NamedTuple):
+    """一局结算完成, 筹码已经分配"""
+    game: Any
+    result: Any                   # showdown.ShowdownResult
+    player_hands: Optional[list]  # 摊牌玩家的 (玩家, 整数强度), 无人摊牌时为空
+    handler = 'on_hand_end'
+
+
+class Listener:
+    """监听者基类, 按需覆盖对应的方法"""
+
+    def on_hand_start(self, event: HandStarted):
+        pass
+
+    def on_street(self, event: StreetStarted):
+        pass
+
+    def on_action(self, event: ActionTaken):
+        pass
+
+    def on_hand_end(self, event: HandEnded):
+        pass
+
+    def close(self):
+        """游戏结束时调用, 用于关闭文件等资源"""
+        pass
+
+
+class EventBus:
+    """按订阅顺序把事件分发给所有监听者"""
+
+    def __init__(self):
+        self.listeners: List[Listener] = []
+
+    def __bool__(self) -> bool:
+        return bool(self.listeners)
+
+    def subscribe(self, listener: Listener) -> Listener:
+        self.listeners.append(listener)
+        return listener
+
+    def unsubscribe(self, listener: Listener):
+        if listener in self.listeners:
+            self.listeners.remove(listener)
+
+    def emit(self, event):
+        for listener in self.listeners:
+            getattr(listener, event.handler)(event)
+
+    def close(self):
+        for listener in self.listeners:
+            listener.close()
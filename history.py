@@ -0,0 +1,221 @@
+"""流式牌局记录
+
+HandHistoryWriter 把每个行动/每局结果写成一行 JSON (JSON Lines),
+TextLogWriter 逐行写出原来 save_game_log 格式的文本日志。
+两者都通过缓冲写入文件, 每写一定条数或间隔一定时间刷新一次,
+内存占用不随局数增长, 程序崩溃时最多丢失最后一个刷新周期的记录。
+
+JSON Lines 文件可以用 gzip 压缩(标准库), 安装了 zstandard 时也可以用 zstd 压缩。
+TextLogListener 和 HistoryListener 订阅牌局事件, 只在事件发生时才格式化并写出。
+"""
+import datetime
+import gzip
+import io
+import json
+import os
+import time
+from typing import Optional
+
+import evaluator
+from events import Listener
+
+try:
+    import zstandard
+except ImportError:  # zstd 压缩是可选的
+    zstandard = None
+
+# 默认每写这么多条记录或间隔这么多秒刷新一次
+FLUSH_EVERY = 200
+FLUSH_INTERVAL = 5.0
+
+COMPRESSIONS = {None: '', 'gzip': '.gz', 'zstd': '.zst'}
+
+
+def timestamp() -> str:
+    return datetime.datetime.now().strftime("%Y%m%d_%H%M%S")
+
+
+class _BufferedSink:
+    """带周期性刷新的缓冲二进制输出, 第一次刷新时才创建文件"""
+
+    def __init__(self, path: str, compression: Optional[str] = None,
+                 flush_every: int = FLUSH_EVERY, flush_interval: float = FLUSH_INTERVAL):
+        if compression not in COMPRESSIONS:
+            raise ValueError(f"不支持的压缩格式: {compression}")
+        if compression == 'zstd' and zstandard is None:
+            raise RuntimeError("使用 zstd 压缩需要安装 zstandard")
+        self.path = path
+        self.compression = compression
+        self._raw = None
+        self._file = None
+        self._buffer = io.BytesIO()
+        self._pending = 0
+        self._last_flush = time.monotonic()
+        self.flush_every = flush_every
+        self.flush_interval = flush_interval
+        self.closed = False
+
+    def _open(self):
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._raw = open(self.path, 'wb')
+        if self.compression == 'gzip':
+            self._file = gzip.GzipFile(fileobj=self._raw, mode='wb')
+        elif self.compression == 'zstd':
+            self._file = zstandard.ZstdCompressor().stream_writer(self._raw)
+        else:
+            self._file = self._raw
+
+    def _write(self, data: bytes):
+        self._buffer.write(data)
+        self._pending += 1
+        if self._pending >= self.flush_every or time.monotonic() - self._last_flush >= self.flush_interval:
+            self.flush()
+
+    def flush(self):
+        """把缓冲区写入文件并刷新到磁盘"""
+        if self.closed:
+            return
+        if self._raw is None:
+            if not self._buffer.tell():
+                return
+            self._open()
+        self._file.write(self._buffer.getvalue())
+        self._buffer.seek(0)
+        self._buffer.truncate()
+        self._file.flush()
+        if self._file is not self._raw:
+            self._raw.flush()
+        self._pending = 0
+        self._last_flush = time.monotonic()
+
+    def close(self):
+        if self.closed:
+            return
+        self.flush()
+        if self._raw is not None:
+            if self._file is not self._raw:
+                self._file.close()
+            self._raw.close()
+        self.closed = True
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class HandHistoryWriter(_BufferedSink):
+    """结构化牌局记录, 每条记录是一行 JSON"""
+
+    def __init__(self, directory: str = '.', compression: Optional[str] = None,
+                 flush_every: int = FLUSH_EVERY, flush_interval: float = FLUSH_INTERVAL,
+                 path: Optional[str] = None):
+        if path is None:
+            path = os.path.join(directory, f"hands_{timestamp()}.jsonl{COMPRESSIONS.get(compression, '')}")
+        super().__init__(path, compression, flush_every, flush_interval)
+
+    def write(self, record: dict):
+        self._write(json.dumps(record, ensure_ascii=False, separators=(',', ':')).encode('utf-8') + b'\n')
+
+
+class TextLogWriter(_BufferedSink):
+    """逐行写出文本日志, 用法与原来的 game_log 列表一样调用 append()"""
+
+    def __init__(self, directory: str = '.', flush_every: int = FLUSH_EVERY,
+                 flush_interval: float = FLUSH_INTERVAL, path: Optional[str] = None):
+        if path is None:
+            path = os.path.join(directory, f"log_{timestamp()}.txt")
+        super().__init__(path, None, flush_every, flush_interval)
+
+    def append(self, line: str):
+        self._write(line.encode('utf-8') + b'\n')
+
+
+class TextLogListener(Listener):
+    """把牌局事件写成原来 save_game_log 格式的文本日志"""
+
+    def __init__(self, writer: TextLogWriter):
+        self.writer = writer
+
+    def on_hand_start(self, event):
+        game = event.game
+        self.writer.append(f"\n===== 第 {game.round_number} 局开始 =====")
+        self.writer.append(f"随机种子: {game.hand_seed}")
+        self.writer.append("\n玩家手牌:")
+        for player in game.players:
+            self.writer.append(f"{player.name}: {game.cards_text(player.hand)}")
+
+    def on_street(self, event):
+        game = event.game
+        self.writer.append(f"\n--- {game.translate_round(event.street)}阶段 ---")
+        if event.street != 'preflop':
+            self.writer.append(f"公共牌: {game.cards_text(game.community_cards)}")
+        if game.betting.hand_over:
+            self.writer.append("只剩一名玩家，本轮结束")
+
+    def on_action(self, event):
+        game = event.game
+        player = game.players[event.seat]
+        self.writer.append(f"{player.name} {game.describe_action(event.action, event.amount, player.current_bet)}")
+
+    def on_hand_end(self, event):
+        game = event.game
+        for player, strength in event.player_hands:
+            self.writer.append(f"{player.name} 的牌型: {game.get_hand_type_name(evaluator.category(strength))}")
+        for line in game.payout_lines(event.result):
+            self.writer.append(line)
+        self.writer.append("\n--- 本局总结 ---")
+        for line in game.summary_lines(event.result):
+            self.writer.append(line)
+
+    def close(self):
+        self.writer.close()
+
+
+class HistoryListener(Listener):
+    """把牌局事件写成结构化的 JSON Lines 记录"""
+
+    def __init__(self, writer: HandHistoryWriter):
+        self.writer = writer
+
+    def record(self, game, record_type: str, **fields):
+        self.writer.write({'type': record_type, 'hand': game.round_number, **fields})
+
+    def on_hand_start(self, event):
+        game = event.game
+        self.record(game, 'hand_start', seed=game.hand_seed, players=[
+            {'name': p.name, 'chips': p.chips, 'cards': [str(c) for c in p.hand]}
+            for p in game.players])
+
+    def on_street(self, event):
+        game = event.game
+        if game.community_cards:
+            self.record(game, 'street', street=event.street,
+                        board=[str(c) for c in game.community_cards])
+
+    def on_action(self, event):
+        game = event.game
+        player = game.players[event.seat]
+        self.record(game, 'action', street=game.street, player=player.name, action=event.action,
+                    amount=event.amount, bet=player.current_bet, pot=game.pot, chips=player.chips)
+
+    def on_hand_end(self, event):
+        game = event.game
+        result = event.result
+        players = game.players
+        self.record(game, 'hand_end', board=[str(c) for c in game.community_cards], pot=game.pot,
+                    winners={players[s].name: result.payouts[s] for s in result.winners},
+                    pots=[{'amount': pot.amount,
+                           'eligible': [players[s].name for s in pot.eligible],
+                           'winners': {players[s].name: pot.shares[s] for s in pot.winners}}
+                          for pot in result.pots],
+                    showdown=[{'name': p.name, 'cards': [str(c) for c in p.hand],
+                               'category': evaluator.category(strength)}
+                              for p, strength in event.player_hands],
+                    chips={p.name: p.chips for p in players})
+
+    def close(self):
+        self.writer.close()
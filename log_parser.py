@@ -0,0 +1,535 @@
+"""牌局日志解析与索引查询
+
+逐行流式解析 save_game_log 格式的 log_*.txt 文本日志(也支持 history.py 写出的
+JSON Lines 牌局记录), 得到结构化的每局记录, 再导入带索引的 SQLite 数据库。
+之后可以直接查询, 例如 "AI-2 在转牌加注并且输掉的所有牌局", 或统计每个玩家的
+VPIP/PFR, 不需要每次重新扫描文本。
+HandIndex 内存映射未压缩的日志文件, 只记录每局的起始位置, 按需解析任意一局, 用于回放。
+
+    python log_parser.py load log_*.txt --db hands.db
+    python log_parser.py stats --db hands.db
+    python log_parser.py query --db hands.db --player AI-2 --street turn --action raise --lost
+"""
+import argparse
+import gzip
+import json
+import mmap
+import os
+import re
+import sqlite3
+from array import array
+from typing import Dict, Iterable, Iterator, List, Optional
+
+STREETS = {'底牌': 'preflop', '翻牌': 'flop', '转牌': 'turn', '河牌': 'river'}
+
+HAND_START = re.compile(r'^===== 第 (\d+) 局开始 =====$')
+STREET = re.compile(r'^--- (\S+)阶段 ---$')
+CALL = re.compile(r'^(.+) 跟注 \$(\d+)$')
+RAISE = re.compile(r'^(.+) 加注到 \$(\d+)$')
+FOLD = re.compile(r'^(.+) 弃牌$')
+CHECK = re.compile(r'^(.+) 过牌$')
+BLIND = re.compile(r'^(.+) 下(小|大)盲注 \$(\d+)$')
+SHOWDOWN = re.compile(r'^(.+) 的牌型: (\S+)$')
+WIN = re.compile(r'^(.+) 获胜! 赢得 \$(\d+)$')
+TIE = re.compile(r'^平局! (.+) 平分奖池$')
+EXTRA = re.compile(r'^(.+) 获得额外的 \$(\d+) 筹码$')
+SPLIT = re.compile(r'^(.+) 分得 \$(\d+)$')
+SUMMARY_PLAYER = re.compile(r'^(.+?)(?: \((?:获胜者|平局获胜)\))?:$')
+SUMMARY_CHIPS = re.compile(r'^筹码: \$(-?\d+) \| 状态: (\S+)$')
+POT = re.compile(r'^下注池: \$(\d+)$')
+SEED = re.compile(r'^随机种子: (\d+)$')
+
+
+class HandRecord:
+    """一局游戏的结构化记录"""
+
+    def __init__(self, number: int, offset: int = 0):
+        self.number = number
+        self.offset = offset            # 本局在文件中的起始字节位置
+        self.seed: Optional[int] = None  # 本局的随机种子(table_rng.TableRNG), 旧日志中没有
+        self.players: List[str] = []    # 按座位顺序的玩家名称
+        self.hole_cards: Dict[str, List[str]] = {}
+        self.board: List[str] = []
+        self.actions: List[tuple] = []  # (行动序号, 下注轮, 玩家, 行动, 投入筹码, 下注到)
+        self.pot = 0
+        self.winnings: Dict[str, int] = {}
+        self.showdown: Dict[str, str] = {}  # 玩家 -> 牌型名称
+        self.final_chips: Dict[str, int] = {}
+        self.folded: set = set()
+
+    def add_player(self, name: str):
+        if name not in self.hole_cards:
+            self.players.append(name)
+            self.hole_cards[name] = []
+
+    def vpip(self, name: str) -> bool:
+        """翻牌前是否主动投入筹码"""
+        return any(street == 'preflop' and player == name and amount > 0 and action in ('call', 'raise')
+                   for _, street, player, action, amount, _ in self.actions)
+
+    def pfr(self, name: str) -> bool:
+        """翻牌前是否加注"""
+        return any(street == 'preflop' and player == name and action == 'raise'
+                   for _, street, player, action, _, _ in self.actions)
+
+
+class _TextLogParser:
+    """save_game_log 文本格式的逐行解析状态"""
+
+    def __init__(self):
+        self.hand: Optional[HandRecord] = None
+        self.street = 'preflop'
+        self.section = None  # 'hands' 玩家手牌, 'summary' 本局总结
+        self.summary_player = None
+        self.bets: Dict[str, int] = {}
+        self.tied: List[str] = []
+
+    def start(self, number: int, offset: int):
+        self.hand = HandRecord(number, offset)
+        self.street = 'preflop'
+        self.section = None
+        self.summary_player = None
+        self.bets = {}
+        self.tied = []
+
+    def finish(self) -> Optional[HandRecord]:
+        hand = self.hand
+        self.hand = None
+        if hand is not None and self.tied and hand.pot:
+            # 旧格式的平局只记录了平分的玩家, 按平分计算, 余数记给日志中 "获得额外" 的玩家
+            share = hand.pot // len(self.tied)
+            for name in self.tied:
+                hand.winnings[name] = hand.winnings.get(name, 0) + share
+        return hand
+
+    def feed(self, line: str):
+        hand = self.hand
+        if not line:
+            if self.section == 'hands':
+                self.section = None
+            return
+        if line == '玩家手牌:':
+            self.section = 'hands'
+            return
+        if line == '--- 本局总结 ---':
+            self.section = 'summary'
+            return
+        if self.section == 'hands':
+            name, _, cards = line.rpartition(': ')
+            hand.add_player(name)
+            hand.hole_cards[name] = cards.split()
+            return
+        if self.section == 'summary':
+            self._feed_summary(line)
+            return
+
+        m = STREET.match(line)
+        if m:
+            # 每个下注轮的下注额从零开始计算
+            self.street = STREETS.get(m.group(1), m.group(1))
+            self.bets = {}
+            return
+        if line.startswith('公共牌: '):
+            hand.board = line[len('公共牌: '):].split()
+            return
+        m = SEED.match(line)
+        if m:
+            hand.seed = int(m.group(1))
+            return
+        m = CALL.match(line)
+        if m:
+            name, amount = m.group(1), int(m.group(2))
+            self.bets[name] = self.bets.get(name, 0) + amount
+            self._action(name, 'call', amount, self.bets[name])
+            return
+        m = RAISE.match(line)
+        if m:
+            name, total = m.group(1), int(m.group(2))
+            amount = total - self.bets.get(name, 0)
+            self.bets[name] = total
+            self._action(name, 'raise', amount, total)
+            return
+        m = FOLD.match(line)
+        if m:
+            hand.folded.add(m.group(1))
+            self._action(m.group(1), 'fold', 0, self.bets.get(m.group(1), 0))
+            return
+        m = BLIND.match(line)
+        if m:
+            name, amount = m.group(1), int(m.group(3))
+            self.bets[name] = self.bets.get(name, 0) + amount
+            self._action(name, 'small_blind' if m.group(2) == '小' else 'big_blind', amount, self.bets[name])
+            return
+        m = CHECK.match(line)
+        if m:
+            self._action(m.group(1), 'check', 0, self.bets.get(m.group(1), 0))
+            return
+        m = SHOWDOWN.match(line)
+        if m:
+            hand.showdown[m.group(1)] = m.group(2)
+            return
+        m = WIN.match(line)
+        if m:
+            # 有边池时同一名玩家可能赢得多个池
+            hand.winnings[m.group(1)] = hand.winnings.get(m.group(1), 0) + int(m.group(2))
+            hand.pot = max(hand.pot, int(m.group(2)))
+            return
+        m = TIE.match(line)
+        if m:
+            self.tied = m.group(1).split(', ')
+            return
+        m = SPLIT.match(line)
+        if m:
+            # 新格式逐个记录平分的金额, 不再需要按底池推算
+            self.tied = []
+            hand.winnings[m.group(1)] = hand.winnings.get(m.group(1), 0) + int(m.group(2))
+            return
+        m = EXTRA.match(line)
+        if m:
+            hand.winnings[m.group(1)] = hand.winnings.get(m.group(1), 0) + int(m.group(2))
+
+    def _action(self, name: str, action: str, amount: int, total: int):
+        hand = self.hand
+        hand.add_player(name)
+        hand.actions.append((len(hand.actions), self.street, name, action, amount, total))
+
+    def _feed_summary(self, line: str):
+        hand = self.hand
+        m = POT.match(line)
+        if m:
+            hand.pot = int(m.group(1))
+            return
+        m = SUMMARY_CHIPS.match(line)
+        if m and self.summary_player is not None:
+            hand.final_chips[self.summary_player] = int(m.group(1))
+            if m.group(2) == '已弃牌':
+                hand.folded.add(self.summary_player)
+            return
+        if line.startswith(('手牌: ', '本局行动: ', '牌型: ', '公共牌: ')):
+            return
+        m = SUMMARY_PLAYER.match(line)
+        if m:
+            self.summary_player = m.group(1)
+            hand.add_player(self.summary_player)
+            return
+        # 总结之后的其他内容(如退出提示、最终结果)不属于这一局
+        self.section = None
+        self.summary_player = None
+
+
+def _text_hands(lines: Iterable[bytes], offset: int = 0) -> Iterator[HandRecord]:
+    """解析文本日志的行(bytes, 带换行符), offset 为第一行在文件中的位置"""
+    parser = _TextLogParser()
+    for raw in lines:
+        line = raw.decode('utf-8').strip()
+        m = HAND_START.match(line)
+        if m:
+            hand = parser.finish()
+            if hand is not None:
+                yield hand
+            parser.start(int(m.group(1)), offset)
+        elif parser.hand is not None:
+            parser.feed(line)
+        offset += len(raw)
+    hand = parser.finish()
+    if hand is not None:
+        yield hand
+
+
+def iter_text_log(path: str) -> Iterator[HandRecord]:
+    """逐行流式解析文本日志, 每解析完一局就产出一条记录"""
+    with open(path, 'rb') as f:
+        yield from _text_hands(f)
+
+
+CATEGORY_NAMES = {9: "同花顺", 8: "四条", 7: "葫芦", 6: "同花", 5: "顺子",
+                  4: "三条", 3: "两对", 2: "一对", 1: "高牌"}
+
+
+def _history_hands(lines: Iterable[bytes], offset: int = 0) -> Iterator[HandRecord]:
+    """解析 JSON Lines 牌局记录的行(bytes, 带换行符), offset 为第一行在文件中的位置"""
+    hand = None
+    bets: Dict[str, int] = {}
+    for line in lines:
+        start = offset
+        offset += len(line)
+        record = json.loads(line)
+        kind = record['type']
+        if kind == 'hand_start':
+            hand = HandRecord(record['hand'], start)
+            hand.seed = record.get('seed')
+            bets = {}
+            for p in record['players']:
+                hand.add_player(p['name'])
+                hand.hole_cards[p['name']] = p['cards']
+        elif hand is None:
+            continue
+        elif kind == 'street':
+            hand.board = record['board']
+        elif kind == 'action':
+            name = record['player']
+            if record['action'] == 'fold':
+                hand.folded.add(name)
+            bets[name] = record.get('bet', bets.get(name, 0) + record['amount'])
+            hand.actions.append((len(hand.actions), record['street'], name, record['action'],
+                                 record['amount'], bets[name]))
+        elif kind == 'hand_end':
+            hand.board = record['board']
+            hand.pot = record['pot']
+            hand.winnings = dict(record['winners'])
+            hand.final_chips = dict(record['chips'])
+            hand.showdown = {s['name']: CATEGORY_NAMES.get(s['category'], str(s['category']))
+                             for s in record['showdown']}
+            yield hand
+            hand = None
+
+
+def iter_history(path: str) -> Iterator[HandRecord]:
+    """解析 history.py 写出的 JSON Lines 牌局记录(.jsonl / .jsonl.gz)"""
+    opener = gzip.open if path.endswith('.gz') else open
+    with opener(path, 'rb') as f:
+        yield from _history_hands(f)
+
+
+def iter_hands(path: str) -> Iterator[HandRecord]:
+    """根据文件类型选择解析方式"""
+    if path.endswith(('.jsonl', '.jsonl.gz')):
+        return iter_history(path)
+    return iter_text_log(path)
+
+
+# 每局第一行的开头, 用来在内存映射的文件里查找每局的起始位置
+TEXT_HAND_PREFIX = '===== 第 '.encode('utf-8')
+HISTORY_HAND_PREFIX = b'{"type":"hand_start"'
+
+
+class HandIndex:
+    """未压缩日志文件中每局起始位置的索引, 用于随机访问和回放
+
+    文件以只读方式内存映射, 建索引时只在映射上查找每局开头的行,
+    内存中只保存每局8字节的起始位置; 读取某一局时才解析这一局的内容。
+    """
+
+    def __init__(self, path: str):
+        if path.endswith(('.gz', '.zst')):
+            raise ValueError("压缩的日志不能随机访问, 请先解压")
+        self.path = path
+        self.history = path.endswith('.jsonl')
+        self._file = open(path, 'rb')
+        self._map = None
+        self.offsets = array('q')
+        if os.fstat(self._file.fileno()).st_size:
+            self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+            self._scan(HISTORY_HAND_PREFIX if self.history else TEXT_HAND_PREFIX)
+
+    def _scan(self, prefix: bytes):
+        data = self._map
+        if data[:len(prefix)] == prefix:
+            self.offsets.append(0)
+        needle = b'\n' + prefix
+        pos = data.find(needle)
+        while pos != -1:
+            self.offsets.append(pos + 1)
+            pos = data.find(needle, pos + 1)
+
+    def __len__(self) -> int:
+        return len(self.offsets)
+
+    def hand(self, i: int) -> Optional[HandRecord]:
+        """解析第 i 局(从0开始), 记录不完整(例如文件还在写入)时返回 None"""
+        start = self.offsets[i]
+        end = self.offsets[i + 1] if i + 1 < len(self.offsets) else len(self._map)
+        lines = self._map[start:end].splitlines(keepends=True)
+        parse = _history_hands if self.history else _text_hands
+        return next(parse(lines, start), None)
+
+    def close(self):
+        if self._map is not None:
+            self._map.close()
+            self._map = None
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+SCHEMA = '''
+CREATE TABLE IF NOT EXISTS files (
+    id INTEGER PRIMARY KEY,
+    path TEXT UNIQUE NOT NULL,
+    size INTEGER NOT NULL,
+    mtime REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS hands (
+    id INTEGER PRIMARY KEY,
+    file_id INTEGER NOT NULL REFERENCES files(id),
+    number INTEGER NOT NULL,
+    offset INTEGER NOT NULL,
+    pot INTEGER NOT NULL,
+    board TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS players (
+    hand_id INTEGER NOT NULL REFERENCES hands(id),
+    seat INTEGER NOT NULL,
+    name TEXT NOT NULL,
+    hole TEXT NOT NULL,
+    folded INTEGER NOT NULL,
+    won INTEGER NOT NULL,
+    final_chips INTEGER,
+    showdown TEXT,
+    vpip INTEGER NOT NULL,
+    pfr INTEGER NOT NULL,
+    PRIMARY KEY (hand_id, name)
+);
+CREATE TABLE IF NOT EXISTS actions (
+    hand_id INTEGER NOT NULL REFERENCES hands(id),
+    seq INTEGER NOT NULL,
+    street TEXT NOT NULL,
+    name TEXT NOT NULL,
+    action TEXT NOT NULL,
+    amount INTEGER NOT NULL,
+    total INTEGER NOT NULL,
+    PRIMARY KEY (hand_id, seq)
+);
+CREATE INDEX IF NOT EXISTS idx_hands_file ON hands(file_id, number);
+CREATE INDEX IF NOT EXISTS idx_players_name ON players(name, won);
+CREATE INDEX IF NOT EXISTS idx_actions_lookup ON actions(name, street, action);
+'''
+
+
+class HandStore:
+    """保存解析结果的 SQLite 数据库"""
+
+    def __init__(self, db_path: str = 'hands.db'):
+        self.conn = sqlite3.connect(db_path)
+        self.conn.executescript(SCHEMA)
+
+    def close(self):
+        self.conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def load(self, path: str, batch_size: int = 1000) -> int:
+        """导入一个日志文件, 返回导入的局数; 文件未变化时跳过
+
+        文件记录和它的所有牌局在同一个事务中写入, 解析出错或被中断时整体回滚,
+        下次导入会重新解析这个文件, 不会留下只导入了一部分的记录。
+        """
+        path = os.path.abspath(path)
+        stat = os.stat(path)
+        row = self.conn.execute('SELECT id, size, mtime FROM files WHERE path = ?', (path,)).fetchone()
+        if row is not None and row[1] == stat.st_size and row[2] == stat.st_mtime:
+            return 0
+
+        count = 0
+        with self.conn:
+            if row is not None:
+                self._delete_file(row[0])
+            file_id = self.conn.execute('INSERT INTO files (path, size, mtime) VALUES (?, ?, ?)',
+                                        (path, stat.st_size, stat.st_mtime)).lastrowid
+            hands, players, actions = [], [], []
+            next_id = (self.conn.execute('SELECT MAX(id) FROM hands').fetchone()[0] or 0) + 1
+            for hand in iter_hands(path):
+                hand_id = next_id
+                next_id += 1
+                hands.append((hand_id, file_id, hand.number, hand.offset, hand.pot, ' '.join(hand.board)))
+                for seat, name in enumerate(hand.players):
+                    players.append((hand_id, seat, name, ' '.join(hand.hole_cards.get(name, [])),
+                                    int(name in hand.folded), hand.winnings.get(name, 0),
+                                    hand.final_chips.get(name), hand.showdown.get(name),
+                                    int(hand.vpip(name)), int(hand.pfr(name))))
+                actions.extend((hand_id,) + a for a in hand.actions)
+                count += 1
+                if len(hands) >= batch_size:
+                    self._insert(hands, players, actions)
+                    hands, players, actions = [], [], []
+            self._insert(hands, players, actions)
+        return count
+
+    def _insert(self, hands: list, players: list, actions: list):
+        self.conn.executemany('INSERT INTO hands VALUES (?, ?, ?, ?, ?, ?)', hands)
+        self.conn.executemany('INSERT INTO players VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)', players)
+        self.conn.executemany('INSERT INTO actions VALUES (?, ?, ?, ?, ?, ?, ?)', actions)
+
+    def _delete_file(self, file_id: int):
+        hand_ids = 'SELECT id FROM hands WHERE file_id = ?'
+        self.conn.execute(f'DELETE FROM actions WHERE hand_id IN ({hand_ids})', (file_id,))
+        self.conn.execute(f'DELETE FROM players WHERE hand_id IN ({hand_ids})', (file_id,))
+        self.conn.execute('DELETE FROM hands WHERE file_id = ?', (file_id,))
+        self.conn.execute('DELETE FROM files WHERE id = ?', (file_id,))
+
+    def find_hands(self, player: str, street: Optional[str] = None, action: Optional[str] = None,
+                   result: Optional[str] = None) -> List[tuple]:
+        """查找某个玩家在指定下注轮做过指定行动的牌局
+
+        result: 'won' 只要赢得筹码的牌局, 'lost' 只要没有赢得筹码的牌局, None 不限
+        返回 (文件路径, 局数, 文件偏移, 底池, 公共牌) 列表
+        """
+        sql = ['SELECT DISTINCT f.path, h.number, h.offset, h.pot, h.board FROM players p',
+               'JOIN hands h ON h.id = p.hand_id JOIN files f ON f.id = h.file_id']
+        params: list = []
+        if street is not None or action is not None:
+            sql.append('JOIN actions a ON a.hand_id = p.hand_id AND a.name = p.name')
+        sql.append('WHERE p.name = ?')
+        params.append(player)
+        if street is not None:
+            sql.append('AND a.street = ?')
+            params.append(street)
+        if action is not None:
+            sql.append('AND a.action = ?')
+            params.append(action)
+        if result == 'won':
+            sql.append('AND p.won > 0')
+        elif result == 'lost':
+            sql.append('AND p.won = 0')
+        sql.append('ORDER BY h.id')
+        return self.conn.execute(' '.join(sql), params).fetchall()
+
+    def player_stats(self) -> List[tuple]:
+        """每个玩家的 (名称, 局数, VPIP, PFR, 赢得底池次数)"""
+        return self.conn.execute(
+            'SELECT name, COUNT(*), AVG(vpip), AVG(pfr), SUM(won > 0) FROM players '
+            'GROUP BY name ORDER BY name').fetchall()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="解析牌局日志并建立索引查询")
+    parser.add_argument('--db', default='hands.db', help="SQLite 数据库路径")
+    # --db 写在子命令前后都可以; 子命令中不给出时保留前面的值
+    common = argparse.ArgumentParser(add_help=False)
+    common.add_argument('--db', default=argparse.SUPPRESS, help="SQLite 数据库路径")
+    sub = parser.add_subparsers(dest='command', required=True)
+    load = sub.add_parser('load', parents=[common], help="导入日志文件")
+    load.add_argument('paths', nargs='+')
+    sub.add_parser('stats', parents=[common], help="统计每个玩家的 VPIP/PFR")
+    query = sub.add_parser('query', parents=[common], help="查询牌局")
+    query.add_argument('--player', required=True)
+    query.add_argument('--street', choices=list(STREETS.values()))
+    query.add_argument('--action', choices=['small_blind', 'big_blind', 'check', 'call', 'raise', 'fold'])
+    outcome = query.add_mutually_exclusive_group()
+    outcome.add_argument('--won', action='store_const', dest='result', const='won')
+    outcome.add_argument('--lost', action='store_const', dest='result', const='lost')
+    args = parser.parse_args()
+
+    with HandStore(args.db) as store:
+        if args.command == 'load':
+            for path in args.paths:
+                print(f"{path}: 导入 {store.load(path)} 局")
+        elif args.command == 'stats':
+            for name, hands, vpip, pfr, won in store.player_stats():
+                print(f"{name}: {hands} 局 | VPIP {vpip:.1%} | PFR {pfr:.1%} | 赢得底池 {won} 次")
+        else:
+            for path, number, offset, pot, board in store.find_hands(
+                    args.player, args.street, args.action, args.result):
+                print(f"{os.path.basename(path)} 第 {number} 局 (偏移 {offset}) 底池 ${pot} 公共牌: {board}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,16 +1,20 @@
-import random
-import os
-import datetime
-from typing import List, Tuple
+import argparse
+import time
+from typing import Dict, List, Optional, Tuple
 
-# 定义扑克牌类
-class Card:
-    def __init__(self, suit: str, rank: str):
-        self.suit = suit
-        self.rank = rank
-    
-    def __str__(self):
-        return f"{self.suit}{self.rank}"
+import evaluator
+import showdown
+from betting import BettingRound
+from cards import Card, CARDS, SUITS, RANKS
+from events import ActionTaken, EventBus, HandEnded, HandStarted, Listener, StreetStarted
+from history import HandHistoryWriter, HistoryListener, TextLogListener, TextLogWriter
+from preflop import load_table
+from strategy import DEFAULT_BUDGET, EquityStrategy, GameView, LatencyStats, snapshot
+from table_rng import TableRNG
+
+# 默认盲注
+SMALL_BLIND = 10
+BIG_BLIND = 20
 
 # 定义玩家类
 class Player:
@@ -20,167 +24,255 @@ class Player:
         self.hand = []
         self.is_ai = is_ai
         self.current_bet = 0
+        self.total_bet = 0  # 本局一共投入底池的筹码, 用于划分边池
         self.folded = False
-        self.actions = []  # 记录玩家在当前局的所有行动
+        self.actions = []  # 当前局的所有行动 (下注轮, 行动, 投入筹码, 本轮下注额)
+        self.strategy = None  # AI策略(strategy.Strategy), 为 None 时使用牌局默认的胜率策略
+        self.hand_state = evaluator.HandState()  # 底牌+公共牌的增量牌型状态
 
 # 定义德州扑克游戏类
 class TexasHoldem:
-    def __init__(self):
+    def __init__(self, verbose: bool = True, log_dir: str = '.',
+                 history: Optional[HandHistoryWriter] = None,
+                 small_blind: int = SMALL_BLIND, big_blind: int = BIG_BLIND,
+                 decision_budget: float = DEFAULT_BUDGET, rng: Optional[TableRNG] = None):
+        self.verbose = verbose  # 为 False 时不订阅控制台和文本日志, 用于无界面批量模拟
+        # 牌桌随机数: 洗牌和默认AI策略都从这里取随机数, 每局的种子写进日志
+        self.rng = rng if rng is not None else TableRNG()
+        self.hand_seed: Optional[int] = None
         self.deck = []
         self.community_cards = []
         self.pot = 0
         self.players = []
         self.current_bet = 0
-        self.suits = ['♠', '♥', '♣', '♦']
-        self.ranks = ['2', '3', '4', '5', '6', '7', '8', '9', '10', 'J', 'Q', 'K', 'A']
-        self.init_deck()
-        self.game_log = []  # 记录游戏日志
+        self.suits = SUITS
+        self.ranks = RANKS
+        # 游戏日志逐行写入 log_dir 下的 log_时间.txt, 不在内存中累积
+        self.game_log = TextLogWriter(log_dir) if verbose else None
+        self.history = history  # 结构化牌局记录(JSON Lines), 为 None 时不记录
+        # 控制台、日志、牌局记录和界面都通过事件订阅牌局, 没有订阅者时不做任何格式化
+        self.events = EventBus()
+        if verbose:
+            self.events.subscribe(ConsoleListener())
+            self.events.subscribe(TextLogListener(self.game_log))
+        if history is not None:
+            self.events.subscribe(HistoryListener(history))
+        self.street = 'preflop'  # 当前下注轮
         self.round_number = 0  # 记录当前是第几局
+        self.small_blind = small_blind
+        self.big_blind = big_blind
+        self.dealer = -1  # 庄家座位, 每局开始时移到下一名有筹码的玩家
+        self.last_showdown: Optional[showdown.ShowdownResult] = None  # 上一局的结算结果
+        self.preflop_table = load_table()  # 翻牌前胜率表, 文件不存在时为 None
+        self.betting = BettingRound(big_blind=big_blind)  # 下注状态机, 每局原地重置
+        self.default_strategy = EquityStrategy(preflop_table=self.preflop_table, rng=self.rng.random)
+        self.decision_budget = decision_budget  # AI每次决策的时间预算(秒)
+        self.latency: Dict[str, LatencyStats] = {}  # 策略名称 -> 决策耗时统计
         
     def init_deck(self):
-        self.deck = [Card(suit, rank) for suit in self.suits for rank in self.ranks]
-        random.shuffle(self.deck)
+        # 每局从牌桌随机数派生新的种子, 只洗出这一局会发的牌(每人两张底牌和五张公共牌)
+        # 牌组只保存牌编号, 发牌时从末尾取出, 再取共享的 Card 对象
+        self.hand_seed = self.rng.new_hand()
+        self.deck = self.rng.deal(2 * len(self.players) + 5)
+        self.deck.reverse()
     
     def deal_initial_cards(self):
+        for player in self.players:
+            player.hand_state = evaluator.HandState()
         for _ in range(2):
             for player in self.players:
                 if not player.folded:
-                    player.hand.append(self.deck.pop())
+                    card = CARDS[self.deck.pop()]
+                    player.hand.append(card)
+                    player.hand_state.add(card.index)
     
     def deal_community_cards(self, count: int):
         for _ in range(count):
-            self.community_cards.append(self.deck.pop())
+            card = CARDS[self.deck.pop()]
+            self.community_cards.append(card)
+            # 每发一张公共牌, 所有玩家的牌型状态 O(1) 更新
+            for player in self.players:
+                player.hand_state.add(card.index)
+    
+    def view(self, seat: int) -> GameView:
+        """座位 seat 的不可变牌局快照, 交给AI策略"""
+        player = self.players[seat]
+        return snapshot(self.betting, seat, [c.index for c in player.hand],
+                        [c.index for c in self.community_cards], self.street, self.dealer,
+                        [p.actions for p in self.players])
+    
+    def strategy_for(self, player: Player):
+        """玩家使用的AI策略, 没有指定时使用牌局默认的胜率策略"""
+        return player.strategy if player.strategy is not None else self.default_strategy
+    
+    def record_latency(self, name: str, elapsed: float):
+        """按策略名称记录一次决策耗时(秒)"""
+        stats = self.latency.get(name)
+        if stats is None:
+            stats = self.latency[name] = LatencyStats()
+        stats.record(elapsed, self.decision_budget)
     
     def ai_decision(self, player: Player) -> Tuple[str, int]:
-        # 简单AI决策逻辑
-        hand_strength = random.random()  # 在实际应用中应该基于手牌强度计算
-        if hand_strength > 0.7:
-            return 'raise', self.current_bet * 2
-        elif hand_strength > 0.3:
-            return 'call', self.current_bet
-        else:
-            return 'fold', 0
+        """在时间预算内向玩家的策略要一个决策, 并按策略名称记录决策耗时"""
+        strategy = self.strategy_for(player)
+        view = self.view(self.betting.to_act)
+        start = time.perf_counter()
+        decision = strategy.decide(view, self.decision_budget)
+        self.record_latency(strategy.name, time.perf_counter() - start)
+        return decision
     
     def play_round(self):
-        # 初始化新一轮
+        self.start_hand()
+        
+        # 下注轮次
+        betting_rounds = ['preflop', 'flop', 'turn', 'river']
+        for round_name in betting_rounds:
+            self.begin_street(round_name)
+            if self.betting.hand_over:
+                break  # 如果只剩一个玩家，结束当前轮次
+            
+            # 玩家依次行动, 有人加注后其他玩家要重新表态, 直到所有人跟平
+            while not self.betting.round_over:
+                player = self.players[self.betting.to_act]
+                if player.is_ai:
+                    self.apply_action(*self.ai_decision(player))
+                else:
+                    self.handle_human_player_turn(player)
+    
+    def start_hand(self):
+        """开始新的一局: 重置玩家和下注状态, 洗牌并发底牌"""
         self.round_number += 1
         self.pot = 0
         self.community_cards = []
-        self.current_bet = 10  # 小盲注
-        self.game_log.append(f"\n===== 第 {self.round_number} 局开始 =====")
+        self.current_bet = 0
         
         # 重置玩家状态
         for player in self.players:
             player.hand = []
             player.folded = False
             player.current_bet = 0
+            player.total_bet = 0
             player.actions = []  # 重置玩家行动记录
+        self.betting.start_hand([p.chips for p in self.players])
+        self.dealer = self.betting.next_live(self.dealer)
         
         # 初始化牌组
         self.init_deck()
         
         # 发初始手牌
         self.deal_initial_cards()
-        self.log_player_hands()  # 记录玩家手牌
+        if self.events:
+            self.events.emit(HandStarted(self))
+    
+    def begin_street(self, round_name: str):
+        """进入一个下注轮: 发公共牌并开始这一轮的下注"""
+        self.street = round_name
+        if round_name == 'flop':
+            self.deal_community_cards(3)
+        elif round_name in ['turn', 'river']:
+            self.deal_community_cards(1)
+        if self.events:
+            self.events.emit(StreetStarted(self, round_name))
+        
+        # 每名玩家本轮的下注从零开始
+        for player in self.players:
+            player.current_bet = 0
+        betting = self.betting
+        if round_name != 'preflop' or betting.live < 2:
+            # 翻牌后从庄家左手边第一名玩家开始行动
+            betting.start_street(betting.next_live(self.dealer))
+            self.current_bet = betting.current_bet
+            return
         
-        # 下注轮次
-        betting_rounds = ['preflop', 'flop', 'turn', 'river']
-        for round_name in betting_rounds:
-            self.game_log.append(f"\n--- {self.translate_round(round_name)}阶段 ---")
-            
-            if round_name == 'flop':
-                self.deal_community_cards(3)
-                self.log_community_cards()
-            elif round_name in ['turn', 'river']:
-                self.deal_community_cards(1)
-                self.log_community_cards()
-            
-            # 显示当前状态
-            self.display_game_state()
-            
-            # 玩家行动
-            active_players = [p for p in self.players if not p.folded]
-            if len(active_players) <= 1:
-                self.game_log.append("只剩一名玩家，本轮结束")
-                break  # 如果只剩一个玩家，结束当前轮次
-                
-            for player in self.players:
-                if player.folded:
-                    continue
-                    
-                if player.is_ai:
-                    action, amount = self.ai_decision(player)
-                    action_str = self.translate_action(action)
-                    print(f"\n{player.name} 选择: {action_str}")
-                    
-                    if action == 'fold':
-                        player.folded = True
-                        print(f"{player.name} 弃牌")
-                        player.actions.append(f"弃牌")
-                        self.game_log.append(f"{player.name} 弃牌")
-                    elif action == 'call':
-                        bet_amount = self.current_bet - player.current_bet
-                        self.pot += bet_amount
-                        player.chips -= bet_amount
-                        player.current_bet = self.current_bet
-                        print(f"{player.name} 跟注 ${bet_amount}")
-                        player.actions.append(f"跟注 ${bet_amount}")
-                        self.game_log.append(f"{player.name} 跟注 ${bet_amount}")
-                    else:  # raise
-                        bet_amount = amount - player.current_bet
-                        self.current_bet = amount
-                        self.pot += bet_amount
-                        player.chips -= bet_amount
-                        player.current_bet = amount
-                        print(f"{player.name} 加注到 ${amount}")
-                        player.actions.append(f"加注到 ${amount}")
-                        self.game_log.append(f"{player.name} 加注到 ${amount}")
-                else:
-                    self.handle_human_player_turn(player)
+        # 翻牌前小盲、大盲下注, 从大盲左手边开始行动; 只剩两人时庄家下小盲注
+        if betting.live == 2:
+            small = self.dealer
+        else:
+            small = betting.next_live(self.dealer)
+        big = betting.next_live(small)
+        betting.start_street(betting.next_live(big), ((small, self.small_blind), (big, self.big_blind)))
+        self.current_bet = betting.current_bet
+        self.pot = betting.pot
+        for seat, action in ((small, 'small_blind'), (big, 'big_blind')):
+            self.after_action(seat, action, betting.committed[seat])
+    
+    def sync_seat(self, seat: int):
+        """把下注状态机中一个座位的筹码和下注同步到玩家对象"""
+        betting = self.betting
+        player = self.players[seat]
+        player.chips = betting.stack[seat]
+        player.current_bet = betting.bet[seat]
+        player.total_bet = betting.committed[seat]
+        player.folded = betting.folded[seat]
+    
+    def after_action(self, seat: int, action: str, bet_amount: int):
+        """同步座位状态, 记录行动并通知监听者"""
+        self.sync_seat(seat)
+        player = self.players[seat]
+        player.actions.append((self.street, action, bet_amount, player.current_bet))
+        if self.events:
+            self.events.emit(ActionTaken(self, seat, action, bet_amount))
+    
+    def apply_action(self, action: str, amount: int = 0) -> Tuple[str, int]:
+        """提交当前行动玩家的行动, 同步玩家的筹码和下注, 返回 (实际行动, 投入的筹码)
+        加注时 amount 为本轮要加注到的下注额
+        """
+        betting = self.betting
+        seat = betting.to_act
+        bet_amount = betting.submit(action, amount)
+        action = betting.last_action
+        self.pot = betting.pot
+        self.current_bet = betting.current_bet
+        self.after_action(seat, action, bet_amount)
+        return action, bet_amount
+    
+    def describe_action(self, action: str, bet_amount: int, bet: int) -> str:
+        """行动的文字描述, 与日志格式一致; bet 为行动后本轮的下注额"""
+        if action == 'fold':
+            return "弃牌"
+        if action == 'check':
+            return "过牌"
+        if action == 'call':
+            return f"跟注 ${bet_amount}"
+        if action == 'small_blind':
+            return f"下小盲注 ${bet_amount}"
+        if action == 'big_blind':
+            return f"下大盲注 ${bet_amount}"
+        return f"加注到 ${bet}"
+    
+    def format_actions(self, player: Player) -> str:
+        """玩家本局行动的文字记录"""
+        return ', '.join(self.describe_action(action, amount, bet)
+                         for _, action, amount, bet in player.actions)
     
     def handle_human_player_turn(self, player: Player):
         while True:
             self.display_player_options(player)
             try:
                 choice = int(input("请输入你的选择 (1-3): "))
-                if choice == 1:  # 跟注
-                    bet_amount = self.current_bet - player.current_bet
-                    if bet_amount > player.chips:
-                        print("你的筹码不足以跟注!")
-                        continue
-                    self.pot += bet_amount
-                    player.chips -= bet_amount
-                    player.current_bet = self.current_bet
-                    print(f"{player.name} 跟注 ${bet_amount}")
-                    player.actions.append(f"跟注 ${bet_amount}")
-                    self.game_log.append(f"{player.name} 跟注 ${bet_amount}")
+                if choice == 1:  # 跟注/过牌, 筹码不足时全下
+                    self.apply_action('call')
                     break
                 elif choice == 2:  # 加注
-                    min_raise = self.current_bet * 2
+                    min_raise = self.betting.min_raise_to()
+                    max_raise = self.betting.max_raise_to()
+                    if max_raise <= self.current_bet:
+                        print("现在不能加注(筹码不足, 或者对手不足额全下后只能跟注或弃牌)!")
+                        continue
                     try:
-                        amount = int(input(f"请输入加注金额 (最小 ${min_raise}): "))
+                        amount = int(input(f"请输入加注到的金额 (${min_raise} ~ ${max_raise}): "))
                         if amount < min_raise:
                             print(f"加注金额必须至少为 ${min_raise}!")
                             continue
-                        if amount > player.chips:
+                        if amount > max_raise:
                             print("你的筹码不足!")
                             continue
-                        bet_amount = amount - player.current_bet
-                        self.current_bet = amount
-                        self.pot += bet_amount
-                        player.chips -= bet_amount
-                        player.current_bet = amount
-                        print(f"{player.name} 加注到 ${amount}")
-                        player.actions.append(f"加注到 ${amount}")
-                        self.game_log.append(f"{player.name} 加注到 ${amount}")
+                        self.apply_action('raise', amount)
                         break
                     except ValueError:
                         print("请输入有效的数字!")
                 elif choice == 3:  # 弃牌
-                    player.folded = True
-                    print(f"{player.name} 弃牌")
-                    player.actions.append(f"弃牌")
-                    self.game_log.append(f"{player.name} 弃牌")
+                    self.apply_action('fold')
                     break
                 else:
                     print("无效的选择，请重试!")
@@ -190,6 +282,8 @@ class TexasHoldem:
     def translate_action(self, action: str) -> str:
         if action == 'fold':
             return "弃牌"
+        elif action == 'check':
+            return "过牌"
         elif action == 'call':
             return "跟注"
         elif action == 'raise':
@@ -207,159 +301,31 @@ class TexasHoldem:
             return "河牌"
         return round_name
     
-    def display_game_state(self):
-        print("\n" + "="*50)
-        
-        for player in self.players:
-            status = "已弃牌" if player.folded else "游戏中"
-            if not player.is_ai:
-                
-                print(f"\n{player.name} | 筹码: ${player.chips} | 状态: {status}")
-            else:
-                print(f"\n{player.name} | 筹码: ${player.chips} | 状态: {status}")
-    
     def display_player_options(self, player: Player):
         print(f"公共牌: {' '.join(str(card) for card in self.community_cards)}")
         print(f"下注池: ${self.pot}")
         print(f"\n{player.name}的回合")
         print(f"\n{player.name}的手牌: {' '.join(str(card) for card in player.hand)}")
-        print(f"当前下注: ${self.current_bet}")
-        print("选项: 1)跟注 2)加注 3)弃牌")
+        print(f"当前下注: ${self.current_bet} | 你已下注: ${player.current_bet} | 需要跟注: ${self.betting.to_call(self.betting.to_act)}")
+        print("选项: 1)跟注/过牌 2)加注 3)弃牌")
     
-    def get_card_value(self, rank: str) -> int:
-        """获取牌面点数的数值"""
-        values = {'2': 2, '3': 3, '4': 4, '5': 5, '6': 6, '7': 7, '8': 8, 
-                 '9': 9, '10': 10, 'J': 11, 'Q': 12, 'K': 13, 'A': 14}
-        return values.get(rank, 0)
+    def hand_strength(self, player: Player) -> int:
+        """获取玩家手牌(底牌+公共牌)的整数强度, 数值越大牌越大
+        使用发牌时增量更新的牌型状态, 同一条街重复调用只查一次表
+        """
+        state = player.hand_state
+        if state.size != len(player.hand) + len(self.community_cards):
+            # 手牌或公共牌在发牌之外被修改过, 重新建立状态
+            state = player.hand_state = evaluator.HandState(
+                card.index for card in player.hand + self.community_cards)
+        return state.strength
     
     def evaluate_hand(self, player: Player) -> tuple:
         """评估玩家手牌的牌型和大小
         返回格式: (牌型等级, [牌型组成的牌值], [剩余牌值])
         牌型等级: 9-同花顺, 8-四条, 7-葫芦, 6-同花, 5-顺子, 4-三条, 3-两对, 2-一对, 1-高牌
         """
-        # 合并玩家手牌和公共牌
-        all_cards = player.hand + self.community_cards
-        
-        # 按花色分组
-        suits = {}
-        for card in all_cards:
-            if card.suit not in suits:
-                suits[card.suit] = []
-            suits[card.suit].append(card)
-        
-        # 按点数分组
-        ranks = {}
-        for card in all_cards:
-            value = self.get_card_value(card.rank)
-            if value not in ranks:
-                ranks[value] = []
-            ranks[value].append(card)
-        
-        # 检查同花
-        flush_cards = None
-        for suit, cards in suits.items():
-            if len(cards) >= 5:
-                flush_cards = sorted(cards, key=lambda c: self.get_card_value(c.rank), reverse=True)
-                break
-        
-        # 检查顺子
-        straight = []
-        values = sorted(ranks.keys(), reverse=True)
-        
-        # 特殊情况: A-5-4-3-2 顺子
-        if 14 in values and 2 in values and 3 in values and 4 in values and 5 in values:
-            # A在这里算作1
-            straight = [ranks[5][0], ranks[4][0], ranks[3][0], ranks[2][0], ranks[14][0]]
-        
-        # 常规顺子检查
-        if not straight:
-            for i in range(len(values) - 4):
-                if values[i] - values[i+4] == 4:
-                    straight = [ranks[values[i]][0], ranks[values[i+1]][0], 
-                               ranks[values[i+2]][0], ranks[values[i+3]][0], 
-                               ranks[values[i+4]][0]]
-                    break
-        
-        # 检查同花顺
-        straight_flush = None
-        if flush_cards and len(flush_cards) >= 5:
-            flush_values = [self.get_card_value(card.rank) for card in flush_cards]
-            
-            # 检查常规同花顺
-            for i in range(len(flush_values) - 4):
-                if flush_values[i] - flush_values[i+4] == 4:
-                    straight_flush = flush_cards[i:i+5]
-                    break
-            
-            # 检查A-5-4-3-2同花顺
-            if not straight_flush and 14 in flush_values and all(v in flush_values for v in [2, 3, 4, 5]):
-                ace = next(card for card in flush_cards if self.get_card_value(card.rank) == 14)
-                two = next(card for card in flush_cards if self.get_card_value(card.rank) == 2)
-                three = next(card for card in flush_cards if self.get_card_value(card.rank) == 3)
-                four = next(card for card in flush_cards if self.get_card_value(card.rank) == 4)
-                five = next(card for card in flush_cards if self.get_card_value(card.rank) == 5)
-                straight_flush = [five, four, three, two, ace]
-        
-        # 检查四条、三条、对子等
-        quads = []  # 四条
-        trips = []  # 三条
-        pairs = []  # 对子
-        
-        for value, cards in ranks.items():
-            if len(cards) == 4:
-                quads.append((value, cards))
-            elif len(cards) == 3:
-                trips.append((value, cards))
-            elif len(cards) == 2:
-                pairs.append((value, cards))
-        
-        # 按牌值排序
-        quads.sort(reverse=True)
-        trips.sort(reverse=True)
-        pairs.sort(reverse=True)
-        
-        # 单牌(用于比较同等牌型的大小)
-        singles = sorted([self.get_card_value(card.rank) for card in all_cards], reverse=True)
-        
-        # 判断牌型
-        if straight_flush:
-            # 同花顺
-            return (9, [self.get_card_value(card.rank) for card in straight_flush], [])
-        
-        if quads:
-            # 四条
-            kicker = next(v for v in singles if v != quads[0][0])
-            return (8, [quads[0][0]], [kicker])
-        
-        if trips and pairs:
-            # 葫芦(三条+对子)
-            return (7, [trips[0][0]], [pairs[0][0]])
-        
-        if flush_cards:
-            # 同花
-            return (6, [self.get_card_value(card.rank) for card in flush_cards[:5]], [])
-        
-        if straight:
-            # 顺子
-            return (5, [self.get_card_value(card.rank) for card in straight], [])
-        
-        if trips:
-            # 三条
-            kickers = [v for v in singles if v != trips[0][0]][:2]
-            return (4, [trips[0][0]], kickers)
-        
-        if len(pairs) >= 2:
-            # 两对
-            kicker = next(v for v in singles if v != pairs[0][0] and v != pairs[1][0])
-            return (3, [pairs[0][0], pairs[1][0]], [kicker])
-        
-        if pairs:
-            # 一对
-            kickers = [v for v in singles if v != pairs[0][0]][:3]
-            return (2, [pairs[0][0]], kickers)
-        
-        # 高牌
-        return (1, [], singles[:5])
+        return evaluator.decode(self.hand_strength(player))
     
     def compare_hands(self, hand1: tuple, hand2: tuple) -> int:
         """比较两手牌的大小
@@ -404,138 +370,122 @@ class TexasHoldem:
         return hand_types.get(hand_type, "未知")
     
     def determine_winner(self):
+        """摊牌结算: 按每名玩家本局的投入划分主池和边池, 每个池分给其中牌最大的玩家"""
         active_players = [p for p in self.players if not p.folded]
-        if len(active_players) == 1:
-            winner = active_players[0]
-            print(f"\n{winner.name} 获胜! 赢得 ${self.pot}")
-            self.game_log.append(f"\n{winner.name} 获胜! 赢得 ${self.pot}")
-            winner.chips += self.pot
-            self.display_round_summary(winner)
-            return
-        
-        # 评估每个玩家的手牌
         player_hands = []
-        for player in active_players:
-            hand_value = self.evaluate_hand(player)
-            player_hands.append((player, hand_value))
-            
-            # 记录玩家的牌型
-            hand_type = self.get_hand_type_name(hand_value[0])
-            self.game_log.append(f"{player.name} 的牌型: {hand_type}")
-            print(f"{player.name} 的牌型: {hand_type}")
-        
-        # 找出最大的手牌
-        best_player = player_hands[0][0]
-        best_hand = player_hands[0][1]
-        
-        for player, hand in player_hands[1:]:
-            if self.compare_hands(hand, best_hand) > 0:
-                best_player = player
-                best_hand = hand
-        
-        # 检查是否有平局
-        tied_players = [p for p, h in player_hands if self.compare_hands(h, best_hand) == 0]
-        
-        if len(tied_players) > 1:
-            # 平局情况，多个玩家平分奖池
-            share = self.pot // len(tied_players)
-            remainder = self.pot % len(tied_players)
-            
-            print(f"\n平局! {', '.join(p.name for p in tied_players)} 平分奖池")
-            self.game_log.append(f"\n平局! {', '.join(p.name for p in tied_players)} 平分奖池")
-            
-            for player in tied_players:
-                player.chips += share
-            
-            # 如果有余数，随机分配给一个玩家
-            if remainder > 0:
-                lucky_player = random.choice(tied_players)
-                lucky_player.chips += remainder
-                print(f"{lucky_player.name} 获得额外的 ${remainder} 筹码")
-                self.game_log.append(f"{lucky_player.name} 获得额外的 ${remainder} 筹码")
-            
-            self.display_round_summary(None, tied_players)
-        else:
-            # 单一赢家
-            winner = best_player
-            print(f"\n{winner.name} 获胜! 赢得 ${self.pot}")
-            self.game_log.append(f"\n{winner.name} 获胜! 赢得 ${self.pot}")
-            winner.chips += self.pot
-            self.display_round_summary(winner)
-    
-    def display_round_summary(self, winner=None, tied_players=None):
-        """显示本局游戏的详细信息"""
-        print("\n" + "="*50)
-        print(f"第 {self.round_number} 局结束")
-        print("="*50)
-        print(f"公共牌: {' '.join(str(card) for card in self.community_cards)}")
-        print(f"下注池: ${self.pot}")
-        print("\n所有玩家手牌和状态:")
-        
-        for player in self.players:
-            status = "已弃牌" if player.folded else "游戏中"
-            
-            if tied_players and player in tied_players:
-                winner_mark = " (平局获胜)"
-            elif player == winner:
-                winner_mark = " (获胜者)"
+        if len(active_players) > 1:
+            # 评估每个玩家的手牌
+            player_hands = [(player, self.hand_strength(player)) for player in active_players]
+        
+        # 只剩一名玩家时不需要比牌, 强度记为 0
+        strengths = {id(p): s for p, s in player_hands}
+        result = showdown.resolve(
+            [p.total_bet for p in self.players],
+            [None if p.folded else strengths.get(id(p), 0) for p in self.players],
+            self.odd_chip_order())
+        self.last_showdown = result
+        
+        for seat, amount in result.payouts.items():
+            self.players[seat].chips += amount
+        if self.events:
+            self.events.emit(HandEnded(self, result, player_hands))
+    
+    def odd_chip_order(self) -> List[int]:
+        """从庄家左手边开始的座位顺序"""
+        n = len(self.players)
+        return [(self.dealer + 1 + i) % n for i in range(n)]
+    
+    def cards_text(self, cards) -> str:
+        return ' '.join(str(card) for card in cards)
+    
+    def payout_lines(self, result: showdown.ShowdownResult) -> List[str]:
+        """每个池赢家的文字描述, 与日志格式一致"""
+        lines = []
+        for k, pot in enumerate(result.pots):
+            if len(result.pots) > 1:
+                lines.append(f"\n主池 ${pot.amount}" if k == 0 else f"\n边池 {k} ${pot.amount}")
+            if len(pot.winners) == 1:
+                lines.append(f"{self.players[pot.winners[0]].name} 获胜! 赢得 ${pot.amount}")
             else:
-                winner_mark = ""
-                
-            print(f"\n{player.name}{winner_mark}:")
-            print(f"手牌: {' '.join(str(card) for card in player.hand)}")
-            print(f"筹码: ${player.chips} | 状态: {status}")
-            print(f"本局行动: {', '.join(player.actions)}")
-            
-            if not player.folded:
-                hand_value = self.evaluate_hand(player)
-                hand_type = self.get_hand_type_name(hand_value[0])
-                print(f"牌型: {hand_type}")
-        
-        self.game_log.append("\n--- 本局总结 ---")
-        self.game_log.append(f"公共牌: {' '.join(str(card) for card in self.community_cards)}")
-        self.game_log.append(f"下注池: ${self.pot}")
-        
-        for player in self.players:
+                lines.append(f"平局! {', '.join(self.players[s].name for s in pot.winners)} 平分奖池")
+                lines.extend(f"{self.players[s].name} 分得 ${pot.shares[s]}" for s in pot.winners)
+        if len(result.pots) == 1:
+            lines[0] = "\n" + lines[0]
+        return lines
+    
+    def summary_lines(self, result: showdown.ShowdownResult) -> List[str]:
+        """本局总结: 公共牌、底池和每名玩家的手牌、筹码、行动与牌型"""
+        tied = {seat for pot in result.pots if len(pot.winners) > 1 for seat in pot.winners}
+        winners = set(result.winners)
+        lines = [f"公共牌: {self.cards_text(self.community_cards)}", f"下注池: ${self.pot}"]
+        for seat, player in enumerate(self.players):
             status = "已弃牌" if player.folded else "游戏中"
             
-            if tied_players and player in tied_players:
+            if seat in tied:
                 winner_mark = " (平局获胜)"
-            elif player == winner:
+            elif seat in winners:
                 winner_mark = " (获胜者)"
             else:
                 winner_mark = ""
                 
-            self.game_log.append(f"\n{player.name}{winner_mark}:")
-            self.game_log.append(f"手牌: {' '.join(str(card) for card in player.hand)}")
-            self.game_log.append(f"筹码: ${player.chips} | 状态: {status}")
-            self.game_log.append(f"本局行动: {', '.join(player.actions)}")
+            lines.append(f"\n{player.name}{winner_mark}:")
+            lines.append(f"手牌: {self.cards_text(player.hand)}")
+            lines.append(f"筹码: ${player.chips} | 状态: {status}")
+            lines.append(f"本局行动: {self.format_actions(player)}")
             
             if not player.folded:
                 hand_value = self.evaluate_hand(player)
-                hand_type = self.get_hand_type_name(hand_value[0])
-                self.game_log.append(f"牌型: {hand_type}")
+                lines.append(f"牌型: {self.get_hand_type_name(hand_value[0])}")
+        return lines
     
-    def log_player_hands(self):
-        """记录所有玩家的手牌"""
-        self.game_log.append("\n玩家手牌:")
-        for player in self.players:
-            self.game_log.append(f"{player.name}: {' '.join(str(card) for card in player.hand)}")
+    def save_game_log(self):
+        """关闭所有监听者, 把缓冲中剩余的游戏日志和牌局记录写入文件"""
+        self.events.close()
+        if self.game_log is not None:
+            self.game_log.close()
+            print(f"\n游戏记录已保存到: {self.game_log.path}")
+        if self.history is not None:
+            self.history.close()
+            print(f"牌局记录已保存到: {self.history.path}")
+
+
+class ConsoleListener(Listener):
+    """在控制台打印牌局进程和每局总结"""
+    
+    def on_street(self, event):
+        game = event.game
+        print("\n" + "="*50)
+        for player in game.players:
+            status = "已弃牌" if player.folded else "游戏中"
+            print(f"\n{player.name} | 筹码: ${player.chips} | 状态: {status}")
     
-    def log_community_cards(self):
-        """记录当前的公共牌"""
-        self.game_log.append(f"公共牌: {' '.join(str(card) for card in self.community_cards)}")
+    def on_action(self, event):
+        game = event.game
+        player = game.players[event.seat]
+        if player.is_ai and event.action not in ('small_blind', 'big_blind'):
+            print(f"\n{player.name} 选择: {game.translate_action(event.action)}")
+        print(f"{player.name} {game.describe_action(event.action, event.amount, player.current_bet)}")
     
-    def save_game_log(self):
-        """保存游戏日志到文件"""
-        timestamp = datetime.datetime.now().strftime("%Y%m%d_%H%M%S")
-        filename = f"F:\\Vscode_all\\Puke_Game\\log_{timestamp}.txt"
-        with open(filename, "w", encoding="utf-8") as f:
-            f.write("\n".join(self.game_log))
-        print(f"\n游戏记录已保存到: {filename}")
+    def on_hand_end(self, event):
+        game = event.game
+        for player, strength in event.player_hands:
+            print(f"{player.name} 的牌型: {game.get_hand_type_name(evaluator.category(strength))}")
+        for line in game.payout_lines(event.result):
+            print(line)
+        print("\n" + "="*50)
+        print(f"第 {game.round_number} 局结束")
+        print("="*50)
+        lines = game.summary_lines(event.result)
+        for line in lines[:2]:
+            print(line)
+        print("\n所有玩家手牌和状态:")
+        for line in lines[2:]:
+            print(line)
 
-def setup_game():
-    game = TexasHoldem()
+def setup_game(log_dir: str = '.', history: Optional[HandHistoryWriter] = None,
+               decision_budget: float = DEFAULT_BUDGET, seed: Optional[int] = None):
+    game = TexasHoldem(log_dir=log_dir, history=history, decision_budget=decision_budget,
+                       rng=TableRNG(seed))
     
     # 设置玩家数量
     while True:
@@ -583,12 +533,49 @@ def setup_game():
     
     return game
 
+def parse_args():
+    parser = argparse.ArgumentParser(description="德州扑克游戏")
+    parser.add_argument('--simulate', type=int, metavar='HANDS',
+                        help="无界面模式: 只有AI玩家, 连续模拟指定局数后输出统计")
+    parser.add_argument('--players', type=int, default=6, help="模拟时的AI玩家数量 (2-10)")
+    parser.add_argument('--seed', type=int, default=None,
+                        help="牌桌随机种子, 每局的种子记录在日志中; 不指定时随机选取")
+    parser.add_argument('--chips', type=int, default=1000, help="模拟时每名玩家的初始筹码")
+    parser.add_argument('--strategies', default='equity',
+                        help="模拟时逗号分隔的AI策略名称, 按座位轮流分配, 可选: equity, random, rules, robot, "
+                             "range, cfr (cfr 需要先用 cfr.py 训练出策略文件)")
+    parser.add_argument('--budget-ms', type=float, default=DEFAULT_BUDGET * 1000,
+                        help="AI每次决策的时间预算(毫秒)")
+    parser.add_argument('--log-dir', default='.', help="游戏日志和牌局记录的保存目录")
+    parser.add_argument('--history', action='store_true', help="同时写出结构化牌局记录 (JSON Lines)")
+    parser.add_argument('--compress', choices=['gzip', 'zstd'], default=None, help="牌局记录的压缩格式")
+    return parser.parse_args()
+
 def main():
+    args = parse_args()
+    if args.simulate:
+        from simulator import check_strategies, run_simulation, format_summary
+        strategies = [s.strip() for s in args.strategies.split(',') if s.strip()]
+        try:
+            check_strategies(strategies)
+        except ValueError as e:
+            raise SystemExit(str(e))
+    history = HandHistoryWriter(args.log_dir, args.compress) if args.history else None
+    if args.simulate:
+        # 无界面批量模拟, 不需要任何输入
+        result = run_simulation(args.simulate, args.players, args.seed, args.chips,
+                                strategies, history, args.budget_ms / 1000)
+        print(format_summary(result))
+        if history is not None:
+            history.close()
+            print(f"牌局记录已保存到: {history.path}")
+        return
+    
     print("="*50)
     print("欢迎来到德州扑克游戏!")
     print("="*50)
     
-    game = setup_game()
+    game = setup_game(args.log_dir, history, args.budget_ms / 1000, args.seed)
     rounds_played = 0
     
     try:
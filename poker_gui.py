@@ -1,73 +1,62 @@
+import argparse
 import sys
 import random
 import os
 import datetime
+import time
+from typing import Dict, List, NamedTuple, Optional
 from PyQt5.QtWidgets import (QApplication, QMainWindow, QWidget, QVBoxLayout, QHBoxLayout, 
                              QLabel, QPushButton, QGridLayout, QLineEdit, QMessageBox, 
-                             QInputDialog, QFrame, QSizePolicy, QSpacerItem, QStackedWidget)
-from PyQt5.QtCore import Qt, QTimer, QSize
-from PyQt5.QtGui import QFont, QPixmap, QIcon, QColor, QPalette, QBrush
+                             QInputDialog, QFrame, QSizePolicy, QSpacerItem, QStackedWidget,
+                             QComboBox, QCheckBox, QSlider, QSpinBox, QFileDialog)
+from PyQt5.QtCore import Qt, QTimer, QSize, QObject, QRunnable, QThreadPool, pyqtSignal
+from PyQt5.QtGui import QFont, QPixmap, QIcon, QColor, QPalette, QBrush, QPainter
 
 # 导入游戏逻辑
-from test11 import Card, Player, TexasHoldem
+from card_atlas import default_atlas
+from cards import CARDS
+from events import Listener
+from log_parser import STREETS, HandIndex, HandRecord
+from main import Card, Player, TexasHoldem
+
+# 动画速度: (名称, AI行动前后的停顿毫秒数), 人类玩家行动后停顿一半
+ANIMATION_SPEEDS = [("慢", 1500), ("正常", 1000), ("快", 300), ("即时", 0)]
+DEFAULT_SPEED = 1
+
+# 公共牌和手牌的位置数, 牌控件在界面创建时建好, 之后只换显示的牌
+BOARD_SLOTS = 5
+HOLE_SLOTS = 2
+
+# 牌的逻辑尺寸(像素)
+CARD_WIDTH = 80
+CARD_HEIGHT = 120
 
 # 定义扑克牌显示类
-class CardWidget(QLabel):
+class CardWidget(QWidget):
+    """从共用的牌图缓存里取图片绘制一张牌, 没有牌时什么也不画"""
+    
     def __init__(self, card=None, hidden=False, parent=None):
         super().__init__(parent)
         self.card = card
         self.hidden = hidden
-        self.setFixedSize(80, 120)
-        self.setAlignment(Qt.AlignCenter)
-        self.setStyleSheet("""
-            QLabel {
-                background-color: white;
-                border: 2px solid black;
-                border-radius: 5px;
-                font-size: 16px;
-                font-weight: bold;
-            }
-        """)
-        self.update_display()
-    
-    def update_display(self):
-        if self.hidden:
-            self.setText("🂠")
-            self.setStyleSheet("""
-                QLabel {
-                    background-color: #2E86C1;
-                    color: white;
-                    border: 2px solid black;
-                    border-radius: 5px;
-                    font-size: 40px;
-                    font-weight: bold;
-                }
-            """)
-        elif self.card:
-            # 设置花色颜色
-            color = "black"
-            if self.card.suit in ['♥', '♦']:
-                color = "red"
-            
-            self.setText(f"{self.card.suit}{self.card.rank}")
-            self.setStyleSheet(f"""
-                QLabel {{
-                    background-color: white;
-                    color: {color};
-                    border: 2px solid black;
-                    border-radius: 5px;
-                    font-size: 16px;
-                    font-weight: bold;
-                }}
-            """)
-        else:
-            self.setText("")
-            self.setStyleSheet("""
-                QLabel {
-                    background-color: transparent;
-                    border: none;
-                }
-            """)
+        self.atlas = default_atlas()
+        self.setFixedSize(CARD_WIDTH, CARD_HEIGHT)
+    
+    def set_card(self, card=None, hidden=False):
+        """换成显示另一张牌, 牌没有变化时什么也不做"""
+        if card is self.card and hidden == self.hidden:
+            return
+        self.card = card
+        self.hidden = hidden
+        self.update()
+    
+    def paintEvent(self, event):
+        if self.card is None and not self.hidden:
+            return
+        # 按当前屏幕的设备像素比取图, 换到高分屏时缓存里会多一套清晰的图
+        pixmap = self.atlas.pixmap(None if self.hidden else self.card.index,
+                                   self.width(), self.height(), self.devicePixelRatioF())
+        QPainter(self).drawPixmap(0, 0, pixmap)
 
 # 定义玩家信息显示类
 class PlayerInfoWidget(QWidget):
@@ -75,6 +64,7 @@ class PlayerInfoWidget(QWidget):
         super().__init__(parent)
         self.player = player
         self.is_current = is_current
+        self.style_key = None  # 上次套用样式时的 (是否当前玩家, 是否弃牌)
         
         # 创建布局
         layout = QVBoxLayout(self)
@@ -105,6 +95,11 @@ class PlayerInfoWidget(QWidget):
         self.update_style()
     
     def update_style(self):
+        # 样式表每次设置都要重新解析, 状态没变时跳过
+        key = (self.is_current, self.player.folded)
+        if key == self.style_key:
+            return
+        self.style_key = key
         base_style = """
             QLabel {
                 font-size: 14px;
@@ -150,7 +145,304 @@ class PlayerInfoWidget(QWidget):
                 }}
             """)
 
+class AISignals(QObject):
+    """AI线程把结果送回界面线程: (局面编号, 座位, 行动, 金额, 耗时秒数)"""
+    decided = pyqtSignal(int, int, str, int, float)
+    failed = pyqtSignal(int, int, str)
+
+
+class AIWorker(QRunnable):
+    """在线程池里运行策略的 decide, 不阻塞界面
+    
+    只读取界面线程生成的不可变快照 GameView, 不接触牌局对象;
+    结果带着发起时的局面编号, 编号过期(已经开始新一局)的结果由界面丢弃。
+    """
+    
+    def __init__(self, signals, token, strategy, view, budget):
+        super().__init__()
+        self.signals = signals
+        self.token = token
+        self.strategy = strategy
+        self.view = view
+        self.budget = budget
+    
+    def run(self):
+        start = time.perf_counter()
+        try:
+            action, amount = self.strategy.decide(self.view, self.budget)
+        except Exception as e:
+            self.signals.failed.emit(self.token, self.view.seat, str(e))
+            return
+        self.signals.decided.emit(self.token, self.view.seat, action, amount,
+                                  time.perf_counter() - start)
+
+
 # 主游戏界面
+class GameViewListener(Listener):
+    """把牌局事件显示到界面上"""
+    
+    def __init__(self, window):
+        self.window = window
+    
+    def on_street(self, event):
+        self.window.game_status.setText(f"{event.game.translate_round(event.street)}阶段")
+        self.window.update_game_ui()
+    
+    def on_action(self, event):
+        game = event.game
+        player = game.players[event.seat]
+        self.window.game_status.setText(
+            f"{player.name} {game.describe_action(event.action, event.amount, player.current_bet)}")
+        self.window.update_game_ui()
+    
+    def on_hand_end(self, event):
+        self.window.update_game_ui()
+
+
+# 回放: 牌的文字 -> 牌对象, 下注轮 -> (名称, 公共牌张数)
+CARD_BY_NAME = {str(card): card for card in CARDS}
+REPLAY_STREETS = {street: (name, count) for (name, street), count
+                  in zip(STREETS.items(), (0, 3, 4, 5))}
+REPLAY_STEP_MS = 1000  # 1倍速时每一步停顿的毫秒数
+MAX_REPLAY_SPEED = 100
+
+
+class ReplayStep(NamedTuple):
+    """回放中的一个画面"""
+    board: int                 # 已经发出的公共牌张数
+    pot: int
+    chips: Dict[str, int]
+    bets: Dict[str, int]       # 本轮下注额
+    folded: frozenset
+    actor: Optional[str]       # 刚行动的玩家
+    text: str
+
+
+def describe_step(action: str, amount: int, total: int) -> str:
+    """行动的文字描述, 与日志格式一致"""
+    if action == 'fold':
+        return "弃牌"
+    if action == 'check':
+        return "过牌"
+    if action == 'call':
+        return f"跟注 ${amount}"
+    if action == 'small_blind':
+        return f"下小盲注 ${amount}"
+    if action == 'big_blind':
+        return f"下大盲注 ${amount}"
+    return f"加注到 ${total}"
+
+
+def replay_steps(hand: HandRecord) -> List[ReplayStep]:
+    """把一局记录展开成逐个行动的画面, 开局筹码由结束时的筹码倒推"""
+    invested: Dict[str, int] = {}
+    for _, _, name, _, amount, _ in hand.actions:
+        invested[name] = invested.get(name, 0) + amount
+    chips = {name: hand.final_chips.get(name, 0) - hand.winnings.get(name, 0) + invested.get(name, 0)
+             for name in hand.players}
+    bets: Dict[str, int] = {}
+    folded = set()
+    pot = 0
+    street = 'preflop'
+    steps = [ReplayStep(0, 0, dict(chips), {}, frozenset(), None, f"第 {hand.number} 局开始")]
+    for _, action_street, name, action, amount, total in hand.actions:
+        if action_street != street:
+            # 新的下注轮: 发公共牌, 下注额从零开始
+            street = action_street
+            bets = {}
+            name_text, count = REPLAY_STREETS.get(street, (street, len(hand.board)))
+            steps.append(ReplayStep(count, pot, dict(chips), {}, frozenset(folded), None,
+                                    f"{name_text}阶段"))
+        chips[name] = chips.get(name, 0) - amount
+        bets[name] = total
+        pot += amount
+        if action == 'fold':
+            folded.add(name)
+        steps.append(ReplayStep(steps[-1].board, pot, dict(chips), dict(bets), frozenset(folded),
+                                name, f"{name} {describe_step(action, amount, total)}"))
+    results = [f"{name} 赢得 ${won}" for name, won in hand.winnings.items()]
+    results += [f"{name} 的牌型: {category}" for name, category in hand.showdown.items()]
+    steps.append(ReplayStep(len(hand.board), hand.pot or pot, dict(hand.final_chips or chips), {},
+                            frozenset(folded), None, " | ".join(results) or "本局结束"))
+    return steps
+
+
+class ReplayWidget(QWidget):
+    """牌局记录回放: 时间轴拖到任意一局, 1~100倍速逐个行动播放
+    
+    日志文件由 log_parser.HandIndex 内存映射并建立每局起始位置的索引,
+    只解析正在显示的这一局, 打开很大的日志也很快。
+    """
+    
+    def __init__(self, on_back, parent=None):
+        super().__init__(parent)
+        self.index: Optional[HandIndex] = None
+        self.hand_no = 0
+        self.steps: List[ReplayStep] = []
+        self.step = 0
+        self.board: List[Card] = []
+        self.seat_players: List[Player] = []
+        self.player_widgets: List[PlayerInfoWidget] = []
+        self.timer = QTimer(self)
+        self.timer.timeout.connect(self.advance)
+        
+        layout = QVBoxLayout(self)
+        label_style = """
+            QLabel {
+                color: white;
+                font-size: 16px;
+                background-color: rgba(0, 0, 0, 0.3);
+                padding: 5px;
+                border-radius: 5px;
+            }
+        """
+        self.info_label = QLabel("")
+        self.info_label.setAlignment(Qt.AlignCenter)
+        self.info_label.setStyleSheet(label_style)
+        
+        # 玩家信息, 座位不变时复用
+        self.players_area = QWidget()
+        self.players_layout = QHBoxLayout(self.players_area)
+        
+        self.pot_label = QLabel("下注池: $0")
+        self.pot_label.setAlignment(Qt.AlignCenter)
+        self.pot_label.setStyleSheet(label_style)
+        
+        board_widget = QWidget()
+        board_layout = QHBoxLayout(board_widget)
+        board_layout.setAlignment(Qt.AlignCenter)
+        self.board_cards = []
+        for _ in range(BOARD_SLOTS):
+            card_widget = CardWidget()
+            board_layout.addWidget(card_widget)
+            self.board_cards.append(card_widget)
+        
+        self.status_label = QLabel("")
+        self.status_label.setAlignment(Qt.AlignCenter)
+        self.status_label.setStyleSheet(label_style)
+        
+        # 播放控制: 上一局/播放/下一局, 时间轴, 倍速
+        controls = QHBoxLayout()
+        back_button = QPushButton("返回")
+        back_button.clicked.connect(on_back)
+        prev_button = QPushButton("上一局")
+        prev_button.clicked.connect(lambda: self.slider.setValue(self.hand_no - 1))
+        self.play_button = QPushButton("播放")
+        self.play_button.clicked.connect(self.toggle_play)
+        next_button = QPushButton("下一局")
+        next_button.clicked.connect(lambda: self.slider.setValue(self.hand_no + 1))
+        self.slider = QSlider(Qt.Horizontal)
+        self.slider.setRange(0, 0)
+        self.slider.valueChanged.connect(self.load_hand)
+        self.speed_box = QSpinBox()
+        self.speed_box.setRange(1, MAX_REPLAY_SPEED)
+        self.speed_box.setSuffix("×")
+        self.speed_box.valueChanged.connect(self.set_speed)
+        for widget in (back_button, prev_button, self.play_button, next_button):
+            controls.addWidget(widget)
+        controls.addWidget(self.slider, 1)
+        controls.addWidget(self.speed_box)
+        
+        layout.addWidget(self.info_label)
+        layout.addWidget(self.players_area)
+        layout.addWidget(self.pot_label)
+        layout.addWidget(board_widget)
+        layout.addWidget(self.status_label)
+        layout.addStretch(1)
+        layout.addLayout(controls)
+        self.set_speed(self.speed_box.value())
+    
+    def open(self, path: str):
+        """打开日志文件, 显示第一局"""
+        index = HandIndex(path)
+        if not len(index):
+            index.close()
+            raise ValueError("文件中没有牌局记录")
+        self.close_index()
+        self.index = index
+        self.slider.blockSignals(True)
+        self.slider.setRange(0, len(index) - 1)
+        self.slider.setValue(0)
+        self.slider.blockSignals(False)
+        self.load_hand(0)
+    
+    def close_index(self):
+        self.pause()
+        if self.index is not None:
+            self.index.close()
+            self.index = None
+    
+    def load_hand(self, i: int):
+        """跳到第 i 局(从0开始)的开头"""
+        if self.index is None:
+            return
+        self.hand_no = i
+        hand = self.index.hand(i)
+        name = os.path.basename(self.index.path)
+        if hand is None:
+            self.steps = []
+            self.info_label.setText(f"{name} | {i + 1}/{len(self.index)} | 这一局记录不完整")
+            self.pause()
+            return
+        seed = f" | 随机种子 {hand.seed}" if hand.seed is not None else ""
+        self.info_label.setText(f"{name} | {i + 1}/{len(self.index)} | 第 {hand.number} 局{seed}")
+        self.steps = replay_steps(hand)
+        self.set_players(hand)
+        self.board = [CARD_BY_NAME.get(card) for card in hand.board]
+        self.show_step(0)
+    
+    def set_players(self, hand: HandRecord):
+        if [p.name for p in self.seat_players] != hand.players:
+            while self.players_layout.count():
+                widget = self.players_layout.takeAt(0).widget()
+                if widget is not None:
+                    widget.deleteLater()
+            self.seat_players = [Player(name, 0, is_ai=True) for name in hand.players]
+            self.player_widgets = [PlayerInfoWidget(player) for player in self.seat_players]
+            for widget in self.player_widgets:
+                self.players_layout.addWidget(widget)
+        for player, widget in zip(self.seat_players, self.player_widgets):
+            cards = ' '.join(hand.hole_cards.get(player.name, []))
+            widget.name_label.setText(f"{player.name}  {cards}")
+    
+    def show_step(self, k: int):
+        self.step = k
+        step = self.steps[k]
+        for i, card_widget in enumerate(self.board_cards):
+            card_widget.set_card(self.board[i] if i < step.board and i < len(self.board) else None)
+        for player, widget in zip(self.seat_players, self.player_widgets):
+            player.chips = step.chips.get(player.name, 0)
+            player.current_bet = step.bets.get(player.name, 0)
+            player.folded = player.name in step.folded
+            widget.is_current = player.name == step.actor
+            widget.update_info()
+        self.pot_label.setText(f"下注池: ${step.pot}")
+        self.status_label.setText(step.text)
+    
+    def advance(self):
+        """播放下一步, 一局放完后接着放下一局"""
+        if self.step + 1 < len(self.steps):
+            self.show_step(self.step + 1)
+        elif self.index is not None and self.hand_no + 1 < len(self.index):
+            self.slider.setValue(self.hand_no + 1)
+        else:
+            self.pause()
+    
+    def toggle_play(self):
+        if self.timer.isActive():
+            self.pause()
+        else:
+            self.timer.start()
+            self.play_button.setText("暂停")
+    
+    def pause(self):
+        self.timer.stop()
+        self.play_button.setText("播放")
+    
+    def set_speed(self, speed: int):
+        self.timer.setInterval(REPLAY_STEP_MS // speed)
+
+
 class PokerGUI(QMainWindow):
     def __init__(self):
         super().__init__()
@@ -163,6 +455,14 @@ class PokerGUI(QMainWindow):
         self.current_player_idx = 0
         self.round_in_progress = False
         
+        # AI在后台线程思考, 局面编号在每局开始时递增, 用来作废上一局的结果和定时器
+        self.round_token = 0
+        self.ai_pool = QThreadPool(self)
+        self.ai_pool.setMaxThreadCount(1)
+        self.ai_signals = AISignals(self)
+        self.ai_signals.decided.connect(self.on_ai_decided)
+        self.ai_signals.failed.connect(self.on_ai_failed)
+        
         # 创建主窗口部件
         self.central_widget = QWidget()
         self.setCentralWidget(self.central_widget)
@@ -176,6 +476,10 @@ class PokerGUI(QMainWindow):
         # 创建游戏界面
         self.create_game_screen()
         
+        # 创建回放界面
+        self.replay_widget = ReplayWidget(self.close_replay)
+        self.stacked_widget.addWidget(self.replay_widget)
+        
         # 将堆叠窗口添加到主窗口
         main_layout = QVBoxLayout(self.central_widget)
         main_layout.addWidget(self.stacked_widget)
@@ -183,6 +487,9 @@ class PokerGUI(QMainWindow):
         # 设置背景
         self.set_background()
         
+        # 启动时画好全部牌图
+        default_atlas().warm(CARD_WIDTH, CARD_HEIGHT, self.devicePixelRatioF())
+        
         # 显示开始界面
         self.stacked_widget.setCurrentIndex(0)
     
@@ -269,11 +576,17 @@ class PokerGUI(QMainWindow):
         """)
         start_button.clicked.connect(self.start_game)
         
+        # 回放牌局记录按钮
+        replay_button = QPushButton("回放牌局记录")
+        replay_button.setStyleSheet(start_button.styleSheet())
+        replay_button.clicked.connect(self.choose_replay)
+        
         # 添加到开始界面布局
         start_layout.addStretch(1)
         start_layout.addWidget(title_label)
         start_layout.addWidget(input_widget)
         start_layout.addWidget(start_button, alignment=Qt.AlignCenter)
+        start_layout.addWidget(replay_button, alignment=Qt.AlignCenter)
         start_layout.addStretch(1)
         
         # 添加到堆叠窗口
@@ -296,6 +609,10 @@ class PokerGUI(QMainWindow):
         self.community_cards_layout = QHBoxLayout(self.community_cards_widget)
         self.community_cards_layout.setAlignment(Qt.AlignCenter)
         self.community_cards = []
+        for _ in range(BOARD_SLOTS):
+            card_widget = CardWidget()
+            self.community_cards_layout.addWidget(card_widget)
+            self.community_cards.append(card_widget)
         
         # 下注池和当前下注信息
         self.pot_info = QLabel("下注池: $0")
@@ -352,6 +669,10 @@ class PokerGUI(QMainWindow):
         self.player_hand_layout = QHBoxLayout(self.player_hand_widget)
         self.player_hand_layout.setAlignment(Qt.AlignCenter)
         self.player_cards = []
+        for _ in range(HOLE_SLOTS):
+            card_widget = CardWidget()
+            self.player_hand_layout.addWidget(card_widget)
+            self.player_cards.append(card_widget)
         
         # 玩家操作按钮
         self.action_widget = QWidget()
@@ -389,10 +710,21 @@ class PokerGUI(QMainWindow):
         self.raise_button.clicked.connect(self.on_raise)
         self.fold_button.clicked.connect(self.on_fold)
         
+        # 动画速度和快进: 人类玩家不在牌局中(已弃牌或全下)时AI行动不停顿
+        self.speed_box = QComboBox()
+        for name, delay in ANIMATION_SPEEDS:
+            self.speed_box.addItem(f"速度: {name}", delay)
+        self.speed_box.setCurrentIndex(DEFAULT_SPEED)
+        self.fast_forward_box = QCheckBox("快进")
+        self.fast_forward_box.setStyleSheet("color: white; font-size: 16px;")
+        self.fast_forward_box.setToolTip("只剩AI行动时全速进行")
+        
         # 添加按钮到布局
         self.action_layout.addWidget(self.call_button)
         self.action_layout.addWidget(self.raise_button)
         self.action_layout.addWidget(self.fold_button)
+        self.action_layout.addWidget(self.speed_box)
+        self.action_layout.addWidget(self.fast_forward_box)
         
         # 禁用按钮，直到游戏开始
         self.call_button.setEnabled(False)
@@ -426,8 +758,9 @@ class PokerGUI(QMainWindow):
         except ValueError:
             ai_count = 3
         
-        # 创建游戏实例
-        self.game = TexasHoldem()
+        # 创建游戏实例, 界面作为监听者显示牌局事件, 不在控制台打印也不写日志
+        self.game = TexasHoldem(verbose=False)
+        self.game.events.subscribe(GameViewListener(self))
         
         # 添加人类玩家
         self.human_player = Player(player_name, 1000, is_ai=False)
@@ -458,13 +791,9 @@ class PokerGUI(QMainWindow):
                 self.top_layout.addWidget(player_widget)
                 self.player_info_widgets.append(player_widget)
         
-        # 清空公共牌区域
-        self.clear_layout(self.community_cards_layout)
-        self.community_cards = []
-        
-        # 清空玩家手牌区域
-        self.clear_layout(self.player_hand_layout)
-        self.player_cards = []
+        # 清空公共牌和玩家手牌
+        for card_widget in self.community_cards + self.player_cards:
+            card_widget.set_card(None)
     
     def clear_layout(self, layout):
         if layout is not None:
@@ -476,25 +805,37 @@ class PokerGUI(QMainWindow):
                 else:
                     self.clear_layout(item.layout())
     
-    def start_new_round(self):
-        # 初始化新一轮
-        self.game.round_number += 1
-        self.game.pot = 0
-        self.game.community_cards = []
-        self.game.current_bet = 10  # 小盲注
-        
-        # 重置玩家状态
-        for player in self.game.players:
-            player.hand = []
-            player.folded = False
-            player.current_bet = 0
-            player.actions = []
-        
-        # 初始化牌组
-        self.game.init_deck()
+    def animation_delay(self):
+        """AI行动前后停顿的毫秒数"""
+        if self.fast_forward_box.isChecked() and not self.human_can_act():
+            return 0
+        return self.speed_box.currentData()
+    
+    def human_can_act(self):
+        """人类玩家在这一局里是否还需要表态"""
+        player = self.human_player
+        return player in self.game.players and not player.folded and player.chips > 0
+    
+    def schedule(self, delay, callback):
+        """延迟执行, 期间开始了新一局时不再执行"""
+        token = self.round_token
+        QTimer.singleShot(delay, lambda: token == self.round_token and callback())
+    
+    def cancel_round(self):
+        """作废正在进行的AI思考和定时器
         
-        # 发初始手牌
-        self.game.deal_initial_cards()
+        策略和发牌共用牌桌的随机数, 等正在运行的AI线程结束后才能开始下一局并重设种子,
+        否则后台线程会和发牌同时使用同一个随机数, 记录的种子也就不能复现这一局;
+        决策受时间预算限制, 等待很短。
+        """
+        self.round_token += 1
+        self.ai_pool.clear()
+        self.ai_pool.waitForDone()
+    
+    def start_new_round(self):
+        # 初始化新一轮: 重置玩家和下注状态, 洗牌并发底牌
+        self.cancel_round()
+        self.game.start_hand()
         
         # 更新界面
         self.update_game_ui()
@@ -518,58 +859,33 @@ class PokerGUI(QMainWindow):
         self.update_player_hand()
     
     def update_community_cards(self):
-        # 清空现有公共牌
-        self.clear_layout(self.community_cards_layout)
-        self.community_cards = []
-        
-        # 添加公共牌
-        for card in self.game.community_cards:
-            card_widget = CardWidget(card)
-            self.community_cards_layout.addWidget(card_widget)
-            self.community_cards.append(card_widget)
-        
-        # 如果公共牌不足5张，添加空白位置
-        for _ in range(5 - len(self.game.community_cards)):
-            empty_card = CardWidget()
-            self.community_cards_layout.addWidget(empty_card)
+        # 公共牌不足5张时后面的位置显示为空白
+        board = self.game.community_cards
+        for i, card_widget in enumerate(self.community_cards):
+            card_widget.set_card(board[i] if i < len(board) else None)
     
     def update_player_hand(self):
-        # 清空现有手牌
-        self.clear_layout(self.player_hand_layout)
-        self.player_cards = []
-        
-        # 添加玩家手牌
-        for card in self.human_player.hand:
-            card_widget = CardWidget(card)
-            self.player_hand_layout.addWidget(card_widget)
-            self.player_cards.append(card_widget)
+        hand = self.human_player.hand
+        for i, card_widget in enumerate(self.player_cards):
+            card_widget.set_card(hand[i] if i < len(hand) else None)
     
     def start_betting_round(self, round_name):
-        # 更新游戏状态
-        self.game_status.setText(f"{self.game.translate_round(round_name)}阶段")
-        
-        # 如果是翻牌、转牌或河牌阶段，发公共牌
-        if round_name == 'flop':
-            self.game.deal_community_cards(3)
-        elif round_name in ['turn', 'river']:
-            self.game.deal_community_cards(1)
-        
-        # 更新界面
-        self.update_game_ui()
+        # 发公共牌并开始这一轮的下注, 界面由监听者更新
+        self.game.begin_street(round_name)
         
         # 开始玩家行动
-        self.current_player_idx = 0
         self.handle_player_turn()
     
     def handle_player_turn(self):
+        # 本轮下注结束(所有人跟平或只剩一名玩家)时进入下一轮
+        if self.game.betting.round_over:
+            self.end_betting_round()
+            return
+        
         # 获取当前玩家
+        self.current_player_idx = self.game.betting.to_act
         player = self.game.players[self.current_player_idx]
         
-        # 如果玩家已弃牌，跳到下一个玩家
-        if player.folded:
-            self.next_player()
-            return
-        
         # 更新当前玩家高亮
         for i, widget in enumerate(self.player_info_widgets):
             if i + 1 == self.current_player_idx:  # +1是因为人类玩家不在player_info_widgets中
@@ -582,11 +898,11 @@ class PokerGUI(QMainWindow):
         if player == self.human_player:
             # 启用操作按钮
             self.call_button.setEnabled(True)
-            self.raise_button.setEnabled(True)
+            self.raise_button.setEnabled(self.game.betting.max_raise_to() > self.game.current_bet)
             self.fold_button.setEnabled(True)
             
             # 更新按钮文本
-            bet_amount = self.game.current_bet - player.current_bet
+            bet_amount = self.game.betting.to_call(self.current_player_idx)
             if bet_amount > 0:
                 self.call_button.setText(f"跟注 ${bet_amount}")
             else:
@@ -598,57 +914,56 @@ class PokerGUI(QMainWindow):
             self.fold_button.setEnabled(False)
             
             # AI玩家自动行动
-            QTimer.singleShot(1000, self.handle_ai_turn)
+            self.schedule(self.animation_delay(), self.handle_ai_turn)
     
     def handle_ai_turn(self):
+        # 在界面线程生成快照, 策略在线程池里思考
         player = self.game.players[self.current_player_idx]
         if player.is_ai:
-            action, amount = self.game.ai_decision(player)
-            
-            if action == 'fold':
-                player.folded = True
-                self.game_status.setText(f"{player.name} 弃牌")
-            elif action == 'call':
-                bet_amount = self.game.current_bet - player.current_bet
-                self.game.pot += bet_amount
-                player.chips -= bet_amount
-                player.current_bet = self.game.current_bet
-                self.game_status.setText(f"{player.name} 跟注 ${bet_amount}")
-            else:  # raise
-                bet_amount = amount - player.current_bet
-                self.game.current_bet = amount
-                self.game.pot += bet_amount
-                player.chips -= bet_amount
-                player.current_bet = amount
-                self.game_status.setText(f"{player.name} 加注到 ${amount}")
-            
-            # 更新界面
-            self.update_game_ui()
-            
-            # 延迟一下，让玩家看清AI的行动
-            QTimer.singleShot(1000, self.next_player)
+            view = self.game.view(self.current_player_idx)
+            self.ai_pool.start(AIWorker(self.ai_signals, self.round_token,
+                                        self.game.strategy_for(player), view,
+                                        self.game.decision_budget))
+    
+    def on_ai_decided(self, token, seat, action, amount, elapsed):
+        # 已经开始新一局或不再轮到这个座位时丢弃结果
+        if token != self.round_token or seat != self.game.betting.to_act:
+            return
+        player = self.game.players[seat]
+        self.game.record_latency(self.game.strategy_for(player).name, elapsed)
+        self.submit_action(player, action, amount)
+        
+        # 延迟一下，让玩家看清AI的行动
+        self.schedule(self.animation_delay(), self.next_player)
+    
+    def on_ai_failed(self, token, seat, message):
+        # 策略出错时这名AI弃牌, 牌局继续
+        if token != self.round_token or seat != self.game.betting.to_act:
+            return
+        player = self.game.players[seat]
+        QMessageBox.warning(self, "AI出错", f"{player.name} 决策失败, 按弃牌处理: {message}")
+        self.submit_action(player, 'fold')
+        self.schedule(self.animation_delay(), self.next_player)
+    
+    def submit_action(self, player, action, amount=0):
+        """把行动提交给下注状态机, 界面由监听者更新"""
+        # 禁用操作按钮
+        self.call_button.setEnabled(False)
+        self.raise_button.setEnabled(False)
+        self.fold_button.setEnabled(False)
+        
+        self.game.apply_action(action, amount)
     
     def next_player(self):
-        # 移动到下一个玩家
-        self.current_player_idx = (self.current_player_idx + 1) % len(self.game.players)
-        
-        # 检查是否所有玩家都行动过一次
-        if self.current_player_idx == 0:
-            # 检查是否所有玩家的下注都相等
-            active_players = [p for p in self.game.players if not p.folded]
-            bets_equal = all(p.current_bet == self.game.current_bet for p in active_players)
-            
-            if bets_equal:
-                # 当前下注轮结束
-                self.end_betting_round()
-            else:
-                # 继续下一个玩家行动
-                self.handle_player_turn()
-        else:
-            # 继续下一个玩家行动
-            self.handle_player_turn()
+        # 下注状态机已经移动到下一个需要表态的玩家
+        self.handle_player_turn()
     
     def end_betting_round(self):
+        # 只剩一名玩家时直接结算
+        if self.game.betting.hand_over:
+            self.showdown()
+            return
+        
         # 确定当前是哪个下注轮
         if not self.game.community_cards:
             next_round = 'flop'
@@ -668,38 +983,25 @@ class PokerGUI(QMainWindow):
         # 更新游戏状态
         self.game_status.setText("摊牌阶段")
         
-        # 确定赢家
+        # 确定赢家, 界面由监听者更新
         self.game.determine_winner()
         
-        # 更新界面
-        self.update_game_ui()
-        
-        # 显示结果
+        # 显示结果: 每个池的赢家和分得的筹码
+        lines = []
+        result = self.game.last_showdown
+        for k, pot in enumerate(result.pots):
+            names = '、'.join(self.game.players[s].name for s in pot.winners)
+            label = "底池" if len(result.pots) == 1 else ("主池" if k == 0 else f"边池 {k}")
+            if len(pot.winners) == 1:
+                lines.append(f"{label} ${pot.amount}: {names} 获胜")
+            else:
+                lines.append(f"{label} ${pot.amount}: {names} 平分")
         active_players = [p for p in self.game.players if not p.folded]
-        if len(active_players) == 1:
-            winner = active_players[0]
-            QMessageBox.information(self, "游戏结果", f"{winner.name} 获胜! 赢得 ${self.game.pot}")
-        else:
-            # 评估每个玩家的手牌
-            player_hands = []
+        if len(active_players) > 1:
             for player in active_players:
-                hand_value = self.game.evaluate_hand(player)
-                hand_type = self.game.get_hand_type_name(hand_value[0])
-                player_hands.append((player, hand_value, hand_type))
-            
-            # 找出最大的手牌
-            best_player = player_hands[0][0]
-            best_hand = player_hands[0][1]
-            best_type = player_hands[0][2]
-            
-            for player, hand, hand_type in player_hands[1:]:
-                if self.game.compare_hands(hand, best_hand) > 0:
-                    best_player = player
-                    best_hand = hand
-                    best_type = hand_type
-            
-            result_text = f"{best_player.name} 获胜! 赢得 ${self.game.pot}\n\n牌型: {best_type}"
-            QMessageBox.information(self, "游戏结果", result_text)
+                hand_type = self.game.get_hand_type_name(self.game.evaluate_hand(player)[0])
+                lines.append(f"{player.name} 的牌型: {hand_type}")
+        QMessageBox.information(self, "游戏结果", "\n".join(lines))
         
         # 询问是否继续游戏
         reply = QMessageBox.question(self, "继续游戏", "是否开始新一局游戏?", 
@@ -718,6 +1020,7 @@ class PokerGUI(QMainWindow):
                 QMessageBox.information(self, "游戏结束", "游戏结束! 玩家数量不足.")
                 if self.game.players:
                     QMessageBox.information(self, "最终赢家", f"{self.game.players[0].name} 是最后的赢家!")
+                self.cancel_round()
                 self.stacked_widget.setCurrentIndex(0)  # 返回开始界面
                 return
             
@@ -731,102 +1034,73 @@ class PokerGUI(QMainWindow):
                 result_text += f"{i+1}. {player.name}: ${player.chips} 筹码\n"
             
             QMessageBox.information(self, "游戏结束", result_text)
+            self.cancel_round()
             self.stacked_widget.setCurrentIndex(0)  # 返回开始界面
     
     def on_call(self):
-        player = self.human_player
-        bet_amount = self.game.current_bet - player.current_bet
-        
-        # 检查筹码是否足够
-        if bet_amount > player.chips:
-            QMessageBox.warning(self, "操作失败", "你的筹码不足以跟注!")
-            return
-        
-        # 执行跟注
-        self.game.pot += bet_amount
-        player.chips -= bet_amount
-        player.current_bet = self.game.current_bet
-        player.actions.append(f"跟注 ${bet_amount}")
-        
-        # 更新游戏状态
-        if bet_amount > 0:
-            self.game_status.setText(f"{player.name} 跟注 ${bet_amount}")
-        else:
-            self.game_status.setText(f"{player.name} 过牌")
-        
-        # 禁用操作按钮
-        self.call_button.setEnabled(False)
-        self.raise_button.setEnabled(False)
-        self.fold_button.setEnabled(False)
-        
-        # 更新界面
-        self.update_game_ui()
+        # 跟注或过牌, 筹码不足时全下
+        self.submit_action(self.human_player, 'call')
         
         # 进入下一个玩家
-        QTimer.singleShot(500, self.next_player)
+        self.schedule(self.animation_delay() // 2, self.next_player)
     
     def on_raise(self):
         player = self.human_player
-        min_raise = self.game.current_bet * 2
+        min_raise = self.game.betting.min_raise_to()
+        max_raise = self.game.betting.max_raise_to()
         
         # 获取加注金额
-        amount, ok = QInputDialog.getInt(self, "加注", f"请输入加注金额 (最小 ${min_raise}):", 
-                                        min_raise, min_raise, player.chips, 10)
+        amount, ok = QInputDialog.getInt(self, "加注", f"请输入加注到的金额 (${min_raise} ~ ${max_raise}):", 
+                                        min_raise, min_raise, max_raise, 10)
         if not ok:
             return
         
-        # 检查加注金额是否有效
-        if amount < min_raise:
-            QMessageBox.warning(self, "操作失败", f"加注金额必须至少为 ${min_raise}!")
-            return
-        
         # 执行加注
-        bet_amount = amount - player.current_bet
-        self.game.current_bet = amount
-        self.game.pot += bet_amount
-        player.chips -= bet_amount
-        player.current_bet = amount
-        player.actions.append(f"加注到 ${amount}")
-        
-        # 更新游戏状态
-        self.game_status.setText(f"{player.name} 加注到 ${amount}")
-        
-        # 禁用操作按钮
-        self.call_button.setEnabled(False)
-        self.raise_button.setEnabled(False)
-        self.fold_button.setEnabled(False)
-        
-        # 更新界面
-        self.update_game_ui()
+        self.submit_action(player, 'raise', amount)
         
         # 进入下一个玩家
-        QTimer.singleShot(500, self.next_player)
+        self.schedule(self.animation_delay() // 2, self.next_player)
     
     def on_fold(self):
-        player = self.human_player
-        
         # 执行弃牌
-        player.folded = True
-        player.actions.append("弃牌")
-        
-        # 更新游戏状态
-        self.game_status.setText(f"{player.name} 弃牌")
-        
-        # 禁用操作按钮
-        self.call_button.setEnabled(False)
-        self.raise_button.setEnabled(False)
-        self.fold_button.setEnabled(False)
-        
-        # 更新界面
-        self.update_game_ui()
+        self.submit_action(self.human_player, 'fold')
         
         # 进入下一个玩家
-        QTimer.singleShot(500, self.next_player)
+        self.schedule(self.animation_delay() // 2, self.next_player)
+
+    def choose_replay(self):
+        path, _ = QFileDialog.getOpenFileName(self, "打开牌局记录", "",
+                                              "牌局记录 (*.jsonl *.txt);;所有文件 (*)")
+        if path:
+            self.open_replay(path)
+    
+    def open_replay(self, path):
+        try:
+            self.replay_widget.open(path)
+        except (OSError, ValueError) as e:
+            QMessageBox.warning(self, "无法回放", f"{path}: {e}")
+            return
+        self.stacked_widget.setCurrentIndex(2)
+    
+    def close_replay(self):
+        self.replay_widget.close_index()
+        self.stacked_widget.setCurrentIndex(0)  # 返回开始界面
+    
+    def closeEvent(self, event):
+        # 关闭窗口时作废未完成的AI思考, 等正在运行的线程结束
+        self.cancel_round()
+        self.replay_widget.close_index()
+        super().closeEvent(event)
 
 # 主函数
 def main():
-    app = QApplication(sys.argv)
+    parser = argparse.ArgumentParser(description="德州扑克图形界面")
+    parser.add_argument('--replay', metavar='FILE', help="直接打开牌局记录(.jsonl 或 log_*.txt)回放")
+    args, qt_args = parser.parse_known_args()
+    app = QApplication(sys.argv[:1] + qt_args)
     window = PokerGUI()
+    if args.replay:
+        window.open_replay(args.replay)
     window.show()
     sys.exit(app.exec_())
 
@@ -0,0 +1,136 @@
+"""翻牌前169类起手牌的胜率表
+
+起手牌按点数和是否同花归成169类(13个对子, 78个同花, 78个不同花),
+对每一类预先计算全下时对 1~9 个随机对手的胜率, 写入一个紧凑的二进制文件。
+AI 启动时用 mmap 映射这个文件, 翻牌前决策只需一次查表。
+
+文件格式(小端):
+    4字节 b'PFEQ' | uint16 版本 | uint16 类别数(169) | uint16 最大对手数(9) | uint16 保留
+    之后是 169 * 9 个 uint16, 第 c 类对 n 个对手的胜率 = 值 / 65535, 位于 c * 9 + (n - 1)
+
+生成胜率表:
+    python preflop.py --iterations 20000 --seed 1
+"""
+import argparse
+import mmap
+import os
+import random
+import struct
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import List, Optional
+
+from evaluator import RANKS
+from equity import equity
+
+MAGIC = b'PFEQ'
+VERSION = 1
+HEADER = struct.Struct('<4sHHHH')
+VALUE = struct.Struct('<H')
+NUM_CLASSES = 169
+MAX_OPPONENTS = 9
+SCALE = 65535
+
+DEFAULT_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'preflop_equity.bin')
+
+
+def hand_class(card1: int, card2: int) -> int:
+    """起手牌(两个牌编号)所属的类别 0..168
+
+    类别是13x13矩阵的下标: 行为大点数, 列为小点数时表示同花, 反过来表示不同花, 对角线为对子
+    """
+    r1, r2 = card1 >> 2, card2 >> 2
+    high, low = max(r1, r2), min(r1, r2)
+    if (card1 & 3) == (card2 & 3):
+        return high * 13 + low
+    return low * 13 + high
+
+
+def class_name(hand: int) -> str:
+    """类别的常用写法, 如 'AA', 'AKs', 'T9o'"""
+    row, col = divmod(hand, 13)
+    names = [r if r != '10' else 'T' for r in RANKS]
+    if row == col:
+        return names[row] * 2
+    if row > col:
+        return f"{names[row]}{names[col]}s"
+    return f"{names[col]}{names[row]}o"
+
+
+def class_cards(hand: int) -> List[int]:
+    """类别的一个代表起手牌(两个牌编号)"""
+    row, col = divmod(hand, 13)
+    if row == col:
+        return [row * 4, row * 4 + 1]
+    if row > col:
+        return [row * 4, col * 4]
+    return [col * 4, row * 4 + 1]
+
+
+class PreflopTable:
+    """通过 mmap 只读映射的胜率表"""
+
+    def __init__(self, path: str = DEFAULT_PATH):
+        with open(path, 'rb') as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, classes, max_opponents, _ = HEADER.unpack_from(self._mmap, 0)
+        if magic != MAGIC or version != VERSION or classes != NUM_CLASSES:
+            self._mmap.close()
+            raise ValueError(f"无效的翻牌前胜率表: {path}")
+        if len(self._mmap) < HEADER.size + NUM_CLASSES * max_opponents * VALUE.size:
+            self._mmap.close()
+            raise ValueError(f"翻牌前胜率表不完整: {path}")
+        self.max_opponents = max_opponents
+
+    def equity(self, card1: int, card2: int, n_opponents: int = 1) -> float:
+        """起手牌对 n_opponents 个随机对手的全下胜率"""
+        n = min(max(n_opponents, 1), self.max_opponents)
+        index = hand_class(card1, card2) * self.max_opponents + n - 1
+        # 文件固定为小端, 不能按本机字节序直接把映射转换成 uint16 数组
+        return VALUE.unpack_from(self._mmap, HEADER.size + index * VALUE.size)[0] / SCALE
+
+    def close(self):
+        self._mmap.close()
+
+
+def load_table(path: str = DEFAULT_PATH) -> Optional[PreflopTable]:
+    """加载胜率表, 文件不存在时返回 None"""
+    if not os.path.exists(path):
+        return None
+    return PreflopTable(path)
+
+
+def _class_equities(hand: int, iterations: int, seed: int) -> List[int]:
+    """计算一个类别对 1~9 个对手的胜率(已按 SCALE 取整)"""
+    rng = random.Random(seed * NUM_CLASSES + hand)
+    return [round(equity(class_cards(hand), [], n, iterations, rng=rng).equity * SCALE)
+            for n in range(1, MAX_OPPONENTS + 1)]
+
+
+def generate(path: str = DEFAULT_PATH, iterations: int = 20000, seed: int = 1,
+             workers: Optional[int] = None):
+    """用蒙特卡洛模拟计算全部169类起手牌的胜率并写入文件"""
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        n = NUM_CLASSES
+        rows = list(pool.map(_class_equities, range(n), [iterations] * n, [seed] * n))
+    with open(path, 'wb') as f:
+        f.write(HEADER.pack(MAGIC, VERSION, NUM_CLASSES, MAX_OPPONENTS, 0))
+        for row in rows:
+            f.write(struct.pack(f'<{MAX_OPPONENTS}H', *row))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="生成翻牌前169类起手牌胜率表")
+    parser.add_argument('--output', default=DEFAULT_PATH, help="输出文件路径")
+    parser.add_argument('--iterations', type=int, default=20000, help="每个类别每种对手数的模拟次数")
+    parser.add_argument('--seed', type=int, default=1, help="随机种子")
+    parser.add_argument('--workers', type=int, default=None, help="进程数, 默认CPU核数")
+    args = parser.parse_args()
+
+    start = time.time()
+    generate(args.output, args.iterations, args.seed, args.workers)
+    print(f"胜率表已保存到: {args.output} (用时 {time.time() - start:.1f} 秒)")
+
+
+if __name__ == "__main__":
+    main()
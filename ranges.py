@@ -0,0 +1,292 @@
+"""对手范围: 1326种具体起手牌的权重
+
+Range 用长度为 1326 的 numpy 数组保存每种具体起手牌(两个牌编号, 小的在前)的权重,
+可以从常用的范围写法解析:
+
+    Range.parse("TT+,AKs,KQo")       # TT~AA, 同花AK, 不同花KQ
+    Range.parse("A2s+,KTs-K7s,AsKh")  # 同花A2~AK, 同花KT~K7, 具体的一手牌
+    Range.parse("22+:0.5,AK")         # 冒号后为权重
+
+from_actions() 根据玩家本局记录的行动收窄范围: 每次加注/跟注后按牌力在当前范围内的
+百分位调整权重。simulate() 对多个对手范围批量抽样, 抽样时考虑己方底牌、公共牌和
+对手之间互相占用的牌(阻断效应), equity.equity(..., ranges=[...]) 使用它计算胜率。
+需要安装 numpy。
+"""
+import re
+from itertools import combinations
+from typing import Dict, Optional, Sequence, Tuple
+
+import numpy as np
+
+from batch_equity import evaluate_batch, random_runouts
+from preflop import PreflopTable, class_cards, class_name, hand_class
+
+NUM_COMBOS = 1326
+
+# 所有具体起手牌, 按 (小编号, 大编号) 排列
+COMBOS = np.array(list(combinations(range(52), 2)), dtype=np.int8)
+# 两张牌 -> 起手牌序号, 两个方向都可以查
+COMBO_INDEX = np.full((52, 52), -1, dtype=np.int16)
+COMBO_INDEX[COMBOS[:, 0], COMBOS[:, 1]] = np.arange(NUM_COMBOS)
+COMBO_INDEX[COMBOS[:, 1], COMBOS[:, 0]] = np.arange(NUM_COMBOS)
+# 每种具体起手牌所属的169类
+COMBO_CLASS = np.array([hand_class(int(a), int(b)) for a, b in COMBOS], dtype=np.int16)
+CLASS_SIZE = np.bincount(COMBO_CLASS, minlength=169)
+# 每张牌 -> 包含这张牌的51个起手牌序号
+CARD_COMBOS = np.array([np.flatnonzero((COMBOS == c).any(axis=1)) for c in range(52)])
+
+RANK_CHARS = '23456789TJQKA'
+SUIT_CHARS = 'shcd'  # 与 evaluator.SUITS 的 ♠♥♣♦ 顺序一致
+
+_TOKEN = re.compile(r'([2-9TJQKA])([2-9TJQKA])([so]?)(\+?)(?:-([2-9TJQKA])([2-9TJQKA])([so]?))?$')
+_COMBO = re.compile(r'([2-9TJQKA])([shcd])([2-9TJQKA])([shcd])$')
+
+# 行动 -> (翻牌前, 翻牌后)保留范围中牌力最强的比例
+NARROW = {
+    'raise': (0.25, 0.4),
+    'call': (0.6, 0.75),
+}
+# 收窄时的过渡宽度和最低保留权重(给诈唬和慢打留下余地)
+NARROW_SOFTNESS = 0.05
+NARROW_FLOOR = 0.02
+
+# 下注轮 -> 这一轮可见的公共牌数
+STREET_CARDS = {'preflop': 0, 'flop': 3, 'turn': 4, 'river': 5}
+
+# 对手底牌冲突时整行重抽的最多轮数, 超过时认为这些范围无法同时发出
+MAX_REDRAWS = 1000
+
+
+def _class_rows(high: int, low: int, kind: str) -> list:
+    """点数 high >= low 对应的169类, kind 为 's'/'o'/'' (两者都要)"""
+    if high == low:
+        return [high * 13 + high]
+    rows = []
+    if kind in ('s', ''):
+        rows.append(high * 13 + low)
+    if kind in ('o', ''):
+        rows.append(low * 13 + high)
+    return rows
+
+
+def _parse_token(token: str) -> np.ndarray:
+    """解析一个范围片段, 返回 1326 个布尔值"""
+    mask = np.zeros(NUM_COMBOS, dtype=bool)
+    m = _COMBO.match(token)
+    if m:
+        r1, s1, r2, s2 = m.groups()
+        a = RANK_CHARS.index(r1) * 4 + SUIT_CHARS.index(s1)
+        b = RANK_CHARS.index(r2) * 4 + SUIT_CHARS.index(s2)
+        if a == b:
+            raise ValueError(f"无法解析的范围: {token}")
+        mask[COMBO_INDEX[a, b]] = True
+        return mask
+    m = _TOKEN.match(token)
+    if not m:
+        raise ValueError(f"无法解析的范围: {token}")
+    r1, r2, kind, plus, e1, e2, end_kind = m.groups()
+    high, low = sorted((RANK_CHARS.index(r1), RANK_CHARS.index(r2)), reverse=True)
+    if high == low and kind:
+        raise ValueError(f"无法解析的范围: {token}")
+    classes = []
+    if e1 is not None:
+        # 区间写法: 对子 TT-77 或同一张大牌的 KTs-K7s
+        end_high, end_low = sorted((RANK_CHARS.index(e1), RANK_CHARS.index(e2)), reverse=True)
+        if high == low:
+            if end_high != end_low:
+                raise ValueError(f"无法解析的范围: {token}")
+            for r in range(min(low, end_low), max(low, end_low) + 1):
+                classes += _class_rows(r, r, '')
+        else:
+            if end_high != high or (end_kind or kind) != kind:
+                raise ValueError(f"无法解析的范围: {token}")
+            for r in range(min(low, end_low), max(low, end_low) + 1):
+                classes += _class_rows(high, r, kind)
+    elif plus:
+        if high == low:
+            for r in range(low, 13):
+                classes += _class_rows(r, r, '')
+        else:
+            # A9s+ 表示小牌从 9 升到比大牌小一级
+            for r in range(low, high):
+                classes += _class_rows(high, r, kind)
+    else:
+        classes = _class_rows(high, low, kind)
+    mask[np.isin(COMBO_CLASS, classes)] = True
+    return mask
+
+
+def blocked(dead: Sequence[int]) -> np.ndarray:
+    """与已知牌 dead 有重叠的起手牌"""
+    dead_mask = np.zeros(52, dtype=bool)
+    dead_mask[list(dead)] = True
+    return dead_mask[COMBOS[:, 0]] | dead_mask[COMBOS[:, 1]]
+
+
+class Range:
+    """一个对手可能持有的起手牌及其权重"""
+    __slots__ = ('weights',)
+
+    def __init__(self, weights: Optional[np.ndarray] = None):
+        if weights is None:
+            weights = np.ones(NUM_COMBOS)
+        self.weights = np.asarray(weights, dtype=np.float64)
+
+    @classmethod
+    def parse(cls, text: str) -> 'Range':
+        """解析逗号分隔的范围写法, '*' 表示所有起手牌; 重复出现时取最大权重"""
+        weights = np.zeros(NUM_COMBOS)
+        for token in text.replace(' ', '').split(','):
+            if not token:
+                continue
+            token, _, weight = token.partition(':')
+            w = float(weight) if weight else 1.0
+            mask = np.ones(NUM_COMBOS, dtype=bool) if token == '*' else _parse_token(token)
+            weights[mask] = np.maximum(weights[mask], w)
+        return cls(weights)
+
+    def copy(self) -> 'Range':
+        return Range(self.weights.copy())
+
+    def available(self, dead: Sequence[int] = ()) -> np.ndarray:
+        """去掉与已知牌冲突的起手牌之后的权重"""
+        if not len(dead):
+            return self.weights
+        return np.where(blocked(dead), 0.0, self.weights)
+
+    def combos(self, dead: Sequence[int] = ()) -> float:
+        """范围内(加权的)起手牌数量"""
+        return float(self.available(dead).sum())
+
+    def class_weights(self) -> np.ndarray:
+        """169类起手牌各自的平均权重"""
+        return np.bincount(COMBO_CLASS, self.weights, minlength=169) / CLASS_SIZE
+
+    def narrow(self, strength: np.ndarray, keep: float, dead: Sequence[int] = ()) -> 'Range':
+        """保留当前范围中牌力最强的约 keep 比例, 其余权重平滑地降低, 原地修改并返回自身
+
+        strength 为每种起手牌的牌力(可比较大小), 百分位按当前范围的权重计算
+        """
+        score = percentiles(strength, self.available(dead))
+        factor = 1.0 / (1.0 + np.exp(-(score - (1.0 - keep)) / NARROW_SOFTNESS))
+        self.weights *= NARROW_FLOOR + (1.0 - NARROW_FLOOR) * factor
+        return self
+
+    def sample(self, n: int, rng: Optional[np.random.Generator] = None,
+               dead: Sequence[int] = ()) -> np.ndarray:
+        """按权重抽取 n 个起手牌序号, 不会抽到与 dead 冲突的牌"""
+        rng = rng or np.random.default_rng()
+        cdf = np.cumsum(self.available(dead))
+        if cdf[-1] <= 0:
+            raise ValueError("去掉已知牌后范围为空")
+        index = np.searchsorted(cdf, rng.random(n) * cdf[-1], side='right')
+        return np.minimum(index, NUM_COMBOS - 1)
+
+    def __str__(self) -> str:
+        parts = []
+        weights = self.class_weights()
+        for hand in np.flatnonzero(weights > 0)[::-1]:
+            w = weights[hand]
+            parts.append(class_name(hand) if w >= 1.0 else f"{class_name(hand)}:{w:.2f}")
+        return ','.join(parts)
+
+
+def percentiles(strength: np.ndarray, weights: np.ndarray) -> np.ndarray:
+    """每种起手牌的牌力在加权范围中的百分位(不超过它的权重占比), 同样牌力的百分位相同"""
+    order = np.argsort(strength, kind='stable')
+    cumulative = np.cumsum(weights[order])
+    total = cumulative[-1]
+    if total <= 0:
+        return np.zeros(len(strength))
+    position = np.searchsorted(strength[order], strength, side='right') - 1
+    return cumulative[position] / total
+
+
+def combo_strengths(board: Sequence[int], table: Optional[PreflopTable] = None) -> np.ndarray:
+    """每种起手牌在公共牌 board 下的牌力, 与公共牌冲突的为 -1
+
+    翻牌前使用胜率表中对一个对手的胜率, 没有胜率表时按两张牌的牌型比较
+    """
+    if not len(board):
+        if table is not None:
+            class_equity = np.array([table.equity(*class_cards(c)) for c in range(169)])
+            return class_equity[COMBO_CLASS]
+        return evaluate_batch(COMBOS).astype(np.float64)
+    live = np.flatnonzero(~blocked(board))
+    cards = np.hstack([COMBOS[live], np.broadcast_to(np.array(board, dtype=np.int8), (live.size, len(board)))])
+    strength = np.full(NUM_COMBOS, -1.0)
+    strength[live] = evaluate_batch(cards)
+    return strength
+
+
+def from_actions(actions: Sequence[tuple], board: Sequence[int] = (),
+                 table: Optional[PreflopTable] = None, start: Optional[Range] = None) -> Range:
+    """按玩家本局的行动 (下注轮, 行动, 投入筹码, 本轮下注额) 收窄范围
+
+    board 为目前的公共牌, 每个行动只使用当时可见的公共牌; start 为初始范围, 默认所有起手牌
+    """
+    result = start.copy() if start is not None else Range()
+    strengths: Dict[int, np.ndarray] = {}
+    for street, action, _, _ in actions:
+        keep = NARROW.get(action)
+        visible = STREET_CARDS.get(street, 0)
+        if keep is None or visible > len(board):
+            continue
+        if visible not in strengths:
+            strengths[visible] = combo_strengths(board[:visible], table)
+        result.narrow(strengths[visible], keep[0] if visible == 0 else keep[1], board[:visible])
+    return result
+
+
+def sample_opponents(ranges: Sequence[Range], dead: Sequence[int], n: int,
+                     rng: np.random.Generator) -> np.ndarray:
+    """为 n 次模拟从每个对手的范围中抽取底牌, 返回 (n, 2 * 对手数) 的牌编号
+
+    先各自独立抽样, 再把对手之间有重复牌的行整行重抽, 得到的就是考虑阻断后的联合分布;
+    重抽 MAX_REDRAWS 轮后仍有冲突时抛出 ValueError (例如两个对手的范围都只有 AsAh)
+    """
+    m = len(ranges)
+    out = np.empty((n, 2 * m), dtype=np.int8)
+    rows = np.arange(n)
+    for _ in range(MAX_REDRAWS):
+        for j, r in enumerate(ranges):
+            out[rows, 2 * j:2 * j + 2] = COMBOS[r.sample(rows.size, rng, dead)]
+        if m < 2:
+            break
+        sub = np.sort(out[rows], axis=1)
+        clash = (sub[:, 1:] == sub[:, :-1]).any(axis=1)
+        rows = rows[clash]
+        if not rows.size:
+            break
+    else:
+        raise ValueError("对手的范围之间冲突, 无法同时发出所有对手的底牌")
+    return out
+
+
+def simulate(hole: Sequence[int], board: Sequence[int], ranges: Sequence[Range], n: int,
+             rng: Optional[np.random.Generator] = None) -> Tuple[int, int, float]:
+    """对手底牌从各自的范围中抽取, 批量模拟 n 次, 返回 (独赢次数, 平局次数, 累计分得的底池比例)"""
+    rng = rng or np.random.default_rng()
+    dead = list(hole) + list(board)
+    board_needed = 5 - len(board)
+    opponents = sample_opponents(ranges, dead, n, rng)
+
+    # 剩余公共牌在已知牌之外均匀抽取, 与对手底牌冲突的行重新抽
+    runouts = random_runouts(dead, n, board_needed, rng)
+    rows = np.arange(n)
+    while board_needed:
+        clash = (runouts[rows, :, None] == opponents[rows, None, :]).any(axis=(1, 2))
+        rows = rows[clash]
+        if not rows.size:
+            break
+        runouts[rows] = random_runouts(dead, rows.size, board_needed, rng)
+
+    boards = np.hstack([np.broadcast_to(np.array(board, dtype=np.int8), (n, len(board))), runouts])
+    hero = evaluate_batch(np.hstack([np.broadcast_to(np.array(hole, dtype=np.int8), (n, 2)), boards]))
+    strengths = np.stack([evaluate_batch(np.hstack([opponents[:, i:i + 2], boards]))
+                          for i in range(0, opponents.shape[1], 2)], axis=1)
+    best = strengths.max(axis=1)
+    tied = (strengths == best[:, None]).sum(axis=1)
+    won = hero > best
+    tie = hero == best
+    return int(won.sum()), int(tie.sum()), float(won.sum() + (1.0 / (tied[tie] + 1)).sum())
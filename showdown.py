@@ -0,0 +1,77 @@
+"""摊牌结算: 主池/边池划分和奖金分配
+
+根据每个座位本局投入的总筹码划分主池和边池, 每个池在有资格的玩家中
+按整数牌型强度决出赢家; 平分时除不尽的筹码从庄家左手边开始依次每人一个。
+玩家只按强度排序一次(O(n log n)), 每个池的大小用前缀和二分查找求出;
+每个池还要列出有资格的玩家, 这一步是 O(n), 整体为 O(n log n + n·池数)。
+池数不超过没有弃牌的玩家数, 一桌最多十人, 实际开销很小。
+"""
+from bisect import bisect_right
+from itertools import accumulate
+from typing import Dict, List, NamedTuple, Optional, Sequence
+
+
+class Pot(NamedTuple):
+    amount: int             # 池中的筹码
+    eligible: List[int]     # 有资格赢得这个池的座位
+    winners: List[int]      # 赢得这个池的座位
+    shares: Dict[int, int]  # 座位 -> 分得的筹码
+
+
+class ShowdownResult(NamedTuple):
+    pots: List[Pot]             # 第一个是主池, 之后是边池
+    payouts: Dict[int, int]     # 座位 -> 本局一共赢得的筹码
+
+    @property
+    def winners(self) -> List[int]:
+        """赢得至少一个池的座位, 按座位顺序"""
+        return sorted({seat for pot in self.pots for seat in pot.winners})
+
+
+def resolve(contributions: Sequence[int], strengths: Sequence[Optional[int]],
+            odd_chip_order: Optional[Sequence[int]] = None) -> ShowdownResult:
+    """结算摊牌
+
+    contributions: 每个座位本局投入的总筹码
+    strengths: 每个座位的牌型强度, 已弃牌的座位为 None (筹码留在池中但不能赢)
+    odd_chip_order: 分配零头筹码的座位顺序(通常从庄家左手边开始), 默认按座位顺序
+    """
+    seats = range(len(contributions))
+    if odd_chip_order is None:
+        odd_chip_order = list(seats)
+    odd_rank = {seat: i for i, seat in enumerate(odd_chip_order)}
+
+    # 所有投入额排序并计算前缀和, 用来在 O(log n) 内求出每一层池的大小
+    sorted_contrib = sorted(contributions)
+    prefix = [0] + list(accumulate(sorted_contrib))
+
+    def collected(level: int) -> int:
+        """所有玩家投入中不超过 level 的部分之和"""
+        i = bisect_right(sorted_contrib, level)
+        return prefix[i] + level * (len(sorted_contrib) - i)
+
+    live = [s for s in seats if strengths[s] is not None]
+    # 仍在牌局中的玩家按强度从大到小排序一次
+    ranked = sorted(live, key=lambda s: strengths[s], reverse=True)
+    # 没有人下注时也结算一个空池, 让唯一剩下的玩家(或牌最大的玩家)成为赢家
+    levels = sorted(set(contributions[s] for s in live if contributions[s] > 0)) or [0]
+
+    pots = []
+    payouts = {s: 0 for s in live}
+    previous = 0
+    for k, level in enumerate(levels):
+        # 最高一层还要收下弃牌玩家超出这一层的投入
+        amount = (sum(contributions) if k == len(levels) - 1 else collected(level)) - collected(previous)
+        previous = level
+        if amount <= 0 and pots:
+            continue
+        eligible = [s for s in ranked if contributions[s] >= level]
+        best = strengths[eligible[0]]
+        winners = [s for s in eligible if strengths[s] == best]
+        winners.sort(key=lambda s: odd_rank.get(s, len(odd_rank) + s))
+        share, remainder = divmod(amount, len(winners))
+        shares = {s: share + (1 if i < remainder else 0) for i, s in enumerate(winners)}
+        for s, chips in shares.items():
+            payouts[s] += chips
+        pots.append(Pot(amount, sorted(eligible), sorted(winners), shares))
+    return ShowdownResult(pots, payouts)
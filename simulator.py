@@ -0,0 +1,120 @@
+"""无界面的批量模拟
+
+只有AI玩家的牌桌连续进行多局游戏, 不调用 input() 也不打印过程,
+最后汇总每个玩家的筹码输赢、每秒模拟的局数和每种策略的决策耗时分位数。
+
+    python main.py --simulate 100000 --players 6 --seed 42
+"""
+import os
+import time
+from typing import Dict, List, NamedTuple, Optional, Sequence
+
+from history import HandHistoryWriter
+from main import Player, TexasHoldem
+from strategy import (DEFAULT_BUDGET, CFRStrategy, EquityStrategy, HandRankStrategy,
+                      LatencyStats, RandomStrategy, RangeStrategy, RobotStrategy, cfr, ranges)
+from table_rng import TableRNG
+
+
+# 可以在模拟中使用的AI策略, 名称 -> 创建策略对象的类
+STRATEGIES = {
+    'equity': EquityStrategy,
+    'random': RandomStrategy,
+    'rules': HandRankStrategy,
+    'robot': RobotStrategy,
+}
+if ranges is not None:
+    STRATEGIES['range'] = RangeStrategy
+    if os.path.exists(cfr.DEFAULT_PATH):
+        # 仓库里没有训练好的策略文件, 先用 cfr.py 训练后才能选择
+        STRATEGIES['cfr'] = CFRStrategy
+
+
+def check_strategies(strategies: Sequence[str]):
+    """检查策略名称都可以使用, 否则抛出 ValueError"""
+    for name in strategies:
+        if name == 'cfr' and name not in STRATEGIES:
+            raise ValueError("cfr 策略需要训练好的策略文件, 请先运行 python cfr.py"
+                             if ranges is not None else "cfr 策略需要安装 numpy")
+        if name not in STRATEGIES:
+            raise ValueError(f"未知的策略: {name}, 可选: {', '.join(STRATEGIES)}")
+    if 'cfr' in strategies:
+        # 策略文件可能是旧版本或已损坏, 先试着加载一次
+        try:
+            cfr.CFRPolicy(cfr.DEFAULT_PATH)
+        except (OSError, ValueError, KeyError) as e:
+            raise ValueError(f"无法加载 cfr 策略: {e}")
+
+
+class PlayerResult(NamedTuple):
+    name: str
+    strategy: str  # 使用的AI策略名称
+    net: int       # 净输赢筹码(已扣除补码)
+    rebuys: int    # 筹码输光后补码的次数
+
+
+class SimulationResult(NamedTuple):
+    hands: int
+    seconds: float
+    players: List[PlayerResult]
+    latency: Optional[Dict[str, LatencyStats]] = None  # 策略名称 -> 决策耗时统计
+
+    @property
+    def hands_per_second(self) -> float:
+        return self.hands / self.seconds if self.seconds > 0 else 0.0
+
+
+def run_simulation(hands: int, num_players: int = 6, seed: Optional[int] = None,
+                   chips: int = 1000, strategies: Sequence[str] = ('equity',),
+                   history: Optional[HandHistoryWriter] = None,
+                   decision_budget: float = DEFAULT_BUDGET) -> SimulationResult:
+    """让 num_players 个AI玩家连续进行 hands 局游戏
+
+    玩家筹码输光时自动补回 chips, 净输赢中扣除补码, 这样牌桌人数保持不变。
+    strategies 按座位依次循环分配给各个玩家; 传入 history 时写出结构化牌局记录。
+    seed 为牌桌种子, 发牌和所有策略的随机选择都来自这张牌桌的 TableRNG。
+    decision_budget 为每次决策的时间预算(秒), 预算生效时结果不再能由种子完全复现。
+    """
+    if num_players < 2 or num_players > 10:
+        raise ValueError("游戏需要2~10名玩家")
+
+    check_strategies(strategies)
+    game = TexasHoldem(verbose=False, history=history, decision_budget=decision_budget,
+                       rng=TableRNG(seed))
+    game.players = [Player(f"AI-{i+1}", chips, is_ai=True) for i in range(num_players)]
+    seat_strategies = [strategies[i % len(strategies)] for i in range(num_players)]
+    for player, name in zip(game.players, seat_strategies):
+        player.strategy = STRATEGIES[name](rng=game.rng.random)
+    rebuys = [0] * num_players
+
+    start = time.perf_counter()
+    for _ in range(hands):
+        for i, player in enumerate(game.players):
+            if player.chips <= 0:
+                player.chips += chips
+                rebuys[i] += 1
+        game.play_round()
+        game.determine_winner()
+    seconds = time.perf_counter() - start
+
+    results = [PlayerResult(p.name, seat_strategies[i], p.chips - chips * (1 + rebuys[i]), rebuys[i])
+               for i, p in enumerate(game.players)]
+    return SimulationResult(hands, seconds, results, dict(game.latency))
+
+
+def format_summary(result: SimulationResult) -> str:
+    """生成模拟结果的文字总结"""
+    lines = [f"模拟完成: {result.hands} 局, 用时 {result.seconds:.1f} 秒, "
+             f"每秒 {result.hands_per_second:.1f} 局"]
+    for p in sorted(result.players, key=lambda p: p.net, reverse=True):
+        per_hand = p.net / result.hands if result.hands else 0.0
+        lines.append(f"{p.name} [{p.strategy}]: 净输赢 {p.net:+d} 筹码 | 每局 {per_hand:+.2f} | 补码 {p.rebuys} 次")
+    lines.extend(format_latency(result.latency))
+    return "\n".join(lines)
+
+
+def format_latency(latency: Optional[Dict[str, LatencyStats]]) -> List[str]:
+    """每种策略决策耗时的分位数"""
+    if not latency:
+        return []
+    return ["\n决策耗时:"] + [f"{name}: {latency[name].format()}" for name in sorted(latency)]
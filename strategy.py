@@ -0,0 +1,340 @@
+"""可插拔的AI策略
+
+引擎在每次AI决策时生成一个不可变的 GameView 快照, 交给策略对象的 decide(view, budget),
+策略返回 (行动, 加注到的下注额)。budget 是这次决策的时间预算(秒), 需要模拟或搜索的策略
+应在预算用完时返回目前为止最好的结果, 而不是继续计算:
+
+    view = game.view(seat)
+    action, amount = strategy.decide(view, budget=0.05)
+
+策略只能通过快照了解牌局, 不能修改引擎状态。需要随机数的策略从构造时传入的 rng
+(通常是牌桌 TableRNG 的 random, 每局按记录的种子重置)取随机数, 这样每局的决策可以复现。
+引擎按策略名称记录每次决策的耗时,
+用 LatencyStats 统计分位数。注意时间预算生效(提前停止模拟)时结果与机器速度有关,
+需要完全复现的模拟应使用足够大的预算。
+"""
+import math
+import random
+import time
+from typing import Dict, NamedTuple, Optional, Protocol, Sequence, Tuple
+
+import evaluator
+from equity import equity
+from preflop import PreflopTable, load_table
+
+try:
+    import cfr
+    import ranges
+except ImportError:  # 没有安装 numpy 时不能使用按范围计算胜率和 CFR 策略
+    cfr = ranges = None
+
+# 默认每次决策的时间预算(秒)
+DEFAULT_BUDGET = 0.05
+
+# 胜率策略每次决策模拟的最大次数和目标置信区间半宽
+AI_EQUITY_ITERATIONS = 500
+AI_EQUITY_CI = 0.03
+
+
+class GameView(NamedTuple):
+    """轮到某个座位行动时的牌局快照, 牌都用牌编号表示"""
+    seat: int                  # 行动的座位
+    street: str                # preflop/flop/turn/river
+    hole: Tuple[int, ...]      # 自己的底牌
+    board: Tuple[int, ...]     # 公共牌
+    pot: int                   # 底池(包括本轮下注)
+    current_bet: int           # 本轮需要跟到的下注额
+    to_call: int               # 跟注还需要投入的筹码
+    min_raise_to: int          # 最少要加注到的下注额
+    max_raise_to: int          # 最多能加注到的下注额(全下)
+    stack: int                 # 自己剩余的筹码
+    bet: int                   # 自己本轮已下注
+    n_opponents: int           # 没有弃牌的对手数
+    big_blind: int
+    dealer: int = -1           # 庄家座位
+    stacks: Tuple[int, ...] = ()    # 每个座位剩余的筹码
+    folded: Tuple[bool, ...] = ()   # 每个座位是否已弃牌
+    actions: Tuple[tuple, ...] = ()  # 每个座位本局的行动 (下注轮, 行动, 投入筹码, 本轮下注额)
+
+
+def snapshot(betting, seat: int, hole: Sequence[int], board: Sequence[int], street: str,
+             dealer: int = -1, actions: Sequence[Sequence[tuple]] = ()) -> GameView:
+    """由下注状态机 betting.BettingRound 生成座位 seat 的快照"""
+    n = betting.n
+    stack = betting.stack[seat]
+    bet = betting.bet[seat]
+    max_raise_to = bet + stack
+    min_raise_to = min(betting.current_bet + betting.min_raise, max_raise_to)
+    if betting.capped[seat]:
+        # 面对不足额的全下只能跟注或弃牌
+        max_raise_to = min_raise_to = min(betting.current_bet, max_raise_to)
+    return GameView(
+        seat, street, tuple(hole), tuple(board), betting.pot, betting.current_bet,
+        betting.to_call(seat), min_raise_to, max_raise_to,
+        stack, bet, betting.live - 1, betting.big_blind, dealer,
+        tuple(betting.stack[:n]), tuple(betting.folded[:n]),
+        tuple(tuple(a) for a in actions))
+
+
+class Strategy(Protocol):
+    """AI策略: 根据快照在 budget 秒内返回 (行动, 金额)
+
+    行动为 fold/check/call/raise, raise 的金额是本轮要加注到的下注额
+    """
+    name: str
+
+    def decide(self, view: GameView, budget: float = DEFAULT_BUDGET) -> Tuple[str, int]:
+        ...
+
+
+_default_preflop: Optional[PreflopTable] = None
+_preflop_loaded = False
+
+
+def default_preflop_table() -> Optional[PreflopTable]:
+    """进程内共享的翻牌前胜率表, 第一次使用时加载"""
+    global _default_preflop, _preflop_loaded
+    if not _preflop_loaded:
+        _default_preflop = load_table()
+        _preflop_loaded = True
+    return _default_preflop
+
+
+class EquityStrategy:
+    """胜率策略: 估计对剩余对手的胜率, 再与底池赔率比较
+
+    翻牌前查胜率表, 翻牌后用蒙特卡洛模拟; 模拟在时间预算用完时停止并使用已有的估计。
+    """
+    name = 'equity'
+
+    def __init__(self, iterations: int = AI_EQUITY_ITERATIONS, ci: Optional[float] = AI_EQUITY_CI,
+                 preflop_table: Optional[PreflopTable] = None, rng: Optional[random.Random] = None):
+        self.iterations = iterations
+        self.ci = ci
+        self.preflop_table = preflop_table if preflop_table is not None else default_preflop_table()
+        self.rng = rng or random  # 默认使用 random 模块
+
+    def hand_equity(self, view: GameView, deadline: Optional[float] = None) -> float:
+        opponents = max(view.n_opponents, 1)
+        if not view.board and self.preflop_table is not None:
+            # 翻牌前直接查预先计算的起手牌胜率表
+            return self.preflop_table.equity(view.hole[0], view.hole[1], opponents)
+        return equity(view.hole, view.board, opponents, iterations=self.iterations,
+                      ci=self.ci, rng=self.rng, deadline=deadline).equity
+
+    def decide(self, view: GameView, budget: float = DEFAULT_BUDGET) -> Tuple[str, int]:
+        hand_strength = self.hand_equity(view, time.perf_counter() + budget)
+        call_amount = view.current_bet - view.bet
+        pot_odds = call_amount / (view.pot + call_amount) if call_amount > 0 else 0.0
+        if hand_strength > min(0.85, 1.5 / (view.n_opponents + 1)):
+            return 'raise', view.current_bet * 2
+        elif hand_strength >= pot_odds:
+            return 'call', view.current_bet
+        else:
+            return 'fold', 0
+
+
+class RangeStrategy(EquityStrategy):
+    """按对手本局的行动收窄各自的范围, 再对这些范围计算胜率(需要 numpy)"""
+    name = 'range'
+
+    def hand_equity(self, view: GameView, deadline: Optional[float] = None) -> float:
+        opponent_ranges = [ranges.from_actions(view.actions[seat], view.board, self.preflop_table)
+                           for seat in range(len(view.folded))
+                           if seat != view.seat and not view.folded[seat]]
+        if not opponent_ranges:
+            return super().hand_equity(view, deadline)
+        return equity(view.hole, view.board, iterations=self.iterations, ci=self.ci,
+                      rng=self.rng, deadline=deadline, ranges=opponent_ranges).equity
+
+
+class CFRStrategy(EquityStrategy):
+    """单挑时按 cfr.py 训练出的限注抽象策略行动, 加注大小为抽象中的固定下注额
+
+    多人桌或牌局无法对应到抽象下注树时(例如有人全下后不再行动)改用胜率策略。
+    """
+    name = 'cfr'
+
+    def __init__(self, path: Optional[str] = None, **kwargs):
+        super().__init__(**kwargs)
+        self.policy = cfr.CFRPolicy(path or cfr.DEFAULT_PATH)
+
+    def locate(self, view: GameView) -> int:
+        """当前局面在抽象下注树中的节点, 无法对应时返回 -1"""
+        if len(view.folded) != 2 or view.dealer < 0 or view.street not in cfr.STREETS:
+            return -1
+        history = []
+        for k, street in enumerate(cfr.STREETS[:cfr.STREETS.index(view.street) + 1]):
+            per_seat = [[a for s, a, _, _ in view.actions[seat] if s == street and not a.endswith('blind')]
+                        for seat in (0, 1)]
+            # 单挑时两人轮流行动: 翻牌前庄家(小盲)先行动, 翻牌后另一名玩家先行动
+            player = view.dealer if k == 0 else 1 - view.dealer
+            taken = [0, 0]
+            actions = []
+            while taken[player] < len(per_seat[player]):
+                a = per_seat[player][taken[player]]
+                actions.append(cfr.RAISE if a == 'raise' else cfr.FOLD if a == 'fold' else cfr.CALL)
+                taken[player] += 1
+                player = 1 - player
+            if taken != [len(per_seat[0]), len(per_seat[1])]:
+                return -1
+            history.append(actions)
+        node = self.policy.locate(history)
+        hero = 0 if view.seat == view.dealer else 1
+        tree = self.policy.tree
+        if node < 0 or tree.kind[node] != cfr.DECISION or tree.player[node] != hero \
+                or cfr.STREETS[tree.street[node]] != view.street:
+            return -1
+        return node
+
+    def decide(self, view: GameView, budget: float = DEFAULT_BUDGET) -> Tuple[str, int]:
+        node = self.locate(view)
+        if node < 0:
+            return super().decide(view, budget)
+        action = self.policy.sample(node, self.policy.bucket(view.hole, view.board), self.rng)
+        if action == cfr.RAISE:
+            street = cfr.STREETS.index(view.street)
+            return 'raise', view.current_bet + cfr.BET_SIZES[street] * view.big_blind // 2
+        if action == cfr.FOLD and view.to_call > 0:
+            return 'fold', 0
+        return 'call', view.current_bet
+
+
+class RandomStrategy:
+    """最初版本的AI: 随机生成"手牌强度", 作为比较其他策略的基准"""
+    name = 'random'
+
+    def __init__(self, rng: Optional[random.Random] = None):
+        self.rng = rng or random
+
+    def decide(self, view: GameView, budget: float = DEFAULT_BUDGET) -> Tuple[str, int]:
+        hand_strength = self.rng.random()
+        if hand_strength > 0.7:
+            return 'raise', view.current_bet * 2
+        elif hand_strength > 0.3:
+            return 'call', view.current_bet
+        else:
+            return 'fold', 0
+
+
+class HandRankStrategy:
+    """按已成牌型和底池赔率决策(test.py 的AI)"""
+    name = 'rules'
+
+    def __init__(self, rng: Optional[random.Random] = None):
+        self.rng = rng or random
+
+    def decide(self, view: GameView, budget: float = DEFAULT_BUDGET) -> Tuple[str, int]:
+        category = evaluator.category(evaluator.evaluate(view.hole + view.board))
+        pot_odds = view.pot / (view.to_call + 1e-8)
+        if category >= 5:  # 顺子及以上
+            return 'raise', view.current_bet * 2
+        if category >= 3 and pot_odds > 2:  # 两对及以上
+            return 'call', view.current_bet
+        if self.rng.random() < 0.15:
+            return 'raise', view.current_bet * 2
+        return 'fold', 0
+
+
+class RobotStrategy:
+    """在合法行动中随机选择, 加注幅度在一到两个最小加注之间(test1.py 的机器人)"""
+    name = 'robot'
+
+    def __init__(self, rng: Optional[random.Random] = None):
+        self.rng = rng or random
+
+    def decide(self, view: GameView, budget: float = DEFAULT_BUDGET) -> Tuple[str, int]:
+        if view.stack <= 0:
+            return 'check', 0
+        # 加注幅度的范围, 筹码不足一个最小加注时只能全下
+        min_raise = view.min_raise_to - view.current_bet
+        max_raise = view.max_raise_to - view.current_bet
+        action_options = ['call', 'fold']
+        if view.to_call == 0:
+            action_options.append('check')
+        if min_raise > 0:
+            action_options.append('raise')
+
+        choice = self.rng.choice(action_options)
+        if choice == 'raise':
+            raise_amount = self.rng.randint(min_raise, min(max_raise, min_raise * 2))
+            return 'raise', view.current_bet + raise_amount
+        elif choice == 'call' and view.to_call > 0:
+            return 'call', view.current_bet
+        elif choice == 'fold':
+            return 'fold', 0
+        else:
+            return 'check', 0
+
+
+class LatencyStats:
+    """决策耗时的对数直方图
+
+    每十倍划分 BUCKETS_PER_DECADE 个桶, 记录一次耗时为 O(1), 内存固定,
+    不同牌桌/进程的统计可以直接合并; 分位数的相对误差约为 6%。
+    """
+    __slots__ = ('counts', 'count', 'total', 'max', 'over_budget')
+
+    BUCKETS_PER_DECADE = 20
+    MIN_SECONDS = 1e-7   # 第一个桶的下界
+    DECADES = 9          # 覆盖 0.1 微秒 ~ 100 秒
+
+    def __init__(self):
+        self.counts = [0] * (self.BUCKETS_PER_DECADE * self.DECADES + 1)
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.over_budget = 0  # 超出时间预算的决策数
+
+    def record(self, seconds: float, budget: Optional[float] = None):
+        if seconds > self.MIN_SECONDS:
+            bucket = int(math.log10(seconds / self.MIN_SECONDS) * self.BUCKETS_PER_DECADE)
+            bucket = min(bucket, len(self.counts) - 1)
+        else:
+            bucket = 0
+        self.counts[bucket] += 1
+        self.count += 1
+        self.total += seconds
+        if seconds > self.max:
+            self.max = seconds
+        if budget is not None and seconds > budget:
+            self.over_budget += 1
+
+    def merge(self, other: 'LatencyStats'):
+        for i, c in enumerate(other.counts):
+            self.counts[i] += c
+        self.count += other.count
+        self.total += other.total
+        self.max = max(self.max, other.max)
+        self.over_budget += other.over_budget
+
+    @property
+    def mean(self) -> float:
+        return self.total / self.count if self.count else 0.0
+
+    def percentile(self, q: float) -> float:
+        """第 q 百分位(0~100)的耗时, 取所在桶的几何中点, 不超过最大值"""
+        if not self.count:
+            return 0.0
+        target = max(1, math.ceil(self.count * q / 100))
+        seen = 0
+        for bucket, c in enumerate(self.counts):
+            seen += c
+            if seen >= target:
+                value = self.MIN_SECONDS * 10 ** ((bucket + 0.5) / self.BUCKETS_PER_DECADE)
+                return min(value, self.max)
+        return self.max
+
+    def format(self) -> str:
+        ms = [self.percentile(q) * 1000 for q in (50, 90, 99)]
+        return (f"{self.count} 次决策 | p50 {ms[0]:.3f}ms p90 {ms[1]:.3f}ms p99 {ms[2]:.3f}ms "
+                f"最大 {self.max * 1000:.3f}ms | 超时 {self.over_budget} 次")
+
+
+def merge_latency(stats: Sequence[Optional[Dict[str, LatencyStats]]]) -> Dict[str, LatencyStats]:
+    """按策略名称合并多组耗时统计, 没有统计(None)的组跳过"""
+    merged: Dict[str, LatencyStats] = {}
+    for group in stats:
+        for name, s in (group or {}).items():
+            merged.setdefault(name, LatencyStats()).merge(s)
+    return merged
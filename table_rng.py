@@ -0,0 +1,160 @@
+"""牌桌随机数与洗牌
+
+每张牌桌持有一个 TableRNG, 洗牌和AI策略的随机选择都从它取随机数, 不再使用全局的 random 模块。
+每局开始时从牌桌种子派生出这一局的种子并写进日志和牌局记录,
+用 reseed(种子) 可以单独复现任意一局的发牌(以及不受时间预算影响的AI决策)。
+
+发牌用部分 Fisher-Yates 洗牌, 只打乱实际要发出的前 k 张牌;
+批量模拟需要的成批牌序由 numpy 的 PCG64 生成器按行向量化生成(没有 numpy 时逐行生成)。
+
+    python table_rng.py --samples 200000   # 卡方检验洗牌是否均匀
+"""
+import argparse
+import random
+import sys
+from statistics import NormalDist
+from typing import List, Optional, Sequence
+
+from cards import FULL_DECK
+
+try:
+    import numpy as np
+except ImportError:  # 没有 numpy 时批量牌序逐行用 random.Random 生成
+    np = None
+
+
+def partial_shuffle(deck: Sequence[int], k: int, rng: random.Random) -> List[int]:
+    """均匀随机地从 deck 中无放回抽出 k 张牌(有序), 只做 k 步 Fisher-Yates"""
+    cards = list(deck)
+    n = len(cards)
+    if k > n:
+        raise ValueError("剩余的牌不够抽取")
+    randrange = rng.randrange
+    for i in range(k):
+        j = randrange(i, n)
+        cards[i], cards[j] = cards[j], cards[i]
+    return cards[:k]
+
+
+def permutations(n: int, k: int, generator, deck: Sequence[int] = FULL_DECK):
+    """n 个相互独立的部分牌序, 每行是从 deck 中无放回抽出的 k 张牌
+
+    generator 为 numpy.random.Generator 时返回 (n, k) 的 int8 数组, 每步对所有行向量化交换;
+    为 random.Random 时返回列表的列表。
+    """
+    if np is None or not isinstance(generator, np.random.Generator):
+        return [partial_shuffle(deck, k, generator) for _ in range(n)]
+    deck = np.asarray(deck, dtype=np.int8)
+    if k > deck.size:
+        raise ValueError("剩余的牌不够抽取")
+    rows = np.tile(deck, (n, 1))
+    row_index = np.arange(n)
+    for j in range(k):
+        swap = generator.integers(j, deck.size, n)
+        picked = rows[row_index, swap]
+        rows[row_index, swap] = rows[:, j]
+        rows[:, j] = picked
+    return rows[:, :k]
+
+
+class TableRNG:
+    """一张牌桌的随机数来源
+
+    seed: 牌桌种子, None 时从系统熵源取一个; 同一个牌桌种子产生同样的每局种子序列
+    random: 当前这一局的 random.Random, 每局重新设定种子, 交给AI策略使用
+    """
+
+    def __init__(self, seed: Optional[int] = None):
+        self.seed = seed if seed is not None else random.SystemRandom().getrandbits(63)
+        self._hand_seeds = random.Random(self.seed)
+        self.random = random.Random()
+        self.hand_seed: Optional[int] = None
+
+    def new_hand(self) -> int:
+        """开始新的一局, 返回这一局的种子"""
+        self.reseed(self._hand_seeds.getrandbits(63))
+        return self.hand_seed
+
+    def reseed(self, hand_seed: int):
+        """设定这一局的种子, 用日志中记录的种子复现某一局"""
+        self.hand_seed = hand_seed
+        self.random.seed(hand_seed)
+
+    def deal(self, k: int, deck: Sequence[int] = FULL_DECK) -> List[int]:
+        """这一局要发出的 k 张牌, 按发牌顺序排列"""
+        return partial_shuffle(deck, k, self.random)
+
+    def generator(self):
+        """从这一局的随机数派生的 numpy PCG64 生成器, 没有 numpy 时返回 random.Random"""
+        seed = self.random.getrandbits(64)
+        if np is None:
+            return random.Random(seed)
+        return np.random.Generator(np.random.PCG64(seed))
+
+    def permutations(self, n: int, k: int = 52, deck: Sequence[int] = FULL_DECK):
+        """一批模拟用的 n 个部分牌序, 见 permutations()"""
+        return permutations(n, k, self.generator(), deck)
+
+
+def chi_square_p(statistic: float, df: int) -> float:
+    """卡方分布的右尾概率, 用 Wilson-Hilferty 正态近似(自由度较大时足够准确)"""
+    z = ((statistic / df) ** (1 / 3) - (1 - 2 / (9 * df))) / (2 / (9 * df)) ** 0.5
+    return 1 - NormalDist().cdf(z)
+
+
+def chi_square(counts: Sequence[int]) -> tuple:
+    """各格子期望相等时的卡方统计量, 返回 (统计量, 自由度, p 值)"""
+    total = sum(counts)
+    expected = total / len(counts)
+    statistic = sum((c - expected) ** 2 for c in counts) / expected
+    df = len(counts) - 1
+    return statistic, df, chi_square_p(statistic, df)
+
+
+def uniformity_tests(deals: List[List[int]], k: int) -> List[tuple]:
+    """检验一批牌序: 每个位置上各张牌出现的次数, 以及前两张牌的有序组合, 都应均匀分布"""
+    results = []
+    for position in range(k):
+        counts = [0] * 52
+        for deal in deals:
+            counts[deal[position]] += 1
+        results.append((f"第 {position + 1} 张牌", chi_square(counts)))
+    pairs = [0] * (52 * 52)
+    for deal in deals:
+        pairs[deal[0] * 52 + deal[1]] += 1
+    # 同一张牌不会出现两次, 去掉对角线上的格子
+    results.append(("前两张牌的组合", chi_square([c for i, c in enumerate(pairs) if i // 52 != i % 52])))
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="洗牌均匀性的卡方检验")
+    parser.add_argument('--samples', type=int, default=200000, help="每种洗牌方式抽取的牌序数")
+    parser.add_argument('--cards', type=int, default=5, help="检验每个牌序的前几张牌")
+    parser.add_argument('--seed', type=int, default=1, help="牌桌种子")
+    parser.add_argument('--alpha', type=float, default=1e-3, help="显著性水平")
+    args = parser.parse_args()
+
+    table = TableRNG(args.seed)
+    table.new_hand()
+    methods = [("逐局发牌(部分 Fisher-Yates)",
+                [table.deal(args.cards) for _ in range(args.samples)])]
+    if np is not None:
+        methods.append(("批量牌序(numpy PCG64)",
+                        table.permutations(args.samples, args.cards).tolist()))
+
+    # 多个检验同时进行, 按检验个数做 Bonferroni 校正
+    tests = args.cards + 1
+    failed = 0
+    for name, deals in methods:
+        print(f"{name}: {len(deals)} 个牌序")
+        for label, (statistic, df, p) in uniformity_tests(deals, args.cards):
+            ok = p >= args.alpha / tests
+            failed += not ok
+            print(f"  {label}: 卡方 {statistic:.1f} (自由度 {df}) p={p:.4f} {'通过' if ok else '不均匀'}")
+    print("全部通过" if not failed else f"{failed} 项检验未通过")
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
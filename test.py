@@ -1,7 +1,9 @@
-import random
-from itertools import combinations
 import sys
 
+import cards
+import evaluator
+from strategy import GameView, HandRankStrategy
+
 HAND_RANKS = {
     'HIGH_CARD': 0,
     'ONE_PAIR': 1,
@@ -15,20 +17,16 @@ HAND_RANKS = {
     'ROYAL_FLUSH': 9
 }
 
-class Card:
-    SUITS = ['♠', '♥', '♦', '♣']
-    RANKS = ['2', '3', '4', '5', '6', '7', '8', '9', '10', 'J', 'Q', 'K', 'A']
-    VALUE_MAP = {rank:i for i, rank in enumerate(RANKS)}
+class Card(cards.Card):
+    __slots__ = ()
     
-    def __init__(self, suit, rank):
-        self.suit = suit
-        self.rank = rank
-        
     def __repr__(self):
         return f"{self.rank}{self.suit}"
     
-    def value(self):
-        return self.VALUE_MAP[self.rank]
+    __str__ = __repr__
+
+# 共享的52张牌, 按牌编号排列
+CARDS = cards.make_pool(Card)
 
 class Player:
     def __init__(self, name, is_ai=False):
@@ -52,83 +50,41 @@ class TexasHoldem:
         self.current_bet = 0
         self.stage = "pre-flop"
         self.round_count = 1
+        self.strategy = HandRankStrategy()  # AI按成牌牌型和底池赔率决策
         
     def _create_deck(self):
-        suits = ['♠', '♥', '♦', '♣']
-        ranks = ['2','3','4','5','6','7','8','9','10','J','Q','K','A']
-        deck = [Card(s, r) for s in suits for r in ranks]
-        random.shuffle(deck)
-        return deck
+        return cards.new_deck()
     
     def deal_hole_cards(self):
         for _ in range(2):
             for player in self.players:
-                player.hand.append(self.deck.pop())
+                player.hand.append(CARDS[self.deck.pop()])
                 
     def deal_community(self, num_cards):
         for _ in range(num_cards):
-            self.community_cards.append(self.deck.pop())
+            self.community_cards.append(CARDS[self.deck.pop()])
             
     def evaluate_hand(self, player):
-        all_cards = player.hand + self.community_cards
-        best_rank = (-1, [])
-        
-        for combo in combinations(all_cards, 5):
-            sorted_values = sorted([c.value() for c in combo], reverse=True)
-            suits = [c.suit for c in combo]
-            
-            is_flush = len(set(suits)) == 1
-            straight = self._check_straight(sorted_values)
-            
-            if straight and is_flush:
-                rank = HAND_RANKS['ROYAL_FLUSH'] if sorted_values == [12,11,10,9,8] else HAND_RANKS['STRAIGHT_FLUSH']
-            elif self._check_kind(4, sorted_values):
-                rank = HAND_RANKS['FOUR_OF_KIND']
-            elif self._check_kind(3, sorted_values) and self._check_kind(2, sorted_values):
-                rank = HAND_RANKS['FULL_HOUSE']
-            elif is_flush:
-                rank = HAND_RANKS['FLUSH']
-            elif straight:
-                rank = HAND_RANKS['STRAIGHT']
-            elif self._check_kind(3, sorted_values):
-                rank = HAND_RANKS['THREE_OF_KIND']
-            elif self._check_two_pair(sorted_values):
-                rank = HAND_RANKS['TWO_PAIR']
-            elif self._check_kind(2, sorted_values):
-                rank = HAND_RANKS['ONE_PAIR']
-            else:
-                rank = HAND_RANKS['HIGH_CARD']
-            
-            if rank > best_rank[0]:
-                best_rank = (rank, sorted_values)
-                
-        return best_rank
-
-    def _check_straight(self, values):
-        if len(set(values)) < 5:
-            return False
-        if sorted(values) == [0,1,2,3,12]:
-            return True
-        return all(values[i] == values[0]-i for i in range(5))
-
-    def _check_kind(self, count, values):
-        return any(values.count(v) >= count for v in set(values))
-    
-    def _check_two_pair(self, values):
-        pairs = [v for v in set(values) if values.count(v) >= 2]
-        return len(pairs) >= 2
+        """返回 (HAND_RANKS 中的牌型等级, 整数强度), 整数强度可以直接比较大小"""
+        strength = evaluator.evaluate(c.index for c in player.hand + self.community_cards)
+        rank = evaluator.category(strength) - 1
+        if rank == HAND_RANKS['STRAIGHT_FLUSH'] and (strength >> 16) & 0xF == 14:
+            rank = HAND_RANKS['ROYAL_FLUSH']
+        return (rank, strength)
 
     def ai_decision(self, player):
-        hand_strength = self.evaluate_hand(player)[0]
-        pot_odds = self.pot / (self.current_bet - player.bet + 1e-8)
-        
-        if hand_strength >= HAND_RANKS['STRAIGHT']:
-            return 'raise'
-        if hand_strength >= HAND_RANKS['TWO_PAIR'] and pot_odds > 2:
-            return 'call'
-        if random.random() < 0.15:
-            return 'raise'
-        return 'fold'
+        # 本游戏的加注固定为翻倍, 只使用策略返回的行动
+        view = GameView(
+            seat=self.players.index(player), street=self.stage,
+            hole=tuple(c.index for c in player.hand),
+            board=tuple(c.index for c in self.community_cards),
+            pot=self.pot, current_bet=self.current_bet,
+            to_call=max(self.current_bet - player.bet, 0),
+            min_raise_to=self.current_bet * 2, max_raise_to=player.bet + player.chips,
+            stack=player.chips, bet=player.bet,
+            n_opponents=sum(1 for p in self.players if not p.folded and p is not player),
+            big_blind=0)
+        return self.strategy.decide(view)[0]
 
     def clear_line(self):
         """使用ANSI控制符清除当前行 <button class="citation-flag" data-index="6">"""
@@ -196,7 +152,7 @@ class TexasHoldem:
             self.betting_round()
             
         self.show_all_hands()
-        winner = max(self.players, key=lambda p: self.evaluate_hand(p)[0])
+        winner = max((p for p in self.players if not p.folded), key=self.evaluate_hand)
         print(f"\n胜者: {winner.name} 获得{self.pot}筹码！")
 
 if __name__ == "__main__":
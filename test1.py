@@ -1,23 +1,32 @@
-import random
 from collections import defaultdict
 
-class Card:
-    def __init__(self, suit, rank):
-        self.suit = suit
-        self.rank = rank
+import cards
+import evaluator
+import showdown
+from betting import BettingRound
+from strategy import DEFAULT_BUDGET, RobotStrategy, snapshot
+
+class Card(cards.Card):
+    __slots__ = ()
 
     def __repr__(self):
         return f"{self.rank} of {self.suit}"
 
+    __str__ = __repr__
+
+# 共享的52张牌, 按牌编号排列
+CARDS = cards.make_pool(Card)
+
+# 公共牌张数 -> 下注轮名称
+STREETS = {0: 'preflop', 3: 'flop', 4: 'turn', 5: 'river'}
+
 class Deck:
     def __init__(self):
-        suits = ['♠', '♥', '♦', '♣']
-        ranks = ['2', '3', '4', '5', '6', '7', '8', '9', '10', 'J', 'Q', 'K', 'A']
-        self.cards = [Card(suit, rank) for suit in suits for rank in ranks]
-        random.shuffle(self.cards)
+        # 牌组只保存牌编号
+        self.cards = cards.new_deck()
 
     def deal(self):
-        return self.cards.pop() if self.cards else None
+        return CARDS[self.cards.pop()] if self.cards else None
 
 class Player:
     def __init__(self, name, is_robot=False, chips=1000):
@@ -27,39 +36,22 @@ class Player:
         self.is_robot = is_robot
         self.folded = False
         self.current_bet = 0
+        self.strategy = RobotStrategy() if is_robot else None
 
     def reset(self):
         self.hand = []
         self.folded = False
         self.current_bet = 0
 
-    def decide_action(self, current_bet, min_raise):
+    def decide_action(self, view):
+        """view 为 strategy.GameView, 返回 (行动, 加注到的下注额)"""
         if self.is_robot:
-            return self.robot_strategy(current_bet, min_raise)
-        else:
-            return self.human_input(current_bet)
-
-    def robot_strategy(self, current_bet, min_raise):
-        if self.chips <= 0:
-            return ('check', 0)
-
-        action_options = ['call', 'fold']
-        if current_bet == 0:
-            action_options.append('check')
-        if self.chips >= min_raise:
-            action_options.append('raise')
-
-        choice = random.choice(action_options)
-        
-        if choice == 'raise':
-            raise_amount = random.randint(min_raise, min(self.chips, min_raise*2))
-            return ('raise', raise_amount)
-        elif choice == 'call' and current_bet > 0:
-            return ('call', current_bet)
-        elif choice == 'fold':
-            return ('fold', 0)
-        else:
-            return ('check', 0)
+            return self.strategy.decide(view, DEFAULT_BUDGET)
+        action, amount = self.human_input(view.to_call)
+        if action == 'raise':
+            # 玩家输入的加注金额是在当前下注额之上再加的部分
+            amount += view.current_bet
+        return action, amount
 
     def human_input(self, current_bet):
         print(f"\nYour hand: {self.hand}")
@@ -87,6 +79,7 @@ class PokerGame:
         self.pot = 0
         self.current_bet = 0
         self.min_raise = 50
+        self.betting = BettingRound(len(players), big_blind=self.min_raise)
 
     def reset_game(self):
         self.deck = Deck()
@@ -95,6 +88,7 @@ class PokerGame:
         self.current_bet = 0
         for player in self.players:
             player.reset()
+        self.betting.start_hand([p.chips for p in self.players])
 
     def deal_hole_cards(self):
         for _ in range(2):
@@ -103,136 +97,37 @@ class PokerGame:
                     player.hand.append(self.deck.deal())
 
     def betting_round(self, is_preflop=False):
-        active_players = [p for p in self.players if not p.folded]
-        last_raiser = None
-        bets_cleared = False
-
-        while not bets_cleared:
-            bets_cleared = True
-            for player in active_players:
-                if player.folded or player == last_raiser:
-                    continue
-
-                action, amount = player.decide_action(self.current_bet, self.min_raise)
-                print(f"{player.name} {action}s {amount if amount else ''}")
-
-                if action == 'fold':
-                    player.folded = True
-                elif action == 'call':
-                    diff = self.current_bet - player.current_bet
-                    player.chips -= diff
-                    player.current_bet += diff
-                    self.pot += diff
-                elif action == 'raise':
-                    self.current_bet += amount
-                    player.chips -= amount
-                    player.current_bet += amount
-                    self.pot += amount
-                    last_raiser = player
-                    bets_cleared = False
-                elif action == 'check':
-                    continue
-
-            # 检查所有玩家是否平注
-            active_players = [p for p in self.players if not p.folded]
-            if all(p.current_bet == self.current_bet for p in active_players):
-                break
+        betting = self.betting
+        betting.start_street()
+        for player in self.players:
+            player.current_bet = 0
+
+        # 有人加注后其他玩家要重新表态, 直到所有人跟平
+        while not betting.round_over:
+            seat = betting.to_act
+            player = self.players[seat]
+            view = snapshot(betting, seat, [c.index for c in player.hand],
+                            [c.index for c in self.community_cards], STREETS[len(self.community_cards)])
+            action, amount = player.decide_action(view)
+            put = betting.submit(action, amount)
+            action = betting.last_action
+            print(f"{player.name} {action}s {put if put else ''}")
+
+            player.chips = betting.stack[seat]
+            player.current_bet = betting.bet[seat]
+            player.folded = betting.folded[seat]
+        self.pot = betting.pot
+        self.current_bet = betting.current_bet
 
     def deal_community_cards(self, num_cards):
         for _ in range(num_cards):
             self.community_cards.append(self.deck.deal())
 
-    def evaluate_hand_strength(self):
-        """评估手牌强度（0-1范围）"""
-        if len(self.hand) < 2:
-            return 0.0
-
-        rank_values = {'2':2, '3':3, '4':4, '5':5, '6':6, 
-                      '7':7, '8':8, '9':9, '10':10, 
-                      'J':11, 'Q':12, 'K':13, 'A':14}
-        c1, c2 = self.hand
-        r1, r2 = rank_values[c1.rank], rank_values[c2.rank]
-        max_r, min_r = max(r1, r2), min(r1, r2)
-        
-        # 对子判断
-        if r1 == r2:
-            return 0.8 + max_r/140  # 对子基础强度0.8-0.95
-        
-        suited = c1.suit == c2.suit
-        gap = max_r - min_r
-        connected = gap == 1
-        
-        # 强度计算
-        strength = max_r/140 + min_r/280
-        if suited: strength += 0.12
-        if connected: strength += 0.1
-        if gap == 0: strength += 0.15  # 对子已处理
-        if gap == 2: strength += 0.05
-        
-        return min(strength, 1.0)
-
-    def robot_strategy(self, current_bet, min_raise):
-        """改进的机器人策略"""
-        strength = self.evaluate_hand_strength()
-        chips_ratio = self.chips / 1000  # 初始筹码比例
-        
-        action_prob = {
-            'fold': max(0, 0.4 - strength*0.8),
-            'call': 0.3 + strength*0.3,
-            'raise': 0.3 + strength*0.5,
-            'check': 0.2 - strength*0.1
-        }
-        
-        # 根据当前注额调整选项
-        valid_actions = []
-        if current_bet == 0:
-            valid_actions.extend(['check', 'raise'])
-        else:
-            valid_actions.extend(['call', 'fold', 'raise'])
-        
-        # 移除无效选项
-        action_prob = {k:v for k,v in action_prob.items() if k in valid_actions}
-        
-        # 标准化概率
-        total = sum(action_prob.values())
-        rand = random.uniform(0, total)
-        cumulative = 0
-        for action, prob in action_prob.items():
-            cumulative += prob
-            if rand <= cumulative:
-                chosen_action = action
-                break
-        
-        # 处理具体动作
-        if chosen_action == 'raise':
-            base_raise = max(min_raise, int(current_bet * 1.5))
-            raise_amount = int(base_raise * (0.8 + strength*0.5))
-            raise_amount = min(raise_amount, self.chips)
-            return ('raise', raise_amount) if raise_amount >= min_raise else ('call', current_bet)
-        
-        if chosen_action == 'call':
-            call_amount = min(current_bet, self.chips)
-            return ('call', call_amount)
-        
-        if chosen_action == 'check':
-            return ('check', 0)
-        
-        return ('fold', 0)
-
     def show_down(self):
-        active_players = [p for p in self.players if not p.folded]
-        if len(active_players) == 1:
-            return [active_players[0]]
-
-        scores = []
-        for player in active_players:
-            full_hand = player.hand + self.community_cards
-            score = self.evaluate_hand(full_hand)
-            scores.append((score, player))
-        
-        max_score = max(scores)[0]
-        winners = [p for s, p in scores if s == max_score]
-        return winners
+        """按每名玩家的投入划分主池和边池并决出每个池的赢家"""
+        strengths = [None if p.folded else evaluator.evaluate(card.index for card in p.hand + self.community_cards)
+                     for p in self.players]
+        return showdown.resolve(self.betting.committed[:len(self.players)], strengths)
 
     def play_round(self):
         self.reset_game()
@@ -261,9 +156,10 @@ class PokerGame:
         self.betting_round()
         
         # Showdown
-        winners = self.show_down()
-        prize = self.pot // len(winners)
-        for winner in winners:
+        result = self.show_down()
+        for seat in result.winners:
+            winner = self.players[seat]
+            prize = result.payouts[seat]
             winner.chips += prize
             print(f"{winner.name} wins {prize} chips!")
         
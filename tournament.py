@@ -0,0 +1,158 @@
+"""多进程锦标赛/回归测试
+
+把大量独立的AI牌桌分配到进程池中并行模拟, 每张牌桌使用由主种子派生的独立种子,
+牌桌完成后立即把结果传回主进程汇总: 每种策略的筹码期望、bb/100 及其置信区间,
+以及合并所有牌桌后的决策耗时分位数。
+相同的主种子和参数总能得到相同的结果, 与进程数和完成顺序无关。
+
+    python tournament.py --tables 64 --hands 2000 --players 6 --strategies equity,random --seed 1
+"""
+import argparse
+import math
+import os
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from statistics import NormalDist
+from typing import Callable, Dict, List, NamedTuple, Optional, Sequence
+
+from main import BIG_BLIND  # 计算 bb/100 时使用牌局的大盲注
+from simulator import STRATEGIES, SimulationResult, check_strategies, format_latency, run_simulation
+from strategy import DEFAULT_BUDGET, merge_latency
+
+
+class TableResult(NamedTuple):
+    table: int                 # 牌桌编号
+    seed: int                  # 牌桌使用的随机种子
+    result: SimulationResult
+
+
+class StrategyStats(NamedTuple):
+    strategy: str
+    seat_hands: int      # 该策略所有座位参与的总局数
+    net: int             # 总净输赢筹码
+    chips_per_hand: float
+    bb_per_100: float
+    ci: float            # bb/100 置信区间的半宽(以牌桌为样本)
+
+
+def table_seeds(master_seed: int, tables: int) -> List[int]:
+    """由主种子派生出每张牌桌的种子"""
+    rng = random.Random(master_seed)
+    return [rng.getrandbits(63) for _ in range(tables)]
+
+
+def _play_table(table: int, seed: int, hands: int, players: int, chips: int,
+                strategies: Sequence[str], decision_budget: float = DEFAULT_BUDGET) -> TableResult:
+    """在工作进程中模拟一张牌桌; 策略按牌桌编号轮换座位, 消除位置带来的偏差"""
+    shift = table % len(strategies)
+    rotated = list(strategies[shift:]) + list(strategies[:shift])
+    return TableResult(table, seed, run_simulation(hands, players, seed, chips, rotated,
+                                                   decision_budget=decision_budget))
+
+
+def summarize(results: Sequence[TableResult], confidence: float = 0.95,
+              big_blind: int = BIG_BLIND) -> List[StrategyStats]:
+    """按策略汇总所有牌桌的结果"""
+    # 按牌桌编号排序后汇总, 保证结果与完成顺序无关
+    results = sorted(results, key=lambda r: r.table)
+    z = NormalDist().inv_cdf(0.5 + confidence / 2)
+    samples: Dict[str, List[float]] = {}
+    totals: Dict[str, List[int]] = {}
+    for table in results:
+        per_table: Dict[str, List[int]] = {}
+        for p in table.result.players:
+            entry = per_table.setdefault(p.strategy, [0, 0])
+            entry[0] += p.net
+            entry[1] += table.result.hands
+        for name, (net, seat_hands) in per_table.items():
+            total = totals.setdefault(name, [0, 0])
+            total[0] += net
+            total[1] += seat_hands
+            samples.setdefault(name, []).append(net / big_blind / seat_hands * 100)
+
+    stats = []
+    for name in sorted(totals):
+        net, seat_hands = totals[name]
+        values = samples[name]
+        if len(values) > 1:
+            mean = sum(values) / len(values)
+            variance = sum((v - mean) ** 2 for v in values) / (len(values) - 1)
+            ci = z * math.sqrt(variance / len(values))
+        else:
+            ci = float('inf')
+        stats.append(StrategyStats(name, seat_hands, net, net / seat_hands,
+                                   net / big_blind / seat_hands * 100, ci))
+    return stats
+
+
+def run_tournament(tables: int, hands: int, players: int = 6,
+                   strategies: Sequence[str] = ('equity', 'random'), master_seed: int = 0,
+                   chips: int = 1000, workers: Optional[int] = None,
+                   on_result: Optional[Callable[[TableResult], None]] = None,
+                   decision_budget: float = DEFAULT_BUDGET) -> List[TableResult]:
+    """并行模拟 tables 张牌桌, 每张 hands 局; 每完成一张牌桌调用一次 on_result"""
+    # 在主进程里先检查, 不要等到工作进程创建策略时才失败
+    check_strategies(strategies)
+    seeds = table_seeds(master_seed, tables)
+    results = []
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = [pool.submit(_play_table, i, seed, hands, players, chips, tuple(strategies),
+                               decision_budget)
+                   for i, seed in enumerate(seeds)]
+        for future in as_completed(futures):
+            result = future.result()
+            results.append(result)
+            if on_result is not None:
+                on_result(result)
+    return sorted(results, key=lambda r: r.table)
+
+
+def format_stats(stats: Sequence[StrategyStats], confidence: float = 0.95) -> str:
+    lines = []
+    for s in sorted(stats, key=lambda s: s.bb_per_100, reverse=True):
+        lines.append(f"{s.strategy}: {s.bb_per_100:+.2f} bb/100 (±{s.ci:.2f}, {confidence:.0%}) | "
+                     f"每局 {s.chips_per_hand:+.3f} 筹码 | 净输赢 {s.net:+d} | 座位局数 {s.seat_hands}")
+    return "\n".join(lines)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="多进程AI策略锦标赛")
+    parser.add_argument('--tables', type=int, default=os.cpu_count() or 1, help="牌桌数量")
+    parser.add_argument('--hands', type=int, default=1000, help="每张牌桌的局数")
+    parser.add_argument('--players', type=int, default=6, help="每张牌桌的玩家数量 (2-10)")
+    parser.add_argument('--strategies', default='equity,random',
+                        help=f"逗号分隔的策略名称, 按座位轮流分配, 可选: {', '.join(STRATEGIES)}")
+    parser.add_argument('--seed', type=int, default=0, help="主随机种子")
+    parser.add_argument('--chips', type=int, default=1000, help="每名玩家的初始筹码")
+    parser.add_argument('--workers', type=int, default=None, help="进程数, 默认CPU核数")
+    parser.add_argument('--budget-ms', type=float, default=DEFAULT_BUDGET * 1000,
+                        help="AI每次决策的时间预算(毫秒)")
+    args = parser.parse_args()
+
+    strategies = [s.strip() for s in args.strategies.split(',') if s.strip()]
+    try:
+        check_strategies(strategies)
+    except ValueError as e:
+        raise SystemExit(str(e))
+    done = 0
+    start = time.perf_counter()
+
+    def report(result: TableResult):
+        nonlocal done
+        done += 1
+        print(f"牌桌 {result.table + 1} 完成 ({done}/{args.tables}), "
+              f"每秒 {result.result.hands_per_second:.0f} 局")
+
+    results = run_tournament(args.tables, args.hands, args.players, strategies, args.seed,
+                             args.chips, args.workers, report, args.budget_ms / 1000)
+    seconds = time.perf_counter() - start
+    total_hands = args.tables * args.hands
+    print(f"\n共 {total_hands} 局, 用时 {seconds:.1f} 秒, 每秒 {total_hands / seconds:.0f} 局")
+    print(format_stats(summarize(results)))
+    for line in format_latency(merge_latency([r.result.latency for r in results])):
+        print(line)
+
+
+if __name__ == "__main__":
+    main()